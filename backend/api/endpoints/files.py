@@ -1,10 +1,14 @@
-from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form, Request
 import shutil
 import os
 from pathlib import Path
 from typing import List
+from urllib.parse import quote
 from backend.core.config import settings
-from backend.utils.file_utils import save_upload_file, get_file_info, list_files
+import asyncio
+from backend.core.exceptions import AgentKException
+from backend.utils.file_responses import DownloadResponse
+from backend.utils.file_utils import stream_upload, get_file_info, list_files, get_upload_index, is_partial_upload
 
 router = APIRouter()
 
@@ -29,8 +33,9 @@ async def upload_file(
 ):
     """Upload a file"""
     try:
-        file_path = await save_upload_file(file, directory)
-        file_info = get_file_info(file_path)
+        upload = await stream_upload(file, directory)
+        file_path = upload["path"]
+        file_info = await get_file_info(file_path)
         
         # In a real implementation, you might store file metadata in database
         # and associate it with an agent if agent_id is provided
@@ -40,31 +45,48 @@ async def upload_file(
             "filename": file.filename,
             "file_path": str(file_path),
             "file_info": file_info,
+            "sha256": upload["sha256"],
             "agent_id": agent_id
         }
+    except AgentKException as e:
+        raise HTTPException(status_code=e.code, detail=e.message)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error uploading file: {str(e)}"
         )
 
-@router.get("/download/{file_path:path}")
-async def download_file(file_path: str):
-    """Download a file (placeholder - would use FileResponse in real implementation)"""
-    full_path = Path(settings.UPLOAD_PATH) / file_path
+@router.get("/search")
+async def search_files(q: str, limit: int = 20):
+    """Find the lines of uploaded files matching keywords and quoted phrases"""
+    try:
+        hits = await asyncio.to_thread(get_upload_index().search, q, min(limit, 100), "uploads")
+        return {"query": q, "results": hits, "count": len(hits)}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error searching files: {str(e)}"
+        )
+
+@router.api_route("/download/{file_path:path}", methods=["GET", "HEAD"])
+async def download_file(file_path: str, request: Request):
+    """Download a file, with Range, conditional requests and precompressed variants"""
+    upload_path = Path(settings.UPLOAD_PATH).resolve()
+    full_path = (upload_path / file_path).resolve()
     
-    if not full_path.exists() or not full_path.is_file():
+    if upload_path not in full_path.parents or not full_path.is_file() or is_partial_upload(full_path):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found"
         )
     
-    # In a real implementation, you would return a FileResponse
-    return {
-        "success": True,
-        "file_path": str(full_path),
-        "message": "File would be downloaded in real implementation"
-    }
+    # Behind nginx, hand the file to it so it is sent with sendfile
+    accel_redirect = None
+    if settings.DOWNLOAD_ACCEL_REDIRECT:
+        relative_path = full_path.relative_to(upload_path).as_posix()
+        accel_redirect = f"{settings.DOWNLOAD_ACCEL_REDIRECT.rstrip('/')}/{quote(relative_path)}"
+    
+    return DownloadResponse(full_path, request.headers, request.method, accel_redirect=accel_redirect)
 
 @router.delete("/{file_path:path}")
 async def delete_file(file_path: str):
@@ -82,6 +104,7 @@ async def delete_file(file_path: str):
             full_path.unlink()
         else:
             shutil.rmtree(full_path)
+        get_upload_index().schedule(str(full_path))
         
         return {"success": True, "message": "File deleted successfully"}
     except Exception as e:
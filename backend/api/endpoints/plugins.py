@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Any
+import json
 from backend.services.plugin_service import PluginService
 
 router = APIRouter()
@@ -93,4 +95,32 @@ async def execute_plugin(plugin_id: str, parameters: Dict[str, Any], service: Pl
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error executing plugin: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.post("/{plugin_id}/execute/stream")
+async def stream_plugin(plugin_id: str, parameters: Dict[str, Any], service: PluginService = Depends(PluginService)):
+    """
+    Execute a plugin and stream its progress as server-sent events.
+    Each event is named after its type, e.g. "output" or "result", and
+    carries the event as JSON. Disconnecting stops the execution.
+    """
+    try:
+        events = await service.stream_plugin(plugin_id, parameters)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error executing plugin: {str(e)}"
+        )
+    
+    async def encode_events():
+        try:
+            async for event in events:
+                yield f"event: {event.get('type', 'message')}\ndata: {json.dumps(event, default=str)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+    
+    return StreamingResponse(
+        encode_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,12 +1,187 @@
-from fastapi import APIRouter
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional
+import json
 from backend.models.workflow import Workflow
+from backend.services.workflow_batch import iter_jsonl
+from backend.services.workflow_events import RUN_FINISHED_EVENTS
+from backend.services.workflow_service import WorkflowService
+from backend.core.config import settings
+from backend.core.security import get_current_user
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Workflow])
-async def get_all_workflows():
+async def get_all_workflows(service: WorkflowService = Depends(WorkflowService)):
     """
     Endpoint to retrieve a list of all defined workflows.
     """
-    return []
\ No newline at end of file
+    return await service.list_workflows()
+
+@router.post("/{workflow_id}/runs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_workflow_run(
+    workflow_id: str,
+    input_data: Dict[str, Any],
+    service: WorkflowService = Depends(WorkflowService),
+    current_user: dict = Depends(get_current_user)
+):
+    """Queue a workflow run; returns the run ID immediately"""
+    try:
+        return await service.submit_workflow(workflow_id, input_data, user_id=current_user.get("id"))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.post("/{workflow_id}/estimate")
+async def estimate_workflow_run(workflow_id: str, service: WorkflowService = Depends(WorkflowService)):
+    """Predict p10/p50/p90 duration, token usage and cost of a run, with its critical path"""
+    try:
+        return await service.estimate_workflow(workflow_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.post("/{workflow_id}/batch")
+async def execute_workflow_batch(
+    workflow_id: str,
+    request: Request,
+    concurrency: Optional[int] = None,
+    service: WorkflowService = Depends(WorkflowService)
+):
+    """
+    Run a workflow over a JSONL request body, one input object per line.
+    Streams one JSON result per line as items finish, then a throughput summary.
+    Lines over WORKFLOW_BATCH_MAX_RECORD_BYTES fail as their own items.
+    """
+    if concurrency is not None and concurrency < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="concurrency must be at least 1"
+        )
+    try:
+        items = iter_jsonl(request.stream(), settings.WORKFLOW_BATCH_MAX_RECORD_BYTES)
+        results = await service.execute_batch(workflow_id, items, concurrency)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    async def encode_results():
+        async for result in results:
+            yield json.dumps(result, default=str) + "\n"
+    
+    return StreamingResponse(encode_results(), media_type="application/x-ndjson")
+
+@router.get("/queue/metrics")
+async def get_queue_metrics(service: WorkflowService = Depends(WorkflowService)):
+    """Get workflow run queue depth and latency metrics"""
+    return service.get_queue_metrics()
+
+@router.get("/history/runs")
+async def get_run_history(
+    workflow_id: Optional[str] = None,
+    limit: int = 50,
+    service: WorkflowService = Depends(WorkflowService)
+):
+    """Get the most recently finished workflow runs"""
+    return await service.get_recent_runs(workflow_id, limit)
+
+@router.get("/history/stats/runs")
+async def get_run_stats(
+    workflow_id: Optional[str] = None,
+    days: float = 7,
+    service: WorkflowService = Depends(WorkflowService)
+):
+    """Get p50/p95/p99 run durations, failure rates and token usage per workflow"""
+    return await service.get_run_stats(workflow_id, days)
+
+@router.get("/history/stats/steps")
+async def get_step_stats(
+    workflow_id: Optional[str] = None,
+    step_id: Optional[str] = None,
+    days: float = 7,
+    service: WorkflowService = Depends(WorkflowService)
+):
+    """Get p50/p95/p99 step durations, error and cache hit rates and token usage, slowest first"""
+    return await service.get_step_stats(workflow_id, step_id, days)
+
+@router.get("/runs/{run_id}")
+async def get_workflow_run(run_id: str, service: WorkflowService = Depends(WorkflowService)):
+    """Get the state of a workflow run and its checkpointed steps"""
+    run = await service.get_run(run_id)
+    if not run:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Workflow run with ID {run_id} not found"
+        )
+    return run
+
+@router.get("/{workflow_id}", response_model=Workflow)
+async def get_workflow(workflow_id: str, service: WorkflowService = Depends(WorkflowService)):
+    """Get a workflow definition by ID or name"""
+    workflow = await service.find_workflow(workflow_id)
+    if not workflow:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Workflow {workflow_id} not found"
+        )
+    return workflow
+
+@router.websocket("/runs/{run_id}/events")
+async def stream_workflow_run_events(
+    websocket: WebSocket,
+    run_id: str,
+    service: WorkflowService = Depends(WorkflowService)
+):
+    """Stream live step and token progress events for a workflow run"""
+    await websocket.accept()
+    
+    # Subscribe before reading the snapshot so no event falls in between
+    subscription = service.subscribe_run(run_id)
+    try:
+        run = await service.get_run(run_id)
+        if not run:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=f"Workflow run with ID {run_id} not found")
+            return
+        
+        await websocket.send_json({
+            "type": "snapshot",
+            "run_id": run_id,
+            "status": run["status"],
+            "completed_steps": run["completed_steps"]
+        })
+        if run["status"] in ("completed", "failed"):
+            await websocket.close()
+            return
+        
+        while True:
+            event = await subscription.get()
+            await websocket.send_json(event)
+            if event["type"] in RUN_FINISHED_EVENTS:
+                break
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        service.unsubscribe_run(subscription)
+
+@router.post("/runs/{run_id}/resume")
+async def resume_workflow_run(run_id: str, service: WorkflowService = Depends(WorkflowService)):
+    """Resume a failed or cancelled workflow run from its first incomplete step"""
+    try:
+        return await service.resume_run(run_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error resuming workflow run: {str(e)}"
+        )
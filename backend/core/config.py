@@ -1,11 +1,42 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 class Settings(BaseSettings):
     BACKEND_HOST: str = "0.0.0.0"
     BACKEND_PORT: int = 8000
     CORS_ORIGINS: List[str] = ["http://127.0.0.1:5500"]
 
+    # Workflow engine
+    WORKFLOW_MAX_PARALLELISM: int = 4
+    WORKFLOW_DEFAULT_MODEL_TYPE: str = "lmstudio"
+    WORKFLOW_STEP_CACHE_SIZE: int = 1024
+    WORKFLOW_STEP_CACHE_TTL: int = 3600
+    WORKFLOW_CHECKPOINT_DB: str = "./data/databases/workflow_runs.db"
+    WORKFLOW_WORKERS: int = 4
+    WORKFLOW_AGENT_CONCURRENCY: int = 2
+    WORKFLOW_PLUGIN_CONCURRENCY: int = 2
+    WORKFLOW_CONCURRENCY_OVERRIDES: Dict[str, int] = {}
+    WORKFLOW_EVENT_BUFFER_SIZE: int = 100
+    WORKFLOW_BATCH_CONCURRENCY: int = 16
+    WORKFLOW_BATCH_MAX_RECORD_BYTES: int = 1048576
+    WORKFLOW_HISTORY_DB: str = "./data/databases/workflow_history.db"
+    WORKFLOW_HISTORY_RETENTION_DAYS: int = 30
+    WORKFLOW_DEFINITION_PATHS: List[str] = ["./workflow", "./frontend/config/workflows.json"]
+    WORKFLOW_REGISTRY_POLL_INTERVAL: float = 2.0
+    WORKFLOW_ESTIMATE_DEFAULT_DURATION: float = 5.0
+    WORKFLOW_ESTIMATE_DEFAULT_TOKENS: int = 500
+    WORKFLOW_ESTIMATE_HISTORY_DAYS: int = 30
+    WORKFLOW_TOKEN_COST_PER_1K: float = 0.0
+
+    # Plugins
+    PLUGIN_MANIFEST_INDEX: str = "./data/plugin_manifests.json"
+
+    # Files
+    UPLOAD_PATH: str = "./data/uploads"
+    MAX_FILE_SIZE: int = 10485760
+    DOWNLOAD_ACCEL_REDIRECT: str = ""
+    TEXT_INDEX_DB: str = "./data/databases/text_index.db"
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
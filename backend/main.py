@@ -1,7 +1,12 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
-from plugins.plugin_manager import plugin_manager
+from plugins.plugin_manager import get_plugin_manager
+from backend.utils.llm_connector import close_session
+from backend.utils.file_utils import get_upload_index
+from plugins.text_index import set_default_index_path
+from backend.services.workflow_service import WorkflowService
 
 # Initialize the FastAPI app
 app = FastAPI()
@@ -53,6 +58,9 @@ async def lifespan(app: FastAPI):
     await init_db()
     app.state.db = get_db()
     
+    # Plugins share the uploads' full-text index
+    set_default_index_path(settings.TEXT_INDEX_DB)
+    
     # Initialize plugin manager
     app.state.plugin_manager = await get_plugin_manager()
     
@@ -60,10 +68,20 @@ async def lifespan(app: FastAPI):
     Path(settings.UPLOAD_PATH).mkdir(parents=True, exist_ok=True)
     Path(settings.LOG_PATH).mkdir(parents=True, exist_ok=True)
     
+    # Index uploads added or changed while the server was down
+    await asyncio.to_thread(get_upload_index().sync, "uploads")
+    
+    # Start the run workers; runs left pending or running by the last process are queued again
+    app.state.workflow_scheduler = WorkflowService().scheduler
+    await app.state.workflow_scheduler.start()
+    
     print(f"🚀 {settings.APP_NAME} starting in {settings.APP_ENV} mode")
     yield
     
     # Shutdown: Clean up resources
+    if hasattr(app.state, 'workflow_scheduler'):
+        await app.state.workflow_scheduler.stop()
     if hasattr(app.state, 'plugin_manager'):
         await app.state.plugin_manager.cleanup()
+    await close_session()
     print("🛑 Shutting down AgentK")
\ No newline at end of file
@@ -1,14 +1,22 @@
-from pydantic import BaseModel
-from typing import List, Dict
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
 
 class WorkflowStep(BaseModel):
     id: str
-    name: str
-    tool: str
-    params: Dict
+    name: Optional[str] = None
+    tool: Optional[str] = None
+    params: Dict = Field(default_factory=dict)
+    agent: Optional[str] = None
+    action: Optional[str] = None
+    inputs: List[str] = Field(default_factory=list)
+    outputs: List[str] = Field(default_factory=list)
+    parameters: Dict[str, Any] = Field(default_factory=dict)
+    memoize: bool = True
+    map: Optional[Dict[str, Any]] = None
 
 class Workflow(BaseModel):
     id: str
     name: str
     description: str
-    steps: List[WorkflowStep]
\ No newline at end of file
+    version: Optional[str] = None
+    steps: List[WorkflowStep]
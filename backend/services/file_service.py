@@ -1,27 +1,21 @@
 from typing import List, Dict, Any
 from pathlib import Path
-import aiofiles
+import asyncio
 import shutil
 from fastapi import UploadFile
 from backend.core.config import settings
+from backend.utils.file_utils import get_upload_index, stream_upload, is_partial_upload
 
 class FileService:
     def __init__(self):
         self.upload_path = Path(settings.UPLOAD_PATH)
         self.upload_path.mkdir(parents=True, exist_ok=True)
+        self.text_index = get_upload_index()
     
     async def save_upload_file(self, file: UploadFile, directory: str = "") -> Path:
         """Save an uploaded file to the specified directory"""
-        directory_path = self.upload_path / directory
-        directory_path.mkdir(parents=True, exist_ok=True)
-        
-        file_path = directory_path / file.filename
-        
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
-        
-        return file_path
+        upload = await stream_upload(file, directory, self.upload_path)
+        return upload["path"]
     
     async def list_files(self, directory: str = "") -> List[Dict[str, Any]]:
         """List files in the specified directory"""
@@ -32,7 +26,7 @@ class FileService:
         
         files = []
         for file_path in directory_path.iterdir():
-            if file_path.is_file():
+            if file_path.is_file() and not is_partial_upload(file_path):
                 files.append({
                     "name": file_path.name,
                     "path": str(file_path.relative_to(self.upload_path)),
@@ -54,11 +48,17 @@ class FileService:
                 full_path.unlink()
             else:
                 shutil.rmtree(full_path)
+            # For a directory, drops the files that were under it from the search index
+            self.text_index.schedule(str(full_path))
             return True
         except Exception as e:
             print(f"Error deleting file: {str(e)}")
             return False
     
+    async def search_files(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Find the lines of uploaded files matching a query"""
+        return await asyncio.to_thread(self.text_index.search, query, limit, "uploads")
+    
     async def get_file_info(self, file_path: str) -> Dict[str, Any]:
         """Get information about a file"""
         full_path = self.upload_path / file_path
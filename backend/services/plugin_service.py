@@ -1,16 +1,24 @@
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any
 import importlib
-import inspect
 from pathlib import Path
 from backend.models.plugin import Plugin, PluginCreate, PluginStatus
+from backend.core.config import settings
 from backend.db.database import get_db
 from backend.db.crud import create_plugin, get_plugin, get_all_plugins, update_plugin, delete_plugin
+from plugins.plugin_manager import get_plugin_manager
+from plugins.plugin_manifest import PluginManifest, get_manifest_index
 import uuid
 
+# Activated plugin instances, shared by every PluginService so a plugin is
+# initialized once rather than on each request
+_loaded_plugins: Dict[str, Any] = {}
+
 class PluginService:
     def __init__(self):
         self.db = get_db()
-        self.loaded_plugins = {}
+        self.loaded_plugins = _loaded_plugins
+        self.plugins_dir = Path("plugins/custom_plugins")
+        self.manifest_index = get_manifest_index(settings.PLUGIN_MANIFEST_INDEX)
     
     async def get_all_plugins(self) -> List[Plugin]:
         """Get all plugins"""
@@ -29,21 +37,36 @@ class PluginService:
         # 4. Initializing plugin
         
         try:
-            # For now, we'll create a mock plugin
-            plugin_data = PluginCreate(
-                name=f"Plugin {plugin_id}",
-                description="A sample plugin",
-                version="1.0.0",
-                author="System",
-                capabilities=["sample_capability"],
-                config_schema={"setting": {"type": "string", "default": "value"}}
-            )
+            manifest = self._get_manifest(plugin_id)
+            if manifest:
+                plugin_data = PluginCreate(
+                    name=manifest.name,
+                    description=manifest.description or f"Plugin from {Path(manifest.path).name}",
+                    version=manifest.version,
+                    author="System",
+                    capabilities=list(manifest.capabilities),
+                    config_schema=manifest.config_schema
+                )
+            else:
+                # For now, we'll create a mock plugin
+                plugin_data = PluginCreate(
+                    name=f"Plugin {plugin_id}",
+                    description="A sample plugin",
+                    version="1.0.0",
+                    author="System",
+                    capabilities=["sample_capability"],
+                    config_schema={"setting": {"type": "string", "default": "value"}}
+                )
             
             plugin = Plugin(
                 id=plugin_id,
                 **plugin_data.dict(),
                 status=PluginStatus.INSTALLED,
-                config={"setting": "value"}
+                config={
+                    key: schema["default"]
+                    for key, schema in plugin_data.config_schema.items()
+                    if "default" in schema
+                }
             )
             
             await create_plugin(self.db, plugin)
@@ -57,7 +80,7 @@ class PluginService:
         try:
             # Remove from loaded plugins if active
             if plugin_id in self.loaded_plugins:
-                del self.loaded_plugins[plugin_id]
+                await self.loaded_plugins.pop(plugin_id).cleanup()
             
             # Remove from database
             return await delete_plugin(self.db, plugin_id)
@@ -72,20 +95,21 @@ class PluginService:
             if not plugin:
                 return False
             
+            # The manifest index names the plugin class without scanning the module
+            manifest = self._get_manifest(plugin_id)
+            if not manifest:
+                print(f"Plugin class not found for {plugin_id}")
+                return False
+            
             # Load plugin module
-            plugin_path = f"plugins.custom_plugins.{plugin_id}"
+            plugin_path = manifest.module
             try:
                 plugin_module = importlib.import_module(plugin_path)
-                
-                # Find plugin class (assuming class name is Plugin)
-                plugin_class = None
-                for name, obj in inspect.getmembers(plugin_module):
-                    if inspect.isclass(obj) and name == "Plugin":
-                        plugin_class = obj
-                        break
+                plugin_class = getattr(plugin_module, manifest.class_name, None)
                 
                 if plugin_class:
                     plugin_instance = plugin_class(plugin.config)
+                    await plugin_instance.initialize()
                     self.loaded_plugins[plugin_id] = plugin_instance
                     
                     # Update plugin status
@@ -108,7 +132,7 @@ class PluginService:
         try:
             # Remove from loaded plugins
             if plugin_id in self.loaded_plugins:
-                del self.loaded_plugins[plugin_id]
+                await self.loaded_plugins.pop(plugin_id).cleanup()
             
             # Update plugin status
             await update_plugin(self.db, plugin_id, {"status": PluginStatus.DEACTIVATED})
@@ -120,11 +144,11 @@ class PluginService:
     async def execute_plugin(self, plugin_id: str, parameters: Dict[str, Any]) -> Any:
         """Execute a plugin with parameters"""
         if plugin_id not in self.loaded_plugins:
-            # Try to activate plugin first
-            if not await self.activate_plugin(plugin_id):
-                raise ValueError(f"Plugin {plugin_id} is not active and could not be activated")
-        
-        plugin_instance = self.loaded_plugins[plugin_id]
+            # Core plugins run through the plugin manager, in their execution mode
+            manager = await self._get_core_plugin_manager(plugin_id)
+            if manager:
+                return await manager.execute_plugin(plugin_id, parameters)
+        plugin_instance = await self._get_active_plugin(plugin_id)
         
         try:
             # Execute plugin
@@ -134,20 +158,57 @@ class PluginService:
             print(f"Error executing plugin: {str(e)}")
             raise
     
+    async def stream_plugin(self, plugin_id: str, parameters: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Execute a plugin with parameters, returning an iterator over its progress events"""
+        plugin_instance = await self._get_active_plugin(plugin_id)
+        return plugin_instance.stream(parameters)
+    
+    async def _get_active_plugin(self, plugin_id: str) -> Any:
+        """Get a loaded plugin instance, activating the plugin if needed"""
+        if plugin_id in self.loaded_plugins:
+            return self.loaded_plugins[plugin_id]
+        
+        manager = await self._get_core_plugin_manager(plugin_id)
+        if manager:
+            return await manager.get_or_load_plugin(plugin_id)
+        
+        # Try to activate plugin first
+        if not await self.activate_plugin(plugin_id):
+            raise ValueError(f"Plugin {plugin_id} is not active and could not be activated")
+        return self.loaded_plugins[plugin_id]
+    
+    async def _get_core_plugin_manager(self, plugin_id: str) -> Optional[Any]:
+        """Get the plugin manager if it provides plugin_id as a core plugin, which has no database record"""
+        manager = await get_plugin_manager()
+        manifest = manager.manifests.get(plugin_id)
+        return manager if manifest and manifest.is_core else None
+    
     async def discover_plugins(self) -> List[Dict[str, Any]]:
         """Discover available plugins in the plugins directory"""
-        plugins_dir = Path("plugins/custom_plugins")
         discovered_plugins = []
         
-        if plugins_dir.exists():
-            for plugin_file in plugins_dir.glob("*.py"):
-                if plugin_file.name != "__init__.py":
-                    plugin_id = plugin_file.stem
-                    discovered_plugins.append({
-                        "id": plugin_id,
-                        "name": plugin_id.replace("_", " ").title(),
-                        "description": f"Plugin from {plugin_file.name}",
-                        "file_path": str(plugin_file)
-                    })
+        for plugin_id, manifest in self._scan_manifests().items():
+            discovered_plugins.append({
+                "id": plugin_id,
+                "name": manifest.name,
+                "description": manifest.description or f"Plugin from {Path(manifest.path).name}",
+                "version": manifest.version,
+                "capabilities": list(manifest.capabilities),
+                "config_schema": manifest.config_schema,
+                "file_path": manifest.path
+            })
         
-        return discovered_plugins
\ No newline at end of file
+        return discovered_plugins
+    
+    def _scan_manifests(self) -> Dict[str, PluginManifest]:
+        """Get the manifests of the custom plugins, re-parsing only files changed since the last scan"""
+        manifests = self.manifest_index.scan_directory(self.plugins_dir, "plugins.custom_plugins", is_core=False)
+        try:
+            self.manifest_index.save()
+        except OSError as e:
+            print(f"Error saving plugin manifest index: {str(e)}")
+        return manifests
+    
+    def _get_manifest(self, plugin_id: str) -> Optional[PluginManifest]:
+        """Get the manifest of a custom plugin"""
+        return self._scan_manifests().get(plugin_id)
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""
+Workflow batch runner for AgentK - Runs one compiled workflow over a stream of inputs
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Union
+from backend.services.workflow_engine import WorkflowEngine
+from backend.services.workflow_plan import WorkflowPlan
+
+logger = logging.getLogger(__name__)
+
+
+
+class RecordTooLarge(ValueError):
+    """Stands in for a JSONL line over the size limit; the batch item fails with it"""
+
+
+BatchItem = Union[bytes, str, Dict[str, Any], RecordTooLarge]
+
+
+async def iter_jsonl(
+    chunks: AsyncIterable[bytes], max_record_bytes: Optional[int] = None
+) -> AsyncIterator[Union[bytes, RecordTooLarge]]:
+    """
+    Split a stream of byte chunks into non-empty JSONL lines
+
+    The pieces of a line are joined once its end arrives, so a line spread
+    over many chunks is copied once. A line longer than max_record_bytes is
+    discarded as it arrives and yielded as a RecordTooLarge error instead,
+    which fails only its own item.
+    """
+    pieces: List[bytes] = []
+    size = 0
+    oversized = False
+    async for chunk in chunks:
+        for position, piece in enumerate(chunk.split(b"\n")):
+            if position:
+                # The previous piece ended a line
+                record = _join_record(pieces, oversized, max_record_bytes)
+                if record is not None:
+                    yield record
+                pieces, size, oversized = [], 0, False
+            if oversized or not piece:
+                continue
+            size += len(piece)
+            if max_record_bytes is not None and size > max_record_bytes:
+                pieces, oversized = [], True
+            else:
+                pieces.append(piece)
+    record = _join_record(pieces, oversized, max_record_bytes)
+    if record is not None:
+        yield record
+
+
+def _join_record(
+    pieces: List[bytes], oversized: bool, max_record_bytes: Optional[int]
+) -> Optional[Union[bytes, RecordTooLarge]]:
+    """Get a complete line from its pieces, or None if it is blank"""
+    if oversized:
+        return RecordTooLarge(f"Record larger than {max_record_bytes} bytes")
+    line = b"".join(pieces)
+    return line if line.strip() else None
+
+
+async def run_batch(
+    engine: WorkflowEngine,
+    plan: WorkflowPlan,
+    items: AsyncIterable[BatchItem],
+    concurrency: int = 16,
+    use_cache: bool = True
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run a compiled workflow once per input item
+
+    Up to ``concurrency`` items are in flight at once, so while one item is
+    in a late step the next ones are already in earlier steps. Items are
+    only read from the input as slots free up, which keeps memory flat for
+    large datasets. Results are yielded as items finish, followed by a
+    summary with the aggregate throughput.
+
+    Args:
+        engine: Engine the items run on
+        plan: Compiled plan shared by every item
+        items: Input data per item, as dicts or JSON-encoded lines
+        concurrency: Maximum number of items in flight
+        use_cache: Whether to memoize step results across items
+
+    Returns:
+        Async iterator of per-item results and a final summary
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    started = time.perf_counter()
+    iterator = items.__aiter__()
+    in_flight: Dict[asyncio.Task, int] = {}
+    exhausted = False
+    count = 0
+    completed = 0
+    failed = 0
+
+    try:
+        while True:
+            while not exhausted and len(in_flight) < concurrency:
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                task = asyncio.create_task(_run_item(engine, plan, count, item, use_cache))
+                in_flight[task] = count
+                count += 1
+
+            if not in_flight:
+                break
+
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                in_flight.pop(task)
+                result = task.result()
+                if result["status"] == "completed":
+                    completed += 1
+                else:
+                    failed += 1
+                yield result
+    finally:
+        for task in in_flight:
+            task.cancel()
+        # Let cancelled items finish cleaning up before the caller carries on
+        await asyncio.gather(*in_flight, return_exceptions=True)
+
+    duration = time.perf_counter() - started
+    yield {
+        "type": "summary",
+        "workflow_id": plan.workflow_id,
+        "items": count,
+        "completed": completed,
+        "failed": failed,
+        "duration": round(duration, 4),
+        "throughput": round(count / duration, 2) if duration > 0 else 0.0
+    }
+
+
+async def _run_item(
+    engine: WorkflowEngine,
+    plan: WorkflowPlan,
+    index: int,
+    item: BatchItem,
+    use_cache: bool
+) -> Dict[str, Any]:
+    """Run the workflow for a single batch item, reporting errors in the result"""
+    started = time.perf_counter()
+    try:
+        if isinstance(item, RecordTooLarge):
+            raise item
+        input_data = json.loads(item) if isinstance(item, (bytes, str)) else item
+        if not isinstance(input_data, dict):
+            raise ValueError("Batch item must be a JSON object")
+
+        run = await engine.run(plan, input_data, use_cache=use_cache)
+        errors = [step["error"] for step in run["steps"] if step["status"] == "failed"]
+        return {
+            "type": "result",
+            "index": index,
+            "status": run["status"],
+            "output": run["output"],
+            "error": errors[0] if errors else None,
+            "cached_steps": sum(1 for step in run["steps"] if step.get("cached")),
+            "duration": round(run["duration"], 4)
+        }
+    except Exception as e:
+        logger.error(f"Batch item {index} of workflow {plan.workflow_id} failed: {e}")
+        return {
+            "type": "result",
+            "index": index,
+            "status": "failed",
+            "output": {},
+            "error": str(e),
+            "cached_steps": 0,
+            "duration": round(time.perf_counter() - started, 4)
+        }
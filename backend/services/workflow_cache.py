@@ -0,0 +1,104 @@
+"""
+Step result cache for AgentK workflows - Memoizes step outputs by content hash
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Any, Dict, Mapping, Optional
+from backend.services.workflow_plan import StepHandle
+
+
+def step_cache_key(step: Mapping[str, Any], handle: StepHandle, inputs: Dict[str, Any]) -> Optional[str]:
+    """
+    Compute the content address of a step execution
+
+    The key covers everything that determines the step's result: its
+    definition, the agent/model/plugin it resolved to and its input values.
+
+    Returns:
+        The key, or None if the step or its inputs aren't plain JSON. Such
+        a step isn't cached, since distinct values could share a string form.
+    """
+    try:
+        payload = json.dumps(
+            {"step": dict(step), "handle": asdict(handle), "inputs": inputs},
+            sort_keys=True
+        )
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class StepResultCache:
+    """
+    Content-addressed LRU cache of step outputs with TTL expiry
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum number of cached step results
+            ttl: Seconds a cached result stays valid
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get cached outputs, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, outputs = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return outputs
+
+    def put(self, key: str, outputs: Dict[str, Any]) -> None:
+        """Cache the outputs of a step execution"""
+        self._entries[key] = (time.monotonic() + self.ttl, outputs)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached results"""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global step result cache instance
+_step_cache = None
+
+def get_step_cache(max_size: int = 1024, ttl: float = 3600) -> StepResultCache:
+    """Get the global step result cache"""
+    global _step_cache
+    if _step_cache is None:
+        _step_cache = StepResultCache(max_size=max_size, ttl=ttl)
+    return _step_cache
@@ -0,0 +1,222 @@
+"""
+Workflow checkpoint store for AgentK - Persists run state and completed step outputs in SQLite
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+
+def step_fingerprint(step: Mapping[str, Any]) -> str:
+    """Hash a step definition so checkpoints are only reused for unchanged steps"""
+    payload = json.dumps(dict(step), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CheckpointStore:
+    """
+    Durable store of workflow runs and their completed steps
+
+    Step checkpoints are buffered per run and written in batches: the engine
+    records every step that completes in a scheduling round and flushes them
+    in a single transaction before any dependent step is launched. Runs flush
+    only their own buffer, so a run never returns from flush() while its
+    checkpoints are still being written by another run's flush.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[Tuple[str, str, str, str, float]]] = {}
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._create_tables()
+
+    def _create_tables(self) -> None:
+        """Create the checkpoint tables if they don't exist"""
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS workflow_runs (
+                    run_id TEXT PRIMARY KEY,
+                    workflow_id TEXT,
+                    version TEXT,
+                    user_id TEXT,
+                    scheduled INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL,
+                    input TEXT NOT NULL,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS workflow_step_checkpoints (
+                    run_id TEXT NOT NULL,
+                    step_id TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    outputs TEXT NOT NULL,
+                    completed_at REAL NOT NULL,
+                    PRIMARY KEY (run_id, step_id)
+                )
+            """)
+            columns = {row["name"] for row in self._connection.execute("PRAGMA table_info(workflow_runs)")}
+            if "user_id" not in columns:
+                self._connection.execute("ALTER TABLE workflow_runs ADD COLUMN user_id TEXT")
+            if "scheduled" not in columns:
+                self._connection.execute("ALTER TABLE workflow_runs ADD COLUMN scheduled INTEGER NOT NULL DEFAULT 0")
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_workflow_runs_status ON workflow_runs (status, created_at)"
+            )
+
+    async def create_run(
+        self,
+        run_id: str,
+        workflow_id: Optional[str],
+        input_data: Dict[str, Any],
+        version: Optional[str] = None,
+        user_id: Optional[str] = None,
+        scheduled: bool = False
+    ) -> None:
+        """Record a new run in the 'pending' state; scheduled runs are recovered by the scheduler"""
+        now = time.time()
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO workflow_runs "
+            "(run_id, workflow_id, version, user_id, scheduled, status, input, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, 'pending', ?, ?, ?)",
+            (run_id, workflow_id, version, user_id, int(scheduled), json.dumps(input_data, default=str), now, now)
+        )
+
+    async def set_run_status(self, run_id: str, status: str, error: Optional[str] = None) -> None:
+        """Update the status of a run"""
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE workflow_runs SET status = ?, error = ?, updated_at = ? WHERE run_id = ?",
+            (status, error, time.time(), run_id)
+        )
+
+    async def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Get a run and the IDs of its checkpointed steps"""
+        return await asyncio.to_thread(self._get_run, run_id)
+
+    async def list_runs(self, statuses: List[str], scheduled_only: bool = False) -> List[Dict[str, Any]]:
+        """List runs in the given states, oldest first, optionally only those submitted to the scheduler"""
+        placeholders = ", ".join("?" for _ in statuses)
+        scheduled = " AND scheduled = 1" if scheduled_only else ""
+        rows = await asyncio.to_thread(
+            self._fetch_all,
+            f"SELECT run_id, workflow_id, user_id, status, created_at FROM workflow_runs "
+            f"WHERE status IN ({placeholders}){scheduled} ORDER BY created_at",
+            tuple(statuses)
+        )
+        return [dict(row) for row in rows]
+
+    async def load_checkpoints(self, run_id: str) -> Dict[str, Dict[str, Any]]:
+        """Get the fingerprint and outputs of each checkpointed step of a run"""
+        rows = await asyncio.to_thread(
+            self._fetch_all,
+            "SELECT step_id, fingerprint, outputs FROM workflow_step_checkpoints WHERE run_id = ?",
+            (run_id,)
+        )
+        return {
+            row["step_id"]: {"fingerprint": row["fingerprint"], "outputs": json.loads(row["outputs"])}
+            for row in rows
+        }
+
+    def record_step(self, run_id: str, step: Mapping[str, Any], outputs: Dict[str, Any]) -> None:
+        """
+        Buffer a completed step's outputs until the run's next flush
+
+        Outputs that aren't plain JSON are not checkpointed, since a resumed
+        run would get their string form rather than the values themselves;
+        the step and its dependents run again instead.
+        """
+        try:
+            payload = json.dumps(outputs)
+        except (TypeError, ValueError):
+            return
+        self._pending.setdefault(run_id, []).append((
+            run_id,
+            step["id"],
+            step_fingerprint(step),
+            payload,
+            time.time()
+        ))
+
+    async def flush(self, run_id: Optional[str] = None) -> None:
+        """
+        Write buffered checkpoints in a single transaction
+
+        Args:
+            run_id: Run whose checkpoints are written; all runs if not given
+        """
+        run_ids = [run_id] if run_id is not None else list(self._pending)
+        batches = {key: self._pending.pop(key) for key in run_ids if key in self._pending}
+        if not batches:
+            return
+        try:
+            await asyncio.to_thread(
+                self._write_checkpoints, [row for rows in batches.values() for row in rows]
+            )
+        except BaseException:
+            # Keep the rows so the next flush retries them, ahead of newer ones
+            for key, rows in batches.items():
+                self._pending[key] = rows + self._pending.get(key, [])
+            raise
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._connection.close()
+
+    def _write_checkpoints(self, rows: List[Tuple[str, str, str, str, float]]) -> None:
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO workflow_step_checkpoints "
+                "(run_id, step_id, fingerprint, outputs, completed_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def _execute(self, query: str, params: tuple = ()) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(query, params)
+
+    def _fetch_all(self, query: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._connection.execute(query, params).fetchall()
+
+    def _get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT * FROM workflow_runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            steps = self._connection.execute(
+                "SELECT step_id FROM workflow_step_checkpoints WHERE run_id = ? ORDER BY completed_at",
+                (run_id,)
+            ).fetchall()
+
+        run = dict(row)
+        run["input"] = json.loads(run["input"])
+        run["completed_steps"] = [step["step_id"] for step in steps]
+        return run
+
+
+# Global checkpoint store instance
+_checkpoint_store = None
+
+def get_checkpoint_store(db_path: str) -> CheckpointStore:
+    """Get the global checkpoint store"""
+    global _checkpoint_store
+    if _checkpoint_store is None:
+        _checkpoint_store = CheckpointStore(db_path)
+    return _checkpoint_store
@@ -0,0 +1,485 @@
+"""
+Workflow execution engine for AgentK - Runs workflow steps as a dependency graph
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Mapping, Optional, Set, Tuple, Union
+from backend.services.workflow_cache import StepResultCache, step_cache_key
+from backend.services.workflow_checkpoint import CheckpointStore, step_fingerprint
+from backend.services.workflow_events import WorkflowEventBus, bind_step
+from backend.services.workflow_history import RunHistory
+from backend.services.workflow_map import ArtifactStream, reduce_items, split_items
+from backend.services.workflow_plan import StepHandle, WorkflowPlan, compile_workflow
+
+logger = logging.getLogger(__name__)
+
+# A step runner receives the step definition, its resolved inputs and the
+# handle resolved at compile time, and returns a dictionary keyed by the
+# step's declared output names
+StepRunner = Callable[
+    [Mapping[str, Any], Dict[str, Any], StepHandle], Awaitable[Dict[str, Any]]
+]
+
+
+class ArtifactStore:
+    """
+    In-memory store for the artifacts passed between workflow steps
+    """
+
+    def __init__(self, initial: Optional[Dict[str, Any]] = None):
+        self._artifacts: Dict[str, Any] = dict(initial or {})
+        self._streams: Dict[str, ArtifactStream] = {}
+
+    def put(self, name: str, value: Any) -> None:
+        """Store an artifact under the given name"""
+        self._artifacts[name] = value
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Get an artifact by name"""
+        return self._artifacts.get(name, default)
+
+    def resolve(self, names: List[str]) -> Dict[str, Any]:
+        """Get the artifacts for a list of input names"""
+        return {name: self._artifacts[name] for name in names}
+
+    def stream(self, name: str) -> ArtifactStream:
+        """Get the item stream of an artifact produced by a map step"""
+        if name not in self._streams:
+            self._streams[name] = ArtifactStream()
+        return self._streams[name]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a copy of all stored artifacts"""
+        return dict(self._artifacts)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._artifacts
+
+
+class WorkflowEngine:
+    """
+    Executes workflow steps concurrently, in dependency order
+    """
+
+    def __init__(
+        self,
+        step_runner: StepRunner,
+        max_parallelism: int = 4,
+        cache: Optional[StepResultCache] = None,
+        checkpoints: Optional[CheckpointStore] = None,
+        events: Optional[WorkflowEventBus] = None,
+        history: Optional[RunHistory] = None
+    ):
+        """
+        Initialize the engine
+
+        Args:
+            step_runner: Coroutine function that executes a single step
+            max_parallelism: Maximum number of steps running at the same time
+            cache: Optional cache used to memoize step results
+            checkpoints: Optional durable store for run state and step outputs
+            events: Optional bus that run and step progress is published to
+            history: Optional store that every finished run is recorded in
+        """
+        if max_parallelism < 1:
+            raise ValueError("max_parallelism must be at least 1")
+        self.step_runner = step_runner
+        self.max_parallelism = max_parallelism
+        self.cache = cache
+        self.checkpoints = checkpoints
+        self.events = events
+        self.history = history
+
+    async def run(
+        self,
+        plan: Union[WorkflowPlan, List[Dict[str, Any]]],
+        input_data: Dict[str, Any],
+        use_cache: bool = True,
+        run_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute a compiled workflow plan
+
+        Independent steps run concurrently up to ``max_parallelism``. When a
+        step fails, every step downstream of it is cancelled while unrelated
+        branches keep running.
+
+        When the engine has a cache, a step whose definition, handle and input
+        values match an earlier run reuses that run's outputs instead of
+        executing again. Steps can opt out with ``"memoize": false``.
+
+        When the engine has a checkpoint store and a ``run_id`` is given, each
+        completed step is persisted before its dependents start, and steps
+        already checkpointed for that run are restored rather than re-run.
+
+        When the engine has an event bus and a ``run_id`` is given, run and
+        step lifecycle events are published to the run's subscribers.
+
+        Steps with a ``map`` definition run once per item of a list input.
+        A map step over the list output of another map step starts as soon
+        as that step does and consumes its items as they complete.
+
+        Args:
+            plan: Compiled plan, or raw step definitions to compile first
+            input_data: Values for the workflow's external inputs
+            use_cache: Whether to memoize step results for this run
+            run_id: ID of a run created in the checkpoint store
+
+        Returns:
+            Dict with the overall status, final outputs and per-step results
+        """
+        if not isinstance(plan, WorkflowPlan):
+            plan = compile_workflow(plan)
+        if plan.errors:
+            raise ValueError(f"Invalid workflow: {'; '.join(plan.errors)}")
+        missing = plan.missing_inputs(input_data)
+        if missing:
+            raise ValueError(f"Missing workflow inputs: {', '.join(missing)}")
+
+        remaining = {step_id: len(deps) for step_id, deps in plan.dependencies.items()}
+        store = ArtifactStore(input_data)
+        results: Dict[str, Dict[str, Any]] = {}
+        running: Dict[asyncio.Task, str] = {}
+        launched: Set[str] = set()
+        started = time.perf_counter()
+        checkpointing = self.checkpoints is not None and run_id is not None
+
+        if checkpointing:
+            await self._restore_checkpoints(plan, run_id, store, results, remaining)
+            await self.checkpoints.set_run_status(run_id, "running")
+
+        self._publish(run_id, "run_started", workflow_id=plan.workflow_id, steps=list(plan.order))
+        for step_id in results:
+            self._publish(run_id, "step_completed", step_id=step_id, restored=True, duration=0.0)
+
+        ready = [
+            step_id for step_id in plan.order
+            if remaining[step_id] == 0 and step_id not in results
+        ]
+
+        def schedule(step_id: str) -> None:
+            if step_id in launched or step_id in results or step_id in ready:
+                return
+            source = plan.streams.get(step_id)
+            streamable = (
+                source is not None and remaining[step_id] == 1
+                and source in launched and source not in results
+            )
+            if remaining[step_id] == 0 or streamable:
+                ready.append(step_id)
+
+        try:
+            while ready or running:
+                # Launch ready steps in definition order, up to the parallelism cap
+                ready.sort(key=plan.index.__getitem__)
+                while ready and len(running) < self.max_parallelism:
+                    step_id = ready.pop(0)
+                    task = asyncio.create_task(self._run_step(plan, step_id, store, use_cache, run_id))
+                    running[task] = step_id
+                    launched.add(step_id)
+                    # Map steps consuming this step's items can start alongside it
+                    for dependent in plan.dependents[step_id]:
+                        schedule(dependent)
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    step_id = running.pop(task)
+                    if step_id in results:
+                        # A streaming step already cancelled by its failed producer
+                        continue
+                    result = task.result()
+                    results[step_id] = result
+
+                    if result["status"] == "completed":
+                        if checkpointing:
+                            step = plan.steps[step_id]
+                            self.checkpoints.record_step(
+                                run_id, step, {name: store.get(name) for name in step.get("outputs", [])}
+                            )
+                        for dependent in plan.dependents[step_id]:
+                            remaining[dependent] -= 1
+                            schedule(dependent)
+                    else:
+                        self._cancel_downstream(plan, step_id, results, run_id)
+
+                # Persist this round's completions before their dependents start
+                if checkpointing:
+                    await self.checkpoints.flush(run_id)
+        finally:
+            for task in running:
+                task.cancel()
+
+        failed = any(result["status"] != "completed" for result in results.values())
+        if checkpointing:
+            errors = [result["error"] for result in results.values() if result.get("error")]
+            await self.checkpoints.set_run_status(
+                run_id, "failed" if failed else "completed", errors[0] if errors else None
+            )
+
+        duration = time.perf_counter() - started
+        self._publish(run_id, "run_failed" if failed else "run_completed", duration=duration)
+
+        result = {
+            "run_id": run_id,
+            "workflow_id": plan.workflow_id,
+            "status": "failed" if failed else "completed",
+            "input": input_data,
+            "output": {
+                name: store.get(name)
+                for step_id in plan.sinks
+                for name in plan.steps[step_id].get("outputs", [])
+                if name in store
+            },
+            "steps": [results[step_id] for step_id in plan.order],
+            "duration": duration
+        }
+        if self.history is not None:
+            try:
+                await self.history.record_run(result)
+            except Exception as e:
+                # History is diagnostic; never fail a run because it couldn't be recorded
+                logger.error(f"Failed to record history for workflow run {run_id}: {e}")
+        return result
+
+    async def _run_step(
+        self,
+        plan: WorkflowPlan,
+        step_id: str,
+        store: ArtifactStore,
+        use_cache: bool = True,
+        run_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Run a single step and publish its outputs to the artifact store"""
+        step = plan.steps[step_id]
+        handle = plan.handles[step_id]
+        result = {
+            "step_id": step_id,
+            "agent": step.get("agent"),
+            "model": handle.model,
+            "action": step.get("action"),
+            "cached": False
+        }
+        started = time.perf_counter()
+        self._publish(run_id, "step_started", step_id=step_id, agent=step.get("agent"), action=step.get("action"))
+        progress = bind_step(step_id, run_id, self.events)
+
+        spec = step.get("map")
+        declared = step.get("outputs", [])
+        streams_items = bool(spec) and spec.get("reduce", "list") == "list"
+
+        try:
+            # A map step started alongside its producer reads that input as a stream
+            streaming = bool(spec) and spec["over"] not in store
+            inputs = store.resolve([
+                name for name in step.get("inputs", [])
+                if not (streaming and name == spec["over"])
+            ])
+
+            cache_key = None
+            outputs = None
+            if use_cache and self.cache is not None and step.get("memoize", True) and not streaming:
+                cache_key = step_cache_key(step, handle, inputs)
+                outputs = self.cache.get(cache_key) if cache_key else None
+
+            if outputs is not None:
+                result["cached"] = True
+            else:
+                if spec:
+                    outputs = await self._run_map(step_id, step, handle, inputs, store, use_cache, run_id)
+                else:
+                    outputs = await self.step_runner(step, inputs, handle)
+                    self._check_outputs(declared, outputs)
+                if cache_key is not None:
+                    self.cache.put(cache_key, {name: outputs[name] for name in declared})
+
+            for name in declared:
+                store.put(name, outputs[name])
+                if streams_items:
+                    store.stream(name).complete(outputs[name])
+
+            result.update({"status": "completed", "outputs": declared})
+        except Exception as e:
+            logger.error(f"Workflow step {step_id} failed: {e}")
+            result.update({"status": "failed", "error": str(e)})
+            if streams_items:
+                for name in declared:
+                    store.stream(name).close(error=f"Upstream step '{step_id}' failed: {e}")
+
+        result["duration"] = time.perf_counter() - started
+        result["tokens"] = progress.tokens
+        if result["status"] == "completed":
+            self._publish(
+                run_id, "step_completed", step_id=step_id, cached=result["cached"], duration=result["duration"]
+            )
+        else:
+            self._publish(run_id, "step_failed", step_id=step_id, error=result["error"], duration=result["duration"])
+        return result
+
+    async def _run_map(
+        self,
+        step_id: str,
+        step: Mapping[str, Any],
+        handle: StepHandle,
+        inputs: Dict[str, Any],
+        store: ArtifactStore,
+        use_cache: bool,
+        run_id: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Run a map step once per item of its mapped input and reduce the results
+
+        Items run concurrently up to the step's ``max_parallelism``, and only
+        the first ``max_items`` items are run when the step sets it. Each
+        item is memoized on its own, so re-running a map over a list that
+        gained a few items only executes the new ones.
+
+        Returns:
+            Dict of reduced outputs keyed by the step's declared output names
+        """
+        spec = step["map"]
+        over = spec["over"]
+        item_name = spec.get("as", over)
+        reducer = spec.get("reduce", "list")
+        declared = step.get("outputs", [])
+        item_step = {key: value for key, value in step.items() if key != "map"}
+        memoize = use_cache and self.cache is not None and step.get("memoize", True)
+
+        slots = asyncio.Semaphore(spec.get("max_parallelism", self.max_parallelism))
+        item_outputs: Dict[int, Dict[str, Any]] = {}
+        errors: List[Exception] = []
+        tasks: Set[asyncio.Task] = set()
+
+        async def run_item(index: int, item: Any) -> None:
+            try:
+                item_inputs = {name: value for name, value in inputs.items() if name != over}
+                item_inputs[item_name] = item
+                cache_key = step_cache_key(item_step, handle, item_inputs) if memoize else None
+                outputs = self.cache.get(cache_key) if cache_key else None
+                if outputs is None:
+                    outputs = await self.step_runner(item_step, item_inputs, handle)
+                    self._check_outputs(declared, outputs)
+                    if cache_key:
+                        self.cache.put(cache_key, {name: outputs[name] for name in declared})
+
+                item_outputs[index] = outputs
+                if reducer == "list":
+                    for name in declared:
+                        store.stream(name).push(index, outputs[name])
+                self._publish(run_id, "step_partial", step_id=step_id, item=index, completed=len(item_outputs))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                slots.release()
+
+        try:
+            async for index, item in self._map_items(store, over, spec.get("max_items")):
+                await slots.acquire()
+                # Stop feeding items as soon as one of them fails
+                if errors:
+                    slots.release()
+                    break
+                task = asyncio.create_task(run_item(index, item))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        finally:
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        if errors:
+            raise errors[0]
+        ordered = [item_outputs[index] for index in sorted(item_outputs)]
+        return {name: reduce_items(reducer, [outputs[name] for outputs in ordered]) for name in declared}
+
+    async def _map_items(
+        self, store: ArtifactStore, over: str, max_items: Optional[int] = None
+    ) -> AsyncIterator[Tuple[int, Any]]:
+        """Yield the first max_items items of a map step's input, streaming them when still being produced"""
+        if over in store:
+            for index, item in enumerate(split_items(store.get(over))[:max_items]):
+                yield index, item
+            return
+        count = 0
+        async for index, item in store.stream(over).items():
+            if max_items is not None and index >= max_items:
+                continue
+            yield index, item
+            count += 1
+            if count == max_items:
+                return
+
+    def _check_outputs(self, declared: List[str], outputs: Optional[Dict[str, Any]]) -> None:
+        """Raise if a step runner did not produce every declared output"""
+        missing = [name for name in declared if name not in (outputs or {})]
+        if missing:
+            raise ValueError(f"Step did not produce outputs: {', '.join(missing)}")
+
+    def _publish(self, run_id: Optional[str], event_type: str, **data: Any) -> None:
+        """Publish a run event when the engine has an event bus"""
+        if self.events is not None and run_id is not None:
+            self.events.publish(run_id, event_type, **data)
+
+    async def _restore_checkpoints(
+        self,
+        plan: WorkflowPlan,
+        run_id: str,
+        store: ArtifactStore,
+        results: Dict[str, Dict[str, Any]],
+        remaining: Dict[str, int]
+    ) -> None:
+        """Restore the outputs of steps already completed in an earlier attempt of the run"""
+        checkpoints = await self.checkpoints.load_checkpoints(run_id)
+
+        # Walk in topological order so a step is only restored when all of
+        # its upstream steps were restored too
+        for level in plan.levels:
+            for step_id in level:
+                checkpoint = checkpoints.get(step_id)
+                step = plan.steps[step_id]
+                if (checkpoint is None
+                        or checkpoint["fingerprint"] != step_fingerprint(step)
+                        or any(dep not in results for dep in plan.dependencies[step_id])):
+                    continue
+
+                for name in step.get("outputs", []):
+                    store.put(name, checkpoint["outputs"][name])
+                results[step_id] = {
+                    "step_id": step_id,
+                    "agent": step.get("agent"),
+                    "action": step.get("action"),
+                    "cached": False,
+                    "restored": True,
+                    "status": "completed",
+                    "outputs": step.get("outputs", []),
+                    "duration": 0.0
+                }
+                for dependent in plan.dependents[step_id]:
+                    remaining[dependent] -= 1
+
+    def _cancel_downstream(
+        self,
+        plan: WorkflowPlan,
+        step_id: str,
+        results: Dict[str, Dict[str, Any]],
+        run_id: Optional[str] = None
+    ) -> None:
+        """Mark every step downstream of a failed step as cancelled"""
+        stack = list(plan.dependents[step_id])
+        while stack:
+            dependent = stack.pop()
+            if dependent in results:
+                continue
+            results[dependent] = {
+                "step_id": dependent,
+                "agent": plan.steps[dependent].get("agent"),
+                "action": plan.steps[dependent].get("action"),
+                "status": "cancelled",
+                "error": f"Upstream step '{step_id}' failed",
+                "duration": 0.0
+            }
+            self._publish(run_id, "step_cancelled", step_id=dependent, error=results[dependent]["error"])
+            stack.extend(plan.dependents[dependent])
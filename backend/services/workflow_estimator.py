@@ -0,0 +1,180 @@
+"""
+Workflow estimator for AgentK - Predicts run duration and token cost from historical step distributions
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from backend.services.workflow_history import RunHistory
+from backend.services.workflow_plan import WorkflowPlan
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = ("p10", "p50", "p90")
+
+# Spread applied to the defaults for steps with no history, as multiples of the default
+DEFAULT_SPREAD = {"p10": 0.5, "p50": 1.0, "p90": 2.0}
+
+Distributions = Dict[Tuple[str, str, str], Dict[str, Any]]
+
+
+class WorkflowEstimator:
+    """
+    Estimates the wall-clock time and token usage of a workflow plan
+
+    Each step is annotated with the p10/p50/p90 latency and token usage of
+    earlier steps with the same agent, model and action, falling back to the
+    agent's overall history and then to configured defaults. Wall-clock time
+    is the longer of the DAG's critical path and the total work spread over
+    the engine's parallelism.
+    """
+
+    def __init__(
+        self,
+        history: Optional[RunHistory] = None,
+        max_parallelism: int = 4,
+        default_duration: float = 5.0,
+        default_tokens: int = 500,
+        cost_per_1k_tokens: float = 0.0,
+        days: float = 30,
+        min_samples: int = 5,
+        refresh_interval: float = 60.0
+    ):
+        """
+        Initialize the estimator
+
+        Args:
+            history: Run history the step distributions are read from
+            max_parallelism: Maximum number of steps the engine runs at once
+            default_duration: Seconds assumed for a step with no history
+            default_tokens: Tokens assumed for a step with no history
+            cost_per_1k_tokens: Price of 1000 tokens, for the cost estimate
+            days: How far back history is considered
+            min_samples: Executions needed before a step's history is trusted
+            refresh_interval: Seconds the distributions are reused before re-reading history
+        """
+        self.history = history
+        self.max_parallelism = max_parallelism
+        self.default_duration = default_duration
+        self.default_tokens = default_tokens
+        self.cost_per_1k_tokens = cost_per_1k_tokens
+        self.days = days
+        self.min_samples = min_samples
+        self.refresh_interval = refresh_interval
+        self._distributions: Distributions = {}
+        self._loaded_at: Optional[float] = None
+
+    async def estimate(self, plan: WorkflowPlan) -> Dict[str, Any]:
+        """Estimate a plan using the current run history"""
+        return self.estimate_with(plan, await self._get_distributions())
+
+    def estimate_with(self, plan: WorkflowPlan, distributions: Distributions) -> Dict[str, Any]:
+        """
+        Estimate a plan from the given step distributions
+
+        Returns:
+            Dict with per-step annotations, the critical path and p10/p50/p90
+            bands for duration, tokens and cost
+        """
+        steps = {step_id: self._annotate(plan, step_id, distributions) for step_id in plan.order}
+
+        duration = {}
+        critical_path: List[str] = []
+        for quantile in QUANTILES:
+            finish: Dict[str, float] = {}
+            via: Dict[str, Optional[str]] = {}
+            for level in plan.levels:
+                for step_id in level:
+                    deps = plan.dependencies[step_id]
+                    previous = max(deps, key=finish.__getitem__) if deps else None
+                    via[step_id] = previous
+                    start = finish[previous] if previous else 0.0
+                    finish[step_id] = start + steps[step_id]["duration"][quantile]
+
+            span = max(finish.values(), default=0.0)
+            total_work = sum(step["duration"][quantile] for step in steps.values())
+            duration[quantile] = round(max(span, total_work / self.max_parallelism), 3)
+
+            if quantile == "p50" and finish:
+                current: Optional[str] = max(finish, key=finish.__getitem__)
+                while current is not None:
+                    critical_path.append(current)
+                    current = via[current]
+                critical_path.reverse()
+
+        for step_id in critical_path:
+            steps[step_id]["critical"] = True
+        tokens = {
+            quantile: int(sum(step["tokens"][quantile] for step in steps.values()))
+            for quantile in QUANTILES
+        }
+        known = sum(1 for step in steps.values() if step["source"] != "default")
+
+        return {
+            "workflow_id": plan.workflow_id,
+            "steps": list(steps.values()),
+            "critical_path": critical_path,
+            "duration": duration,
+            "tokens": tokens,
+            "cost": {
+                quantile: round(tokens[quantile] / 1000 * self.cost_per_1k_tokens, 4)
+                for quantile in QUANTILES
+            },
+            "coverage": round(known / len(steps), 2) if steps else 0.0
+        }
+
+    def _annotate(self, plan: WorkflowPlan, step_id: str, distributions: Distributions) -> Dict[str, Any]:
+        """Attach the best available latency and token distribution to a step"""
+        step = plan.steps[step_id]
+        handle = plan.handles[step_id]
+        agent = handle.agent or ""
+        exact = distributions.get((agent, handle.model or "", step.get("action") or ""))
+        overall = distributions.get((agent, "*", "*"))
+
+        if exact and exact["count"] >= self.min_samples:
+            source, distribution = "history", exact
+        elif overall and overall["count"] >= self.min_samples:
+            source, distribution = "agent", overall
+        else:
+            source = "default"
+            distribution = {
+                "count": 0,
+                "duration": {q: self.default_duration * DEFAULT_SPREAD[q] for q in QUANTILES},
+                "tokens": {q: self.default_tokens * DEFAULT_SPREAD[q] for q in QUANTILES}
+            }
+
+        return {
+            "step_id": step_id,
+            "agent": handle.agent,
+            "model": handle.model,
+            "action": step.get("action"),
+            "source": source,
+            "samples": distribution["count"],
+            "duration": {q: round(distribution["duration"][q], 3) for q in QUANTILES},
+            "tokens": {q: int(distribution["tokens"][q]) for q in QUANTILES},
+            "critical": False
+        }
+
+    async def _get_distributions(self) -> Distributions:
+        """Get the step distributions, re-reading history at most once per refresh interval"""
+        if self.history is None:
+            return {}
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at > self.refresh_interval:
+            try:
+                self._distributions = await self.history.profile_distributions(self.days)
+                self._loaded_at = now
+            except Exception as e:
+                logger.error(f"Failed to load step distributions: {e}")
+        return self._distributions
+
+
+# Global estimator instance
+_estimator = None
+
+def get_workflow_estimator(history: Optional[RunHistory] = None, **options: Any) -> WorkflowEstimator:
+    """Get the global workflow estimator"""
+    global _estimator
+    if _estimator is None:
+        _estimator = WorkflowEstimator(history, **options)
+    return _estimator
@@ -0,0 +1,174 @@
+"""
+Workflow event bus for AgentK - Publishes live run progress to subscribers
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Terminal events; a subscription ends after delivering one of these
+RUN_FINISHED_EVENTS = {"run_completed", "run_failed"}
+
+
+class StepContext:
+    """
+    Progress of the workflow step executing in the current task
+    """
+
+    def __init__(self, step_id: str, run_id: Optional[str] = None, bus: Optional["WorkflowEventBus"] = None):
+        self.step_id = step_id
+        self.run_id = run_id
+        self.bus = bus
+        self.tokens = 0
+
+
+_current_step: contextvars.ContextVar[Optional[StepContext]] = (
+    contextvars.ContextVar("workflow_current_step", default=None)
+)
+
+
+class Subscription:
+    """
+    Bounded event buffer for a single subscriber
+
+    Publishing never blocks. Consecutive progress events for the same step
+    are merged, and when the buffer is full the oldest progress event is
+    evicted first, then the oldest event of any kind. Every event delivered
+    after an eviction carries the number of events dropped so far.
+    """
+
+    def __init__(self, run_id: str, max_buffer: int = 100):
+        self.run_id = run_id
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self.closed = False
+        self._events: Deque[Dict[str, Any]] = deque()
+        self._ready = asyncio.Event()
+
+    def put(self, event: Dict[str, Any]) -> None:
+        """Buffer an event without blocking the publisher"""
+        if self.closed:
+            return
+
+        if event["type"] == "step_progress" and self._events:
+            last = self._events[-1]
+            if last["type"] == "step_progress" and last["step_id"] == event["step_id"]:
+                last["tokens"] += event["tokens"]
+                last["text"] += event["text"]
+                last["timestamp"] = event["timestamp"]
+                return
+
+        if len(self._events) >= self.max_buffer:
+            self._evict()
+        self._events.append(dict(event))
+        self._ready.set()
+
+    async def get(self) -> Dict[str, Any]:
+        """Wait for the next event"""
+        while not self._events:
+            self._ready.clear()
+            await self._ready.wait()
+        event = self._events.popleft()
+        if self.dropped:
+            event["dropped"] = self.dropped
+        return event
+
+    def close(self) -> None:
+        """Stop receiving events"""
+        self.closed = True
+        self._events.clear()
+
+    def _evict(self) -> None:
+        for index, buffered in enumerate(self._events):
+            if buffered["type"] == "step_progress":
+                del self._events[index]
+                break
+        else:
+            self._events.popleft()
+        self.dropped += 1
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+class WorkflowEventBus:
+    """
+    Fans workflow run events out to the subscribers of each run
+    """
+
+    def __init__(self, max_buffer: int = 100):
+        self.max_buffer = max_buffer
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+    def subscribe(self, run_id: str, max_buffer: Optional[int] = None) -> Subscription:
+        """Subscribe to the events of a run"""
+        subscription = Subscription(run_id, max_buffer or self.max_buffer)
+        self._subscribers.setdefault(run_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscription"""
+        subscription.close()
+        subscribers = self._subscribers.get(subscription.run_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.run_id]
+
+    def publish(self, run_id: str, event_type: str, **data: Any) -> None:
+        """Publish an event to every subscriber of a run"""
+        subscribers = self._subscribers.get(run_id)
+        if not subscribers:
+            return
+        event = {"type": event_type, "run_id": run_id, "timestamp": time.time(), **data}
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def subscriber_count(self, run_id: str) -> int:
+        """Get the number of subscribers of a run"""
+        return len(self._subscribers.get(run_id, ()))
+
+
+def bind_step(step_id: str, run_id: Optional[str] = None, bus: Optional[WorkflowEventBus] = None) -> StepContext:
+    """
+    Bind the current task to a workflow step so report_progress can find it
+
+    Each step runs in its own task, so the binding is local to the step and
+    is inherited by any tasks the step starts.
+    """
+    context = StepContext(step_id, run_id, bus)
+    _current_step.set(context)
+    return context
+
+
+def report_progress(tokens: int = 0, text: str = "") -> None:
+    """
+    Report token progress for the workflow step running in the current task
+
+    Step runners and LLM connectors can call this as output is produced; it
+    is a no-op outside of a workflow run.
+    """
+    context = _current_step.get()
+    if context is None:
+        return
+    context.tokens += tokens
+    if context.bus is not None and context.run_id is not None:
+        context.bus.publish(
+            context.run_id, "step_progress", step_id=context.step_id, tokens=tokens, text=text
+        )
+
+
+# Global event bus instance
+_event_bus = None
+
+def get_event_bus(max_buffer: int = 100) -> WorkflowEventBus:
+    """Get the global workflow event bus"""
+    global _event_bus
+    if _event_bus is None:
+        _event_bus = WorkflowEventBus(max_buffer=max_buffer)
+    return _event_bus
@@ -0,0 +1,463 @@
+"""
+Workflow run history for AgentK - Records run and step metrics and answers latency queries from rollups
+"""
+
+import asyncio
+import logging
+import math
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rollup rows describing a whole run use this in place of a step ID
+RUN_ROLLUP = ""
+
+# Durations and token counts are bucketed on a geometric scale, so any
+# percentile read from a histogram is within BUCKET_GROWTH of the true value
+BUCKET_MIN = 0.001
+TOKEN_BUCKET_MIN = 1
+BUCKET_GROWTH = 1.1
+
+PARTITION_PATTERN = re.compile(r"^workflow_(run|step)_history_(\d{8})$")
+
+
+def duration_bucket(duration: float, minimum: float = BUCKET_MIN) -> int:
+    """Get the histogram bucket of a duration in seconds, or of any positive value"""
+    if duration <= minimum:
+        return 0
+    return 1 + int(math.log(duration / minimum) / math.log(BUCKET_GROWTH))
+
+
+def bucket_upper_bound(bucket: int, minimum: float = BUCKET_MIN) -> float:
+    """Get the largest value that falls into a bucket"""
+    return minimum * BUCKET_GROWTH ** bucket
+
+
+def histogram_percentile(buckets: List[Tuple[int, int]], pct: float, minimum: float = BUCKET_MIN) -> float:
+    """Estimate a percentile from (bucket, count) pairs sorted by bucket"""
+    total = sum(count for _, count in buckets)
+    if not total:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * total))
+    seen = 0
+    for bucket, count in buckets:
+        seen += count
+        if seen >= rank:
+            return bucket_upper_bound(bucket, minimum)
+    return bucket_upper_bound(buckets[-1][0], minimum)
+
+
+class RunHistory:
+    """
+    Append-only store of workflow run and step metrics
+
+    Raw rows go into one run table and one step table per UTC day, without
+    secondary indexes, so writes stay cheap and retention is a DROP TABLE.
+    Every write also updates hourly rollups (counts, failures, cache hits,
+    tokens, durations and a duration histogram per workflow and step), and
+    all aggregate queries read only the rollups.
+    """
+
+    def __init__(self, db_path: str, retention_days: int = 30, rollup_retention_days: int = 365):
+        """
+        Initialize the history store
+
+        Args:
+            db_path: Path of the SQLite database
+            retention_days: Days raw run and step rows are kept
+            rollup_retention_days: Days hourly rollups are kept
+        """
+        self.db_path = db_path
+        self.retention_days = retention_days
+        self.rollup_retention_days = rollup_retention_days
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._partitions: Set[str] = set()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._create_tables()
+
+    def _create_tables(self) -> None:
+        """Create the rollup tables if they don't exist"""
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS workflow_history_rollups (
+                    workflow_id TEXT NOT NULL,
+                    step_id TEXT NOT NULL,
+                    hour INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    failures INTEGER NOT NULL,
+                    cache_hits INTEGER NOT NULL,
+                    tokens INTEGER NOT NULL,
+                    total_duration REAL NOT NULL,
+                    max_duration REAL NOT NULL,
+                    PRIMARY KEY (workflow_id, step_id, hour)
+                ) WITHOUT ROWID
+            """)
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS workflow_history_buckets (
+                    workflow_id TEXT NOT NULL,
+                    step_id TEXT NOT NULL,
+                    hour INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (workflow_id, step_id, hour, bucket)
+                ) WITHOUT ROWID
+            """)
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS workflow_profile_buckets (
+                    agent TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    metric TEXT NOT NULL,
+                    hour INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (agent, model, action, metric, hour, bucket)
+                ) WITHOUT ROWID
+            """)
+            rows = self._connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'workflow_%_history_%'"
+            ).fetchall()
+            self._partitions = {row["name"][-8:] for row in rows if PARTITION_PATTERN.match(row["name"])}
+
+    async def record_run(self, result: Dict[str, Any], finished_at: Optional[float] = None) -> None:
+        """
+        Record a finished run as returned by WorkflowEngine.run
+
+        Args:
+            result: Run result with per-step durations, cache hits, tokens and errors
+            finished_at: When the run finished, defaults to now
+        """
+        await asyncio.to_thread(self._record_run, result, finished_at or time.time())
+
+    async def step_stats(
+        self,
+        workflow_id: Optional[str] = None,
+        step_id: Optional[str] = None,
+        days: float = 7
+    ) -> List[Dict[str, Any]]:
+        """
+        Get duration percentiles, error and cache hit rates and token usage per step
+
+        Args:
+            workflow_id: Only include this workflow
+            step_id: Only include this step
+            days: Size of the window, ending now, at hourly resolution
+
+        Returns:
+            One entry per workflow step, slowest p95 first
+        """
+        return await asyncio.to_thread(self._stats, workflow_id, step_id, days, False)
+
+    async def run_stats(self, workflow_id: Optional[str] = None, days: float = 7) -> List[Dict[str, Any]]:
+        """Get duration percentiles, failure rate and token usage of whole runs per workflow"""
+        return await asyncio.to_thread(self._stats, workflow_id, None, days, True)
+
+    async def profile_distributions(self, days: float = 30) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+        """
+        Get duration and token distributions of executed steps per agent, model and action
+
+        Steps served from the cache or restored from a checkpoint are left
+        out, since they say nothing about how long the work itself takes.
+
+        Args:
+            days: Size of the window, ending now, at hourly resolution
+
+        Returns:
+            Dict keyed by (agent, model, action) with the sample count and the
+            p10/p50/p90 of 'duration' and 'tokens'. Keys with model and action
+            set to '*' aggregate every model and action of an agent.
+        """
+        return await asyncio.to_thread(self._profile_distributions, days)
+
+    async def recent_runs(self, workflow_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get the most recent runs, newest first, from the raw run partitions"""
+        return await asyncio.to_thread(self._recent_runs, workflow_id, limit)
+
+    async def prune(self, now: Optional[float] = None) -> None:
+        """Drop raw partitions and rollups that are past their retention"""
+        await asyncio.to_thread(self._prune, now or time.time())
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._connection.close()
+
+    def _record_run(self, result: Dict[str, Any], finished_at: float) -> None:
+        workflow_id = result.get("workflow_id") or ""
+        duration = result.get("duration", 0.0)
+        started_at = finished_at - duration
+        hour = int(finished_at // 3600)
+        steps = result.get("steps", [])
+        errors = [step["error"] for step in steps if step.get("error")]
+
+        run_row = (
+            result.get("run_id"), workflow_id, result.get("status"), started_at, duration,
+            len(steps),
+            sum(1 for step in steps if step.get("status") != "completed"),
+            sum(1 for step in steps if step.get("cached")),
+            sum(step.get("tokens", 0) for step in steps),
+            errors[0] if errors else None
+        )
+        step_rows = [
+            (
+                result.get("run_id"), workflow_id, step["step_id"], step.get("agent"), step.get("status"),
+                started_at, step.get("duration", 0.0), int(bool(step.get("cached"))),
+                step.get("tokens", 0), step.get("error")
+            )
+            for step in steps
+        ]
+
+        # Restored and cancelled steps didn't execute, so they don't count toward latency
+        measured = [
+            (step["step_id"], step.get("duration", 0.0), step.get("status") == "failed",
+             bool(step.get("cached")), step.get("tokens", 0))
+            for step in steps
+            if step.get("status") in ("completed", "failed") and not step.get("restored")
+        ]
+        measured.append((RUN_ROLLUP, duration, result.get("status") != "completed", False, run_row[8]))
+
+        profile_rows = []
+        for step in steps:
+            if step.get("status") != "completed" or step.get("cached") or step.get("restored"):
+                continue
+            profile = (step.get("agent") or "", step.get("model") or "", step.get("action") or "")
+            profile_rows.append(profile + ("duration", hour, duration_bucket(step.get("duration", 0.0))))
+            profile_rows.append(profile + ("tokens", hour, duration_bucket(step.get("tokens", 0), TOKEN_BUCKET_MIN)))
+
+        day = time.strftime("%Y%m%d", time.gmtime(finished_at))
+        with self._lock, self._connection:
+            new_partition = self._ensure_partition(day)
+            self._connection.execute(
+                f"INSERT INTO workflow_run_history_{day} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", run_row
+            )
+            self._connection.executemany(
+                f"INSERT INTO workflow_step_history_{day} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", step_rows
+            )
+            self._connection.executemany(
+                """
+                INSERT INTO workflow_history_rollups
+                    (workflow_id, step_id, hour, count, failures, cache_hits, tokens, total_duration, max_duration)
+                VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?)
+                ON CONFLICT (workflow_id, step_id, hour) DO UPDATE SET
+                    count = count + 1,
+                    failures = failures + excluded.failures,
+                    cache_hits = cache_hits + excluded.cache_hits,
+                    tokens = tokens + excluded.tokens,
+                    total_duration = total_duration + excluded.total_duration,
+                    max_duration = MAX(max_duration, excluded.max_duration)
+                """,
+                [
+                    (workflow_id, step_id, hour, int(failed), int(cached), tokens, step_duration, step_duration)
+                    for step_id, step_duration, failed, cached, tokens in measured
+                ]
+            )
+            self._connection.executemany(
+                """
+                INSERT INTO workflow_history_buckets (workflow_id, step_id, hour, bucket, count)
+                VALUES (?, ?, ?, ?, 1)
+                ON CONFLICT (workflow_id, step_id, hour, bucket) DO UPDATE SET count = count + 1
+                """,
+                [
+                    (workflow_id, step_id, hour, duration_bucket(step_duration))
+                    for step_id, step_duration, _, _, _ in measured
+                ]
+            )
+            self._connection.executemany(
+                """
+                INSERT INTO workflow_profile_buckets (agent, model, action, metric, hour, bucket, count)
+                VALUES (?, ?, ?, ?, ?, ?, 1)
+                ON CONFLICT (agent, model, action, metric, hour, bucket) DO UPDATE SET count = count + 1
+                """,
+                profile_rows
+            )
+
+        if new_partition:
+            self._prune(finished_at)
+
+    def _ensure_partition(self, day: str) -> bool:
+        """Create the raw tables for a day; returns whether they were new"""
+        if day in self._partitions:
+            return False
+        self._connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS workflow_run_history_{day} (
+                run_id TEXT,
+                workflow_id TEXT,
+                status TEXT,
+                started_at REAL,
+                duration REAL,
+                steps INTEGER,
+                failed_steps INTEGER,
+                cache_hits INTEGER,
+                tokens INTEGER,
+                error TEXT
+            )
+        """)
+        self._connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS workflow_step_history_{day} (
+                run_id TEXT,
+                workflow_id TEXT,
+                step_id TEXT,
+                agent TEXT,
+                status TEXT,
+                started_at REAL,
+                duration REAL,
+                cached INTEGER,
+                tokens INTEGER,
+                error TEXT
+            )
+        """)
+        self._partitions.add(day)
+        return True
+
+    def _stats(
+        self,
+        workflow_id: Optional[str],
+        step_id: Optional[str],
+        days: float,
+        runs: bool
+    ) -> List[Dict[str, Any]]:
+        since = int((time.time() - days * 86400) // 3600)
+        conditions = ["hour >= ?"]
+        params: List[Any] = [since]
+        if workflow_id is not None:
+            conditions.append("workflow_id = ?")
+            params.append(workflow_id)
+        if runs:
+            conditions.append("step_id = ?")
+            params.append(RUN_ROLLUP)
+        elif step_id is not None:
+            conditions.append("step_id = ?")
+            params.append(step_id)
+        else:
+            conditions.append("step_id != ?")
+            params.append(RUN_ROLLUP)
+        where = " AND ".join(conditions)
+
+        with self._lock:
+            totals = self._connection.execute(
+                f"""
+                SELECT workflow_id, step_id, SUM(count) AS count, SUM(failures) AS failures,
+                       SUM(cache_hits) AS cache_hits, SUM(tokens) AS tokens,
+                       SUM(total_duration) AS total_duration, MAX(max_duration) AS max_duration
+                FROM workflow_history_rollups WHERE {where}
+                GROUP BY workflow_id, step_id
+                """,
+                params
+            ).fetchall()
+            bucket_rows = self._connection.execute(
+                f"""
+                SELECT workflow_id, step_id, bucket, SUM(count) AS count
+                FROM workflow_history_buckets WHERE {where}
+                GROUP BY workflow_id, step_id, bucket
+                ORDER BY workflow_id, step_id, bucket
+                """,
+                params
+            ).fetchall()
+
+        histograms: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+        for row in bucket_rows:
+            histograms.setdefault((row["workflow_id"], row["step_id"]), []).append((row["bucket"], row["count"]))
+
+        stats = []
+        for row in totals:
+            histogram = histograms.get((row["workflow_id"], row["step_id"]), [])
+            max_duration = row["max_duration"]
+            entry = {"workflow_id": row["workflow_id"] or None}
+            if not runs:
+                entry["step_id"] = row["step_id"]
+            entry.update({
+                "count": row["count"],
+                "failures": row["failures"],
+                "error_rate": round(row["failures"] / row["count"], 4),
+                "cache_hits": row["cache_hits"],
+                "cache_hit_rate": round(row["cache_hits"] / row["count"], 4),
+                "tokens": row["tokens"],
+                "avg_duration": round(row["total_duration"] / row["count"], 4),
+                "p50": round(min(histogram_percentile(histogram, 50), max_duration), 4),
+                "p95": round(min(histogram_percentile(histogram, 95), max_duration), 4),
+                "p99": round(min(histogram_percentile(histogram, 99), max_duration), 4),
+                "max_duration": round(max_duration, 4)
+            })
+            stats.append(entry)
+        stats.sort(key=lambda entry: entry["p95"], reverse=True)
+        return stats
+
+    def _profile_distributions(self, days: float) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+        since = int((time.time() - days * 86400) // 3600)
+        with self._lock:
+            rows = self._connection.execute(
+                """
+                SELECT agent, model, action, metric, bucket, SUM(count) AS count
+                FROM workflow_profile_buckets WHERE hour >= ?
+                GROUP BY agent, model, action, metric, bucket
+                """,
+                (since,)
+            ).fetchall()
+
+        histograms: Dict[Tuple[str, str, str], Dict[str, Dict[int, int]]] = {}
+        for row in rows:
+            for key in ((row["agent"], row["model"], row["action"]), (row["agent"], "*", "*")):
+                metric = histograms.setdefault(key, {"duration": {}, "tokens": {}})[row["metric"]]
+                metric[row["bucket"]] = metric.get(row["bucket"], 0) + row["count"]
+
+        distributions = {}
+        for key, metrics in histograms.items():
+            entry: Dict[str, Any] = {"count": sum(metrics["duration"].values())}
+            for metric, minimum in (("duration", BUCKET_MIN), ("tokens", TOKEN_BUCKET_MIN)):
+                buckets = sorted(metrics[metric].items())
+                entry[metric] = {
+                    f"p{pct}": histogram_percentile(buckets, pct, minimum) for pct in (10, 50, 90)
+                }
+            distributions[key] = entry
+        return distributions
+
+    def _recent_runs(self, workflow_id: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        runs: List[Dict[str, Any]] = []
+        with self._lock:
+            # Partitions are named by day, so newest-first order is a string sort
+            for day in sorted(self._partitions, reverse=True):
+                query = f"SELECT * FROM workflow_run_history_{day}"
+                params: Tuple[Any, ...] = ()
+                if workflow_id is not None:
+                    query += " WHERE workflow_id = ?"
+                    params = (workflow_id,)
+                query += " ORDER BY started_at DESC LIMIT ?"
+                rows = self._connection.execute(query, params + (limit - len(runs),)).fetchall()
+                runs.extend(dict(row) for row in rows)
+                if len(runs) >= limit:
+                    break
+        return runs
+
+    def _prune(self, now: float) -> None:
+        cutoff = time.strftime("%Y%m%d", time.gmtime(now - self.retention_days * 86400))
+        rollup_cutoff = int((now - self.rollup_retention_days * 86400) // 3600)
+        with self._lock, self._connection:
+            for day in sorted(self._partitions):
+                if day >= cutoff:
+                    break
+                self._connection.execute(f"DROP TABLE IF EXISTS workflow_run_history_{day}")
+                self._connection.execute(f"DROP TABLE IF EXISTS workflow_step_history_{day}")
+                self._partitions.discard(day)
+            self._connection.execute("DELETE FROM workflow_history_rollups WHERE hour < ?", (rollup_cutoff,))
+            self._connection.execute("DELETE FROM workflow_history_buckets WHERE hour < ?", (rollup_cutoff,))
+            self._connection.execute("DELETE FROM workflow_profile_buckets WHERE hour < ?", (rollup_cutoff,))
+
+
+# Global run history instance
+_run_history = None
+
+def get_run_history(db_path: str, retention_days: int = 30) -> RunHistory:
+    """Get the global workflow run history store"""
+    global _run_history
+    if _run_history is None:
+        _run_history = RunHistory(db_path, retention_days=retention_days)
+    return _run_history
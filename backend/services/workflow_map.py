@@ -0,0 +1,133 @@
+"""
+Map steps for AgentK workflows - Splits list inputs into items and reduces per-item results
+"""
+
+import asyncio
+import json
+import re
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Tuple
+
+MAP_REDUCERS = ("list", "concat", "merge")
+
+# A bulleted or numbered line of text, e.g. "- solar", "* wind" or "2. hydro"
+LIST_ENTRY = re.compile(r"^(?:[-*\u2022]|\d+[.)])\s+\S")
+
+
+def map_spec_errors(step_id: str, step: Mapping[str, Any]) -> List[str]:
+    """Check a step's 'map' definition, returning any problems found"""
+    spec = step.get("map")
+    if not spec:
+        return []
+    if not isinstance(spec, Mapping):
+        return [f"Map step '{step_id}' must define 'map' as an object"]
+
+    errors = []
+    if spec.get("over") not in step.get("inputs", []):
+        errors.append(f"Map step '{step_id}' must map over one of its inputs")
+    if spec.get("reduce", "list") not in MAP_REDUCERS:
+        errors.append(
+            f"Map step '{step_id}' has unknown reducer '{spec.get('reduce')}' "
+            f"(expected one of: {', '.join(MAP_REDUCERS)})"
+        )
+    if not isinstance(spec.get("as", ""), str):
+        errors.append(f"Map step '{step_id}' must name its item with a string 'as'")
+    for limit in ("max_parallelism", "max_items"):
+        value = spec.get(limit)
+        if value is not None and (not isinstance(value, int) or value < 1):
+            errors.append(f"Map step '{step_id}' {limit} must be a positive integer")
+    return errors
+
+
+def split_items(value: Any) -> List[Any]:
+    """
+    Split a map step's input into items
+
+    Lists are used as-is. Text is treated as a JSON array when it parses as
+    one, otherwise as one item per bulleted or numbered line, which matches
+    how agents usually enumerate sources or subtopics. Other lines, such as
+    an introduction or a closing remark, are not items; text without any
+    list entries is a single item.
+    """
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    if isinstance(value, str):
+        text = value.strip()
+        if text.startswith("["):
+            try:
+                parsed = json.loads(text)
+                if isinstance(parsed, list):
+                    return parsed
+            except ValueError:
+                pass
+        entries = [line.strip() for line in text.splitlines() if LIST_ENTRY.match(line.strip())]
+        return entries or ([text] if text else [])
+    if value is None:
+        return []
+    return [value]
+
+
+def reduce_items(reducer: str, values: List[Any]) -> Any:
+    """Combine per-item values, given in item order, into a single output"""
+    if reducer == "concat":
+        return "\n\n".join(str(value) for value in values)
+    if reducer == "merge":
+        merged: Dict[str, Any] = {}
+        for value in values:
+            if not isinstance(value, Mapping):
+                raise ValueError("The 'merge' reducer requires every item to produce an object")
+            merged.update(value)
+        return merged
+    return list(values)
+
+
+class ArtifactStream:
+    """
+    Items of a map step's output, published as each one completes
+
+    Downstream map steps iterate the stream to start on items before the
+    producing step has finished all of them.
+    """
+
+    def __init__(self):
+        self._items: Dict[int, Any] = {}
+        self._arrivals: List[int] = []
+        self._closed = False
+        self._error: Optional[str] = None
+        self._changed = asyncio.Event()
+
+    def push(self, index: int, value: Any) -> None:
+        """Publish the value of one item"""
+        if self._closed or index in self._items:
+            return
+        self._items[index] = value
+        self._arrivals.append(index)
+        self._changed.set()
+
+    def complete(self, values: List[Any]) -> None:
+        """Publish any items not streamed yet and end the stream"""
+        for index, value in enumerate(values):
+            self.push(index, value)
+        self.close()
+
+    def close(self, error: Optional[str] = None) -> None:
+        """End the stream, optionally because the producing step failed"""
+        if self._closed:
+            return
+        self._closed = True
+        self._error = error
+        self._changed.set()
+
+    async def items(self) -> AsyncIterator[Tuple[int, Any]]:
+        """Yield (index, value) pairs in completion order until the stream ends"""
+        position = 0
+        while True:
+            while position < len(self._arrivals):
+                index = self._arrivals[position]
+                position += 1
+                yield index, self._items[index]
+            if self._error is not None:
+                raise RuntimeError(self._error)
+            if self._closed:
+                return
+            self._changed.clear()
+            await self._changed.wait()
@@ -0,0 +1,283 @@
+"""
+Workflow plan compiler for AgentK - Turns workflow definitions into immutable execution plans
+"""
+
+import copy
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Set, Tuple
+from backend.services.workflow_map import map_spec_errors
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class StepHandle:
+    """Agent, model and plugin resolved for a step at compile time"""
+    agent: Optional[str] = None
+    model_type: Optional[str] = None
+    model: Optional[str] = None
+    plugin_id: Optional[str] = None
+
+
+StepResolver = Callable[[Mapping[str, Any]], StepHandle]
+
+
+@dataclass(frozen=True)
+class WorkflowPlan:
+    """
+    Immutable, precompiled form of a workflow definition
+    """
+    workflow_id: Optional[str]
+    version: Optional[str]
+    order: Tuple[str, ...]
+    steps: Mapping[str, Mapping[str, Any]]
+    dependencies: Mapping[str, FrozenSet[str]]
+    dependents: Mapping[str, FrozenSet[str]]
+    producers: Mapping[str, str]
+    levels: Tuple[Tuple[str, ...], ...]
+    external_inputs: FrozenSet[str]
+    sinks: Tuple[str, ...]
+    handles: Mapping[str, StepHandle]
+    errors: Tuple[str, ...] = ()
+    warnings: Tuple[str, ...] = ()
+    index: Mapping[str, int] = field(default_factory=dict)
+    # Map steps that can consume the items of an upstream map step as they
+    # complete, keyed by consumer, with the producing step as value
+    streams: Mapping[str, str] = field(default_factory=dict)
+
+    @property
+    def valid(self) -> bool:
+        """Whether the plan can be executed"""
+        return not self.errors
+
+    def missing_inputs(self, input_data: Dict[str, Any]) -> List[str]:
+        """Get the external inputs not supplied in the input data"""
+        return sorted(self.external_inputs - set(input_data))
+
+
+def compile_workflow(
+    steps: List[Dict[str, Any]],
+    workflow_id: Optional[str] = None,
+    version: Optional[str] = None,
+    resolver: Optional[StepResolver] = None
+) -> WorkflowPlan:
+    """
+    Compile workflow steps into an execution plan
+
+    Structural problems (duplicate IDs or outputs, dependency cycles, steps
+    that can never run) are recorded as diagnostics on the plan instead of
+    raised, so validation can report all of them at once.
+
+    Args:
+        steps: Workflow step definitions with 'id', 'inputs' and 'outputs'
+        workflow_id: ID of the workflow being compiled
+        version: Version of the workflow definition
+        resolver: Optional callable resolving each step to a StepHandle
+
+    Returns:
+        The compiled WorkflowPlan
+    """
+    errors: List[str] = []
+    warnings: List[str] = []
+
+    if not steps:
+        errors.append("Workflow has no steps")
+
+    step_map: Dict[str, Dict[str, Any]] = {}
+    for step in steps:
+        step_id = step.get("id")
+        if not step_id:
+            errors.append("Step is missing an 'id'")
+            continue
+        if step_id in step_map:
+            errors.append(f"Duplicate step ID: {step_id}")
+            continue
+        step_map[step_id] = copy.deepcopy(step)
+
+    producers: Dict[str, str] = {}
+    for step_id, step in step_map.items():
+        for output in step.get("outputs", []):
+            if output in producers:
+                errors.append(
+                    f"Output '{output}' is produced by both '{producers[output]}' and '{step_id}'"
+                )
+                continue
+            producers[output] = step_id
+
+    dependencies: Dict[str, Set[str]] = {}
+    external_inputs: Set[str] = set()
+    for step_id, step in step_map.items():
+        dependencies[step_id] = set()
+        for name in step.get("inputs", []):
+            producer = producers.get(name)
+            if producer is None:
+                external_inputs.add(name)
+            elif producer == step_id:
+                errors.append(f"Step '{step_id}' consumes its own output '{name}'")
+            else:
+                dependencies[step_id].add(producer)
+
+    streams: Dict[str, str] = {}
+    for step_id, step in step_map.items():
+        spec_errors = map_spec_errors(step_id, step)
+        errors.extend(spec_errors)
+        if not step.get("map") or spec_errors:
+            continue
+        producer = producers.get(step["map"]["over"])
+        if producer and producer != step_id:
+            upstream = step_map[producer].get("map")
+            if isinstance(upstream, Mapping) and upstream.get("reduce", "list") == "list":
+                streams[step_id] = producer
+
+    dependents: Dict[str, Set[str]] = {step_id: set() for step_id in step_map}
+    for step_id, deps in dependencies.items():
+        for dep in deps:
+            dependents[dep].add(step_id)
+
+    # Kahn's algorithm, one topological level at a time
+    remaining = {step_id: len(deps) for step_id, deps in dependencies.items()}
+    current = [step_id for step_id in step_map if remaining[step_id] == 0]
+    levels: List[Tuple[str, ...]] = []
+    placed: Set[str] = set()
+    while current:
+        levels.append(tuple(current))
+        placed.update(current)
+        following = []
+        for step_id in current:
+            for dependent in dependents[step_id]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    following.append(dependent)
+        current = [step_id for step_id in step_map if step_id in following]
+
+    unplaced = [step_id for step_id in step_map if step_id not in placed]
+    if unplaced:
+        # Steps on a cycle depend (transitively) on themselves; the rest are
+        # merely downstream of one and can never become ready
+        cyclic = [step_id for step_id in unplaced if _reaches(step_id, step_id, dependents)]
+        blocked = [step_id for step_id in unplaced if step_id not in cyclic]
+        errors.append(f"Dependency cycle between steps: {', '.join(cyclic)}")
+        if blocked:
+            warnings.append(f"Unreachable steps: {', '.join(blocked)}")
+
+    handles: Dict[str, StepHandle] = {}
+    for step_id, step in step_map.items():
+        if resolver is None:
+            handles[step_id] = StepHandle(agent=step.get("agent"), plugin_id=step.get("tool"))
+            continue
+        try:
+            handles[step_id] = resolver(step)
+        except Exception as e:
+            errors.append(f"Step '{step_id}' could not be resolved: {e}")
+
+    order = tuple(step_map)
+    return WorkflowPlan(
+        workflow_id=workflow_id,
+        version=version,
+        order=order,
+        steps=MappingProxyType({
+            step_id: MappingProxyType(step) for step_id, step in step_map.items()
+        }),
+        dependencies=MappingProxyType({
+            step_id: frozenset(deps) for step_id, deps in dependencies.items()
+        }),
+        dependents=MappingProxyType({
+            step_id: frozenset(deps) for step_id, deps in dependents.items()
+        }),
+        producers=MappingProxyType(producers),
+        levels=tuple(levels),
+        external_inputs=frozenset(external_inputs),
+        sinks=tuple(step_id for step_id in order if not dependents[step_id]),
+        handles=MappingProxyType(handles),
+        errors=tuple(errors),
+        warnings=tuple(warnings),
+        index=MappingProxyType({step_id: i for i, step_id in enumerate(order)}),
+        streams=MappingProxyType(streams)
+    )
+
+
+def build_dependency_graph(steps: List[Dict[str, Any]]) -> Dict[str, Set[str]]:
+    """
+    Build the step dependency graph from the declared inputs and outputs
+
+    Raises:
+        ValueError: If the steps do not form a valid DAG
+    """
+    plan = compile_workflow(steps)
+    if plan.errors:
+        raise ValueError("; ".join(plan.errors))
+    return {step_id: set(deps) for step_id, deps in plan.dependencies.items()}
+
+
+def _reaches(start: str, target: str, dependents: Dict[str, Set[str]]) -> bool:
+    """Check whether target is reachable from start through dependent edges"""
+    stack = list(dependents[start])
+    seen: Set[str] = set()
+    while stack:
+        step_id = stack.pop()
+        if step_id == target:
+            return True
+        if step_id not in seen:
+            seen.add(step_id)
+            stack.extend(dependents[step_id])
+    return False
+
+
+class WorkflowPlanCache:
+    """
+    LRU cache of compiled plans keyed by workflow ID and version
+
+    `generation` changes on every invalidation. A caller compiling a plan
+    from a definition it read earlier passes the generation it saw before
+    reading, so a plan compiled from a definition that was replaced in the
+    meantime is not cached.
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self.generation = 0
+        self._plans: "OrderedDict[str, WorkflowPlan]" = OrderedDict()
+
+    def get(self, workflow_id: str, version: Optional[str] = None) -> Optional[WorkflowPlan]:
+        """Get a cached plan, optionally requiring a specific version"""
+        plan = self._plans.get(workflow_id)
+        if plan is None or (version is not None and plan.version != version):
+            return None
+        self._plans.move_to_end(workflow_id)
+        return plan
+
+    def put(self, plan: WorkflowPlan, generation: Optional[int] = None) -> None:
+        """Cache a plan, replacing any other version of the same workflow, unless invalidated since generation"""
+        if generation is not None and generation != self.generation:
+            return
+        self._plans[plan.workflow_id] = plan
+        self._plans.move_to_end(plan.workflow_id)
+        while len(self._plans) > self.max_size:
+            self._plans.popitem(last=False)
+
+    def invalidate(self, workflow_id: str) -> None:
+        """Drop the cached plan for a workflow"""
+        self.generation += 1
+        self._plans.pop(workflow_id, None)
+
+    def clear(self) -> None:
+        """Drop all cached plans"""
+        self.generation += 1
+        self._plans.clear()
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+
+# Global plan cache instance
+_plan_cache = None
+
+def get_plan_cache() -> WorkflowPlanCache:
+    """Get the global workflow plan cache"""
+    global _plan_cache
+    if _plan_cache is None:
+        _plan_cache = WorkflowPlanCache()
+    return _plan_cache
@@ -0,0 +1,375 @@
+"""
+Workflow registry for AgentK - Loads workflow definitions from disk, compiles them and hot-reloads on change
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import struct
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+from backend.services.workflow_plan import StepResolver, WorkflowPlan, compile_workflow
+
+logger = logging.getLogger(__name__)
+
+# inotify event flags, from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0)
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+@dataclass(frozen=True)
+class RegisteredWorkflow:
+    """A workflow definition loaded from disk along with its compiled plan"""
+    id: str
+    name: str
+    description: str
+    version: Optional[str]
+    source: str
+    steps: Tuple[Dict[str, Any], ...]
+    plan: WorkflowPlan
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the definition in the shape of the Workflow model"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "version": self.version,
+            "steps": [dict(step) for step in self.steps]
+        }
+
+
+def graph_to_steps(workflow: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Convert a node/connection graph from the frontend editor into workflow steps
+
+    Each node other than 'start' and 'end' becomes a step that consumes the
+    outputs of the nodes connected into it; nodes fed by 'start' consume the
+    workflow's 'input'. Conditions on connections are not evaluated by the
+    engine, so every branch after a condition node runs.
+    """
+    nodes = {node["id"]: node for node in workflow.get("nodes", [])}
+    predecessors: Dict[str, List[str]] = {node_id: [] for node_id in nodes}
+    for connection in workflow.get("connections", []):
+        if connection.get("to") in predecessors:
+            predecessors[connection["to"]].append(connection.get("from"))
+
+    steps = []
+    for node_id, node in nodes.items():
+        if node.get("type") in ("start", "end"):
+            continue
+        config = dict(node.get("config", {}))
+        inputs = []
+        for source in predecessors[node_id]:
+            name = "input" if nodes.get(source, {}).get("type") == "start" else f"{source}_output"
+            if name not in inputs:
+                inputs.append(name)
+        steps.append({
+            "id": node_id,
+            "agent": config.pop("agent_id", None),
+            "action": config.pop("action", node.get("type")),
+            "inputs": inputs or ["input"],
+            "outputs": [f"{node_id}_output"],
+            "parameters": config
+        })
+    return steps
+
+
+def parse_definitions(path: Path) -> List[Dict[str, Any]]:
+    """
+    Parse the workflow definitions in a file
+
+    A file either holds one workflow with 'steps' (its ID is the file name),
+    or a collection of editor graphs under 'exampleWorkflows'.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    if isinstance(data, dict) and "steps" in data:
+        return [{**data, "id": data.get("id", path.stem)}]
+
+    graphs = data.get("exampleWorkflows", []) if isinstance(data, dict) else data
+    if not isinstance(graphs, list):
+        raise ValueError("Expected a workflow with 'steps' or a list of workflow graphs")
+    return [
+        {
+            "id": graph["id"],
+            "name": graph.get("name", graph["id"]),
+            "description": graph.get("description", ""),
+            "version": graph.get("version"),
+            "steps": graph_to_steps(graph)
+        }
+        for graph in graphs
+    ]
+
+
+class WorkflowRegistry:
+    """
+    In-memory registry of the workflow definitions shipped on disk
+
+    Definitions are validated and compiled when loaded, then served from
+    dictionaries keyed by ID and by case-insensitive name. The watched
+    directories are followed with inotify where available, and polled for
+    mtime changes elsewhere, so edits are picked up without a restart.
+    """
+
+    def __init__(
+        self,
+        paths: List[str],
+        resolver: Optional[StepResolver] = None,
+        poll_interval: float = 2.0,
+        use_inotify: bool = True
+    ):
+        """
+        Initialize the registry
+
+        Args:
+            paths: Directories of workflow files and individual definition files
+            resolver: Optional callable resolving each step to a StepHandle
+            poll_interval: Seconds between mtime scans when inotify is unavailable
+            use_inotify: Whether to use inotify when the platform supports it
+        """
+        self.paths = [Path(path) for path in paths]
+        self.resolver = resolver
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.load_errors: Dict[str, str] = {}
+        self._by_id: Dict[str, RegisteredWorkflow] = {}
+        self._by_name: Dict[str, str] = {}
+        self._by_source: Dict[str, List[str]] = {}
+        self._mtimes: Dict[str, Tuple[int, int]] = {}
+        self._watch_task: Optional[asyncio.Task] = None
+        self._inotify_fd: Optional[int] = None
+        self._watches: Dict[int, Path] = {}
+        self.watch_mode: Optional[str] = None
+
+    def load_all(self) -> None:
+        """Load every definition file under the configured paths"""
+        for path in self._source_files():
+            self.reload(path)
+        logger.info(f"Loaded {len(self._by_id)} workflows from {len(self._by_source)} files")
+
+    def get(self, workflow_id: str) -> Optional[RegisteredWorkflow]:
+        """Get a workflow by ID"""
+        return self._by_id.get(workflow_id)
+
+    def get_by_name(self, name: str) -> Optional[RegisteredWorkflow]:
+        """Get a workflow by its display name, ignoring case"""
+        workflow_id = self._by_name.get(name.casefold())
+        return self._by_id.get(workflow_id) if workflow_id else None
+
+    def list(self) -> List[RegisteredWorkflow]:
+        """List all registered workflows"""
+        return list(self._by_id.values())
+
+    def reload(self, path: Path) -> None:
+        """Reload the workflows defined in a file, or drop them if it was deleted"""
+        source = str(path)
+        if not path.exists():
+            self._replace(source, [])
+            self._mtimes.pop(source, None)
+            self.load_errors.pop(source, None)
+            return
+
+        stat = path.stat()
+        self._mtimes[source] = (stat.st_mtime_ns, stat.st_size)
+        try:
+            definitions = parse_definitions(path)
+        except (OSError, ValueError, KeyError) as e:
+            # Keep serving the last good version, e.g. while a file is half-written
+            self.load_errors[source] = str(e)
+            logger.error(f"Failed to load workflows from {source}: {e}")
+            return
+
+        workflows = []
+        errors = []
+        for definition in definitions:
+            plan = compile_workflow(
+                definition.get("steps", []),
+                workflow_id=definition["id"],
+                version=definition.get("version"),
+                resolver=self.resolver
+            )
+            if plan.errors:
+                errors.append(f"{definition['id']}: {'; '.join(plan.errors)}")
+                continue
+            workflows.append(RegisteredWorkflow(
+                id=definition["id"],
+                name=definition.get("name", definition["id"]),
+                description=definition.get("description", ""),
+                version=definition.get("version"),
+                source=source,
+                steps=tuple(dict(plan.steps[step_id]) for step_id in plan.order),
+                plan=plan
+            ))
+
+        if errors:
+            self.load_errors[source] = "; ".join(errors)
+            logger.error(f"Invalid workflows in {source}: {self.load_errors[source]}")
+        else:
+            self.load_errors.pop(source, None)
+        self._replace(source, workflows)
+
+    def _replace(self, source: str, workflows: List[RegisteredWorkflow]) -> None:
+        """Swap the workflows registered from a file for a new set"""
+        for workflow_id in self._by_source.pop(source, []):
+            workflow = self._by_id.pop(workflow_id, None)
+            if workflow and self._by_name.get(workflow.name.casefold()) == workflow_id:
+                del self._by_name[workflow.name.casefold()]
+
+        registered = []
+        for workflow in workflows:
+            existing = self._by_id.get(workflow.id)
+            if existing is not None:
+                logger.warning(f"Workflow ID {workflow.id} in {source} is already defined in {existing.source}")
+                continue
+            self._by_id[workflow.id] = workflow
+            self._by_name.setdefault(workflow.name.casefold(), workflow.id)
+            registered.append(workflow.id)
+        if registered:
+            self._by_source[source] = registered
+
+    def _source_files(self) -> List[Path]:
+        """Get the definition files currently present under the configured paths"""
+        files = []
+        for path in self.paths:
+            if path.is_dir():
+                files.extend(sorted(path.glob("*.json")))
+            elif path.exists():
+                files.append(path)
+        return files
+
+    def _is_source(self, path: Path) -> bool:
+        """Check whether a path is, or would be, one of the definition files"""
+        return any(
+            path == watched or (path.parent == watched and path.suffix == ".json")
+            for watched in self.paths
+        )
+
+    async def start(self) -> None:
+        """Start following changes to the definition files"""
+        if self._watch_task is not None:
+            return
+        self._inotify_fd = self._open_inotify() if self.use_inotify else None
+        if self._inotify_fd is not None:
+            self.watch_mode = "inotify"
+            self._watch_task = asyncio.create_task(self._watch_inotify())
+        else:
+            self.watch_mode = "polling"
+            self._watch_task = asyncio.create_task(self._watch_polling())
+        logger.info(f"Watching workflow definitions using {self.watch_mode}")
+
+    async def stop(self) -> None:
+        """Stop following changes"""
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            await asyncio.gather(self._watch_task, return_exceptions=True)
+            self._watch_task = None
+        if self._inotify_fd is not None:
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+
+    def _open_inotify(self) -> Optional[int]:
+        """Create an inotify instance watching the definition directories"""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError) as e:
+            logger.debug(f"inotify unavailable: {e}")
+            return None
+        if fd < 0:
+            return None
+
+        self._watches = {}
+        # Watch directories rather than files, so atomic saves (write to a
+        # temporary file, then rename over the original) are seen too
+        for directory in {path if path.is_dir() else path.parent for path in self.paths}:
+            if not directory.is_dir():
+                continue
+            wd = libc.inotify_add_watch(fd, str(directory).encode(), WATCH_MASK)
+            if wd < 0:
+                logger.warning(f"Failed to watch {directory}: {os.strerror(ctypes.get_errno())}")
+                os.close(fd)
+                return None
+            self._watches[wd] = directory
+        return fd
+
+    async def _watch_inotify(self) -> None:
+        loop = asyncio.get_running_loop()
+        readable = asyncio.Event()
+        loop.add_reader(self._inotify_fd, readable.set)
+        try:
+            while True:
+                await readable.wait()
+                readable.clear()
+                changed = self._read_inotify_events()
+                # Let bursts of events from a single save settle before reloading
+                await asyncio.sleep(0.05)
+                changed |= self._read_inotify_events()
+                for path in sorted(changed):
+                    self.reload(path)
+        finally:
+            loop.remove_reader(self._inotify_fd)
+
+    def _read_inotify_events(self) -> Set[Path]:
+        """Drain pending inotify events, returning the definition files they touch"""
+        changed: Set[Path] = set()
+        while True:
+            try:
+                data = os.read(self._inotify_fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0").decode()
+                offset += length
+                directory = self._watches.get(wd)
+                if directory is not None and name:
+                    path = directory / name
+                    if self._is_source(path):
+                        changed.add(path)
+
+    async def _watch_polling(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            present = {str(path): path for path in self._source_files()}
+            for source, path in present.items():
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                if self._mtimes.get(source) != (stat.st_mtime_ns, stat.st_size):
+                    self.reload(path)
+            for source in list(self._mtimes):
+                if source not in present:
+                    self.reload(Path(source))
+
+
+# Global workflow registry instance
+_workflow_registry = None
+
+def get_workflow_registry(
+    paths: List[str], resolver: Optional[StepResolver] = None, poll_interval: float = 2.0
+) -> WorkflowRegistry:
+    """Get the global workflow registry, loading the definitions on first use"""
+    global _workflow_registry
+    if _workflow_registry is None:
+        _workflow_registry = WorkflowRegistry(paths, resolver=resolver, poll_interval=poll_interval)
+        _workflow_registry.load_all()
+    return _workflow_registry
@@ -0,0 +1,273 @@
+"""
+Workflow run scheduler for AgentK - Queues runs and executes them on a pool of async workers
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+from backend.services.workflow_checkpoint import CheckpointStore
+from backend.services.workflow_plan import StepHandle
+from plugins.python_sandbox import percentile
+
+logger = logging.getLogger(__name__)
+
+RunExecutor = Callable[[str], Awaitable[Any]]
+
+
+class ConcurrencyLimiter:
+    """
+    Caps how many steps may run at once against each agent and each plugin
+    """
+
+    def __init__(self, agent_limit: int = 2, plugin_limit: int = 2, overrides: Optional[Dict[str, int]] = None):
+        """
+        Initialize the limiter
+
+        Args:
+            agent_limit: Default concurrent steps per agent
+            plugin_limit: Default concurrent steps per plugin
+            overrides: Per-key limits, e.g. {"agent:analyst": 4, "plugin:web_search": 1}
+        """
+        self.agent_limit = agent_limit
+        self.plugin_limit = plugin_limit
+        self.overrides = overrides or {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._active: Dict[str, int] = {}
+
+    def _semaphore(self, key: str, default: int) -> asyncio.Semaphore:
+        if key not in self._semaphores:
+            self._semaphores[key] = asyncio.Semaphore(self.overrides.get(key, default))
+        return self._semaphores[key]
+
+    @asynccontextmanager
+    async def limit(self, handle: StepHandle):
+        """Hold the agent and plugin slots for a step while it runs"""
+        # Always acquire agent before plugin so two steps can't deadlock
+        keys: List[Tuple[str, int]] = []
+        if handle.agent:
+            keys.append((f"agent:{handle.agent}", self.agent_limit))
+        if handle.plugin_id:
+            keys.append((f"plugin:{handle.plugin_id}", self.plugin_limit))
+
+        acquired = []
+        try:
+            for key, default in keys:
+                await self._semaphore(key, default).acquire()
+                acquired.append(key)
+                self._active[key] = self._active.get(key, 0) + 1
+            yield
+        finally:
+            for key in reversed(acquired):
+                self._active[key] -= 1
+                self._semaphores[key].release()
+
+    def wrap(self, runner):
+        """Wrap a step runner so every step call goes through the limiter"""
+        async def limited_runner(step, inputs, handle):
+            async with self.limit(handle):
+                return await runner(step, inputs, handle)
+        return limited_runner
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get the number of steps currently holding each slot"""
+        return {key: count for key, count in self._active.items() if count}
+
+
+class FairRunQueue:
+    """
+    Run queue that round-robins between users, shortest job first within each user
+
+    Runs of one user are ordered by submission time plus estimated duration,
+    so a short run overtakes longer ones submitted shortly before it, while
+    a long run still moves ahead of anything submitted long enough after it
+    and can't starve. With no estimates the order is FIFO.
+    """
+
+    def __init__(self):
+        self._queues: "OrderedDict[str, List[Tuple[float, int, str, float]]]" = OrderedDict()
+        self._sequence = itertools.count()
+        self._size = 0
+        self._available = asyncio.Condition()
+
+    async def put(self, run_id: str, user_id: Optional[str], submitted_at: float, estimate: float = 0.0) -> None:
+        """Add a run to its user's queue, ordered by its estimated duration in seconds"""
+        async with self._available:
+            runs = self._queues.setdefault(user_id or "anonymous", [])
+            heapq.heappush(runs, (submitted_at + estimate, next(self._sequence), run_id, submitted_at))
+            self._size += 1
+            self._available.notify()
+
+    async def get(self) -> Tuple[str, str, float]:
+        """Wait for the next run, taking turns between users"""
+        async with self._available:
+            await self._available.wait_for(lambda: self._size > 0)
+            user_id, runs = next(iter(self._queues.items()))
+            _, _, run_id, submitted_at = heapq.heappop(runs)
+            self._size -= 1
+            if runs:
+                self._queues.move_to_end(user_id)
+            else:
+                del self._queues[user_id]
+            return run_id, user_id, submitted_at
+
+    def depth_by_user(self) -> Dict[str, int]:
+        """Get the number of queued runs per user"""
+        return {user_id: len(runs) for user_id, runs in self._queues.items()}
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class WorkflowScheduler:
+    """
+    Executes submitted workflow runs on a fixed pool of async workers
+    """
+
+    def __init__(
+        self,
+        executor: RunExecutor,
+        store: Optional[CheckpointStore] = None,
+        workers: int = 4,
+        history_size: int = 1000
+    ):
+        """
+        Initialize the scheduler
+
+        Args:
+            executor: Coroutine function that executes a run by ID
+            store: Checkpoint store holding the persistent run queue
+            workers: Number of runs executed concurrently
+            history_size: Number of recent runs kept for latency metrics
+        """
+        self.executor = executor
+        self.store = store
+        self.worker_count = workers
+        self.queue = FairRunQueue()
+        self._workers: List[asyncio.Task] = []
+        self._queued: Set[str] = set()
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_times: Deque[float] = deque(maxlen=history_size)
+        self._run_times: Deque[float] = deque(maxlen=history_size)
+
+    @property
+    def started(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self) -> None:
+        """Start the workers and re-enqueue runs persisted by a previous process"""
+        if self.started:
+            return
+
+        if self.store is not None:
+            # Runs left 'running' were interrupted; their checkpoints let them resume.
+            # Runs executed inline by a request are not the scheduler's to recover
+            for run in await self.store.list_runs(["pending", "running"], scheduled_only=True):
+                await self._enqueue(run["run_id"], run["user_id"], run["created_at"])
+
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+        logger.info(f"Workflow scheduler started with {self.worker_count} workers")
+
+    async def stop(self) -> None:
+        """Stop the workers; unfinished runs stay persisted for the next start"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("Workflow scheduler stopped")
+
+    async def submit(self, run_id: str, user_id: Optional[str] = None, estimate: float = 0.0) -> None:
+        """Queue a run that has already been recorded in the store"""
+        if not self.started:
+            await self.start()
+        await self._enqueue(run_id, user_id, time.time(), estimate)
+
+    async def _enqueue(
+        self, run_id: str, user_id: Optional[str], submitted_at: float, estimate: float = 0.0
+    ) -> None:
+        # A run recovered from the store on start may be submitted again
+        if run_id in self._queued:
+            return
+        self._queued.add(run_id)
+        await self.queue.put(run_id, user_id, submitted_at, estimate)
+
+    async def _worker(self) -> None:
+        while True:
+            run_id, user_id, submitted_at = await self.queue.get()
+            started = time.time()
+            self._wait_times.append(started - submitted_at)
+            self._running += 1
+            try:
+                await self.executor(run_id)
+                self._completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failed += 1
+                logger.error(f"Workflow run {run_id} for user {user_id} failed: {e}")
+                await self._mark_failed(run_id, e)
+            finally:
+                self._queued.discard(run_id)
+                self._running -= 1
+                self._run_times.append(time.time() - started)
+
+    async def _mark_failed(self, run_id: str, error: Exception) -> None:
+        # Otherwise a run that raised before executing stays pending and is retried on every start
+        if self.store is None:
+            return
+        try:
+            await self.store.set_run_status(run_id, "failed", str(error))
+        except Exception as e:
+            logger.error(f"Could not mark workflow run {run_id} as failed: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get queue depth and run latency metrics"""
+        wait_times = list(self._wait_times)
+        run_times = list(self._run_times)
+        return {
+            "queue_depth": len(self.queue),
+            "queue_depth_by_user": self.queue.depth_by_user(),
+            "running": self._running,
+            "workers": self.worker_count,
+            "completed": self._completed,
+            "failed": self._failed,
+            "queue_wait": {
+                "avg": round(sum(wait_times) / len(wait_times), 4) if wait_times else 0.0,
+                "p50": round(percentile(wait_times, 50), 4),
+                "p95": round(percentile(wait_times, 95), 4)
+            },
+            "run_duration": {
+                "avg": round(sum(run_times) / len(run_times), 4) if run_times else 0.0,
+                "p50": round(percentile(run_times, 50), 4),
+                "p95": round(percentile(run_times, 95), 4)
+            }
+        }
+
+
+# Global scheduler and limiter instances
+_scheduler = None
+_limiter = None
+
+def get_concurrency_limiter(
+    agent_limit: int = 2, plugin_limit: int = 2, overrides: Optional[Dict[str, int]] = None
+) -> ConcurrencyLimiter:
+    """Get the global step concurrency limiter"""
+    global _limiter
+    if _limiter is None:
+        _limiter = ConcurrencyLimiter(agent_limit, plugin_limit, overrides)
+    return _limiter
+
+def get_workflow_scheduler(
+    executor: RunExecutor, store: Optional[CheckpointStore] = None, workers: int = 4
+) -> WorkflowScheduler:
+    """Get the global workflow scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = WorkflowScheduler(executor, store=store, workers=workers)
+    return _scheduler
@@ -1,17 +1,80 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterable, AsyncIterator, Set
 from backend.models.workflow import Workflow, WorkflowCreate, WorkflowUpdate, WorkflowStatus
 from backend.db.database import get_db
 from backend.db.crud import create_workflow, get_workflow, get_all_workflows, update_workflow, delete_workflow
+from backend.core.config import settings
+from backend.services.workflow_batch import BatchItem, run_batch
+from backend.services.workflow_cache import get_step_cache
+from backend.services.workflow_checkpoint import get_checkpoint_store
+from backend.services.workflow_engine import WorkflowEngine
+from backend.services.workflow_estimator import get_workflow_estimator
+from backend.services.workflow_events import Subscription, get_event_bus, report_progress
+from backend.services.workflow_history import get_run_history
+from backend.services.workflow_plan import StepHandle, WorkflowPlan, compile_workflow, get_plan_cache
+from backend.services.workflow_registry import get_workflow_registry
+from backend.services.workflow_scheduler import get_concurrency_limiter, get_workflow_scheduler
+from backend.utils.llm_connector import generate_response
+import json
 import uuid
 
+# Runs resumed through resume_run that have not finished yet, shared by every
+# WorkflowService so two requests can't resume the same run at once
+_resuming_runs: Set[str] = set()
+
+# Only runs that ended without completing can be resumed; pending and running
+# runs belong to the scheduler or to the request executing them
+RESUMABLE_STATUSES = ("failed", "cancelled")
+
 class WorkflowService:
     def __init__(self):
         self.db = get_db()
+        self.limiter = get_concurrency_limiter(
+            settings.WORKFLOW_AGENT_CONCURRENCY,
+            settings.WORKFLOW_PLUGIN_CONCURRENCY,
+            settings.WORKFLOW_CONCURRENCY_OVERRIDES
+        )
+        self.events = get_event_bus(settings.WORKFLOW_EVENT_BUFFER_SIZE)
+        self.engine = WorkflowEngine(
+            self.limiter.wrap(self._run_step),
+            max_parallelism=settings.WORKFLOW_MAX_PARALLELISM,
+            cache=get_step_cache(settings.WORKFLOW_STEP_CACHE_SIZE, settings.WORKFLOW_STEP_CACHE_TTL),
+            checkpoints=get_checkpoint_store(settings.WORKFLOW_CHECKPOINT_DB),
+            events=self.events,
+            history=get_run_history(settings.WORKFLOW_HISTORY_DB, settings.WORKFLOW_HISTORY_RETENTION_DAYS)
+        )
+        self.estimator = get_workflow_estimator(
+            self.engine.history,
+            max_parallelism=settings.WORKFLOW_MAX_PARALLELISM,
+            default_duration=settings.WORKFLOW_ESTIMATE_DEFAULT_DURATION,
+            default_tokens=settings.WORKFLOW_ESTIMATE_DEFAULT_TOKENS,
+            cost_per_1k_tokens=settings.WORKFLOW_TOKEN_COST_PER_1K,
+            days=settings.WORKFLOW_ESTIMATE_HISTORY_DAYS
+        )
+        self.scheduler = get_workflow_scheduler(
+            self._execute_run, store=self.engine.checkpoints, workers=settings.WORKFLOW_WORKERS
+        )
+        self.plan_cache = get_plan_cache()
+        self.registry = get_workflow_registry(
+            settings.WORKFLOW_DEFINITION_PATHS,
+            resolver=self._resolve_step,
+            poll_interval=settings.WORKFLOW_REGISTRY_POLL_INTERVAL
+        )
     
     async def get_all_workflows(self) -> List[Workflow]:
         """Get all workflows"""
         return await get_all_workflows(self.db)
     
+    async def list_workflows(self) -> List[Workflow]:
+        """List the workflow definitions shipped on disk"""
+        await self.registry.start()
+        return [Workflow(**workflow.to_dict()) for workflow in self.registry.list()]
+    
+    async def find_workflow(self, key: str) -> Optional[Workflow]:
+        """Look up a workflow definition shipped on disk by ID or name"""
+        await self.registry.start()
+        workflow = self.registry.get(key) or self.registry.get_by_name(key)
+        return Workflow(**workflow.to_dict()) if workflow else None
+    
     async def get_workflow(self, workflow_id: str) -> Optional[Workflow]:
         """Get a specific workflow by ID"""
         return await get_workflow(self.db, workflow_id)
@@ -28,71 +91,231 @@ class WorkflowService:
     
     async def update_workflow(self, workflow_id: str, workflow_data: WorkflowUpdate) -> Optional[Workflow]:
         """Update an existing workflow"""
-        return await update_workflow(self.db, workflow_id, workflow_data)
+        # Invalidate once the write is committed so the old definition can't be cached again
+        workflow = await update_workflow(self.db, workflow_id, workflow_data)
+        self.plan_cache.invalidate(workflow_id)
+        return workflow
     
     async def delete_workflow(self, workflow_id: str) -> bool:
         """Delete a workflow"""
-        return await delete_workflow(self.db, workflow_id)
+        deleted = await delete_workflow(self.db, workflow_id)
+        self.plan_cache.invalidate(workflow_id)
+        return deleted
     
-    async def execute_workflow(self, workflow_id: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a workflow with input data"""
+    async def get_plan(self, workflow_id: str) -> Optional[WorkflowPlan]:
+        """Get the compiled execution plan for a workflow, compiling it on first use"""
+        # Definitions shipped on disk are compiled by the registry when loaded
+        await self.registry.start()
+        registered = self.registry.get(workflow_id)
+        if registered is not None:
+            return registered.plan
+        
+        plan = self.plan_cache.get(workflow_id)
+        if plan is not None:
+            return plan
+        
+        generation = self.plan_cache.generation
         workflow = await self.get_workflow(workflow_id)
         if not workflow:
+            return None
+        
+        plan = compile_workflow(
+            [step.dict() for step in workflow.steps],
+            workflow_id=workflow_id,
+            version=workflow.version,
+            resolver=self._resolve_step
+        )
+        self.plan_cache.put(plan, generation)
+        return plan
+    
+    async def execute_workflow(
+        self, workflow_id: str, input_data: Dict[str, Any], use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """Execute a workflow with input data, reusing memoized step results when allowed"""
+        plan = await self.get_plan(workflow_id)
+        if not plan:
+            raise ValueError(f"Workflow with ID {workflow_id} not found")
+        
+        run_id = str(uuid.uuid4())
+        await self.engine.checkpoints.create_run(run_id, workflow_id, input_data, version=plan.version)
+        return await self.engine.run(plan, input_data, use_cache=use_cache, run_id=run_id)
+    
+    async def execute_batch(
+        self,
+        workflow_id: str,
+        items: AsyncIterable[BatchItem],
+        concurrency: Optional[int] = None,
+        use_cache: bool = True
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Run a workflow over a stream of inputs, sharing one compiled plan across all items"""
+        plan = await self.get_plan(workflow_id)
+        if not plan:
             raise ValueError(f"Workflow with ID {workflow_id} not found")
+        if plan.errors:
+            raise ValueError(f"Invalid workflow: {'; '.join(plan.errors)}")
         
-        # This is a simplified workflow execution
-        # In a real implementation, you would:
-        # 1. Parse the workflow nodes and connections
-        # 2. Execute each node in the correct order
-        # 3. Handle conditional logic and loops
-        # 4. Return the final result
+        return run_batch(
+            self.engine, plan, items,
+            concurrency=concurrency or settings.WORKFLOW_BATCH_CONCURRENCY,
+            use_cache=use_cache
+        )
+    
+    async def submit_workflow(
+        self, workflow_id: str, input_data: Dict[str, Any], user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Queue a workflow run and return its ID without waiting for it to execute"""
+        plan = await self.get_plan(workflow_id)
+        if not plan:
+            raise ValueError(f"Workflow with ID {workflow_id} not found")
+        if plan.errors:
+            raise ValueError(f"Invalid workflow: {'; '.join(plan.errors)}")
+        missing = plan.missing_inputs(input_data)
+        if missing:
+            raise ValueError(f"Missing workflow inputs: {', '.join(missing)}")
         
-        result = {
+        run_id = str(uuid.uuid4())
+        estimate = await self.estimator.estimate(plan)
+        await self.engine.checkpoints.create_run(
+            run_id, workflow_id, input_data, version=plan.version, user_id=user_id, scheduled=True
+        )
+        # Shorter runs are scheduled ahead of longer ones from the same user
+        await self.scheduler.submit(run_id, user_id, estimate=estimate["duration"]["p50"])
+        return {
+            "run_id": run_id,
             "workflow_id": workflow_id,
-            "status": "completed",
-            "input": input_data,
-            "output": {"message": f"Workflow '{workflow.name}' executed successfully"},
-            "steps": []
+            "status": "pending",
+            "estimate": {key: estimate[key] for key in ("duration", "tokens", "cost")}
         }
+    
+    async def estimate_workflow(self, workflow_id: str) -> Dict[str, Any]:
+        """Predict a workflow's duration, token usage and cost from the history of its steps"""
+        plan = await self.get_plan(workflow_id)
+        if not plan:
+            raise ValueError(f"Workflow with ID {workflow_id} not found")
+        if plan.errors:
+            raise ValueError(f"Invalid workflow: {'; '.join(plan.errors)}")
+        return await self.estimator.estimate(plan)
+    
+    def get_queue_metrics(self) -> Dict[str, Any]:
+        """Get run queue depth, latency and step concurrency metrics"""
+        metrics = self.scheduler.get_metrics()
+        metrics["active_steps"] = self.limiter.get_stats()
+        return metrics
+    
+    async def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Get the recorded state of a workflow run"""
+        return await self.engine.checkpoints.get_run(run_id)
+    
+    async def get_step_stats(
+        self, workflow_id: Optional[str] = None, step_id: Optional[str] = None, days: float = 7
+    ) -> List[Dict[str, Any]]:
+        """Get latency percentiles, error rates, cache hits and tokens per workflow step"""
+        return await self.engine.history.step_stats(workflow_id, step_id, days)
+    
+    async def get_run_stats(self, workflow_id: Optional[str] = None, days: float = 7) -> List[Dict[str, Any]]:
+        """Get latency percentiles, failure rates and tokens of whole runs per workflow"""
+        return await self.engine.history.run_stats(workflow_id, days)
+    
+    async def get_recent_runs(self, workflow_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get the most recently finished workflow runs"""
+        return await self.engine.history.recent_runs(workflow_id, limit)
+    
+    def subscribe_run(self, run_id: str) -> Subscription:
+        """Subscribe to the live events of a workflow run"""
+        return self.events.subscribe(run_id)
+    
+    def unsubscribe_run(self, subscription: Subscription) -> None:
+        """Stop receiving the events of a workflow run"""
+        self.events.unsubscribe(subscription)
+    
+    async def resume_run(self, run_id: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Resume a failed or cancelled run from its first incomplete step, reusing checkpointed outputs"""
+        run = await self.get_run(run_id)
+        if not run:
+            raise ValueError(f"Workflow run with ID {run_id} not found")
+        if run["status"] not in RESUMABLE_STATUSES:
+            raise ValueError(f"Workflow run {run_id} is {run['status']} and can't be resumed")
+        if run_id in _resuming_runs:
+            raise ValueError(f"Workflow run {run_id} is already being resumed")
+        
+        _resuming_runs.add(run_id)
+        try:
+            return await self._execute_run(run_id, use_cache, run)
+        finally:
+            _resuming_runs.discard(run_id)
+    
+    async def _execute_run(
+        self, run_id: str, use_cache: bool = True, run: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Execute a recorded run, skipping steps with checkpointed outputs; used by the scheduler"""
+        run = run or await self.get_run(run_id)
+        if not run:
+            raise ValueError(f"Workflow run with ID {run_id} not found")
+        if run["status"] == "completed":
+            raise ValueError(f"Workflow run {run_id} has already completed")
         
-        # Simulate workflow execution steps
-        for node in workflow.nodes:
-            result["steps"].append({
-                "node_id": node.id,
-                "node_type": node.type,
-                "status": "completed",
-                "result": f"Processed {node.type} node"
-            })
+        plan = await self.get_plan(run["workflow_id"])
+        if not plan:
+            raise ValueError(f"Workflow with ID {run['workflow_id']} not found")
         
-        return result
+        return await self.engine.run(plan, run["input"], use_cache=use_cache, run_id=run_id)
     
-    async def validate_workflow(self, workflow_id: str) -> Dict[str, Any]:
-        """Validate a workflow structure"""
-        workflow = await self.get_workflow(workflow_id)
-        if not workflow:
-            return {"valid": False, "errors": ["Workflow not found"]}
+    def _resolve_step(self, step: Dict[str, Any]) -> StepHandle:
+        """Resolve the agent, model and plugin a step runs with"""
+        parameters = step.get("parameters", {})
+        return StepHandle(
+            agent=step.get("agent"),
+            model_type=parameters.get("model_type", settings.WORKFLOW_DEFAULT_MODEL_TYPE),
+            model=parameters.get("model", step.get("agent")),
+            plugin_id=step.get("tool")
+        )
+    
+    async def _run_step(self, step: Dict[str, Any], inputs: Dict[str, Any], handle: StepHandle) -> Dict[str, Any]:
+        """Run a single workflow step through the step's plugin or agent"""
+        parameters = step.get("parameters", {})
         
-        errors = []
+        if handle.plugin_id:
+            from plugins.plugin_manager import get_plugin_manager
+            plugin_manager = await get_plugin_manager()
+            result = await plugin_manager.execute_plugin(handle.plugin_id, {**step.get("params", {}), **inputs})
+            if result.get("success") is False:
+                raise RuntimeError(result.get("error", f"Plugin {handle.plugin_id} failed"))
+            return {name: result for name in step.get("outputs", [])}
         
-        # Check for empty workflow
-        if not workflow.nodes:
-            errors.append("Workflow has no nodes")
+        messages = [
+            {
+                "role": "system",
+                "content": f"You are the {step.get('agent')} agent. Perform the '{step.get('action')}' action."
+            },
+            {
+                "role": "user",
+                "content": json.dumps({"inputs": inputs, "parameters": parameters}, default=str)
+            }
+        ]
         
-        # Check for disconnected nodes
-        connected_nodes = set()
-        for node in workflow.nodes:
-            for connection in node.connections:
-                connected_nodes.add(connection)
+        response = await generate_response(handle.model_type, handle.model, messages)
         
-        all_node_ids = {node.id for node in workflow.nodes}
-        disconnected_nodes = all_node_ids - connected_nodes - {"start", "end"}  # Allow start/end to be disconnected
+        # The connector reports failures as text rather than raising
+        if response.startswith("Error"):
+            raise RuntimeError(response)
         
-        if disconnected_nodes:
-            errors.append(f"Disconnected nodes: {', '.join(disconnected_nodes)}")
+        # The connector doesn't stream, so progress arrives as a single update
+        report_progress(tokens=len(response.split()), text=response)
+        
+        # Every declared output receives the agent's response
+        return {name: response for name in step.get("outputs", [])}
+    
+    async def validate_workflow(self, workflow_id: str) -> Dict[str, Any]:
+        """Validate a workflow structure"""
+        plan = await self.get_plan(workflow_id)
+        if not plan:
+            return {"valid": False, "errors": ["Workflow not found"]}
         
         return {
-            "valid": len(errors) == 0,
-            "errors": errors,
-            "node_count": len(workflow.nodes),
-            "connection_count": sum(len(node.connections) for node in workflow.nodes)
-        }
\ No newline at end of file
+            "valid": plan.valid,
+            "errors": list(plan.errors),
+            "warnings": list(plan.warnings),
+            "step_count": len(plan.order),
+            "levels": [list(level) for level in plan.levels],
+            "required_inputs": sorted(plan.external_inputs)
+        }
@@ -0,0 +1,60 @@
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from backend.api.endpoints import plugins
+from backend.services import plugin_service
+from plugins.plugin_manager import PluginManager
+
+@pytest.fixture
+def manager():
+    """Create a plugin manager over the bundled plugins"""
+    manager = PluginManager()
+    manager.scan_plugins()
+    return manager
+
+@pytest.fixture
+def test_client(monkeypatch, manager):
+    """Create a test client for the plugin endpoints, with no plugin installed in the database"""
+    async def get_plugin_manager():
+        return manager
+
+    monkeypatch.setattr(plugin_service, "get_db", lambda: None)
+    monkeypatch.setattr(plugin_service, "get_plugin_manager", get_plugin_manager)
+    monkeypatch.setattr(plugin_service, "_loaded_plugins", {})
+    app = FastAPI()
+    app.include_router(plugins.router, prefix="/plugins")
+    return TestClient(app)
+
+def parse_events(body: str):
+    """Split a server-sent event stream into (event, data) pairs"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        name, data = block.split("\n")
+        events.append((name.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+def test_core_plugin_streams_without_activation(test_client):
+    """Test that the code executor streams its output through the endpoint"""
+    response = test_client.post(
+        "/plugins/code_executor/execute/stream",
+        json={"code": "echo one; echo two", "language": "shell"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    assert "".join(data["data"] for name, data in events if name == "output") == "one\ntwo\n"
+    name, data = events[-1]
+    assert name == "result" and data["result"]["success"]
+
+def test_core_plugin_executes_through_the_plugin_manager(test_client, manager):
+    """Test that a non-streamed core plugin call is run and recorded by the plugin manager"""
+    response = test_client.post(
+        "/plugins/code_executor/execute",
+        json={"code": "echo one", "language": "shell"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["result"]["output"] == "one\n"
+    assert manager.get_plugin_stats()["code_executor"]["calls"] == 1
@@ -0,0 +1,168 @@
+import json
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from backend.services.workflow_checkpoint import CheckpointStore
+from backend.services.workflow_engine import WorkflowEngine
+from backend.services.workflow_plan import compile_workflow
+
+REPO_ROOT = Path(__file__).parent.parent.parent.parent
+RESEARCH_WORKFLOW = REPO_ROOT / "workflow" / "research.json"
+
+# Runs the research workflow with checkpointing and hangs in report_generation
+WORKER_SCRIPT = """
+import asyncio, json, sys
+from backend.services.workflow_checkpoint import CheckpointStore
+from backend.services.workflow_engine import WorkflowEngine
+from backend.services.workflow_plan import compile_workflow
+
+db_path, calls_path, workflow_path = sys.argv[1:4]
+
+async def runner(step, inputs, handle):
+    with open(calls_path, "a") as f:
+        f.write(step["id"] + "\\n")
+    if step["id"] == "report_generation":
+        await asyncio.sleep(60)
+    return {name: step["id"] + ":" + name for name in step["outputs"]}
+
+async def main():
+    with open(workflow_path) as f:
+        plan = compile_workflow(json.load(f)["steps"], workflow_id="research")
+    store = CheckpointStore(db_path)
+    await store.create_run("crash-run", "research", {"query": "solar power"})
+    await WorkflowEngine(runner, checkpoints=store).run(plan, {"query": "solar power"}, run_id="crash-run")
+
+asyncio.run(main())
+"""
+
+def load_plan():
+    with open(RESEARCH_WORKFLOW) as f:
+        return compile_workflow(json.load(f)["steps"], workflow_id="research")
+
+def run_worker_until(tmp_path, step_id):
+    """Start a worker process and SIGKILL it once it reaches the given step"""
+    db_path = tmp_path / "runs.db"
+    calls_path = tmp_path / "calls.log"
+    calls_path.touch()
+
+    worker = subprocess.Popen(
+        [sys.executable, "-c", WORKER_SCRIPT, str(db_path), str(calls_path), str(RESEARCH_WORKFLOW)],
+        cwd=REPO_ROOT
+    )
+    try:
+        deadline = time.time() + 30
+        while step_id not in calls_path.read_text().split():
+            assert worker.poll() is None, "Worker exited before reaching the step"
+            assert time.time() < deadline, "Worker did not reach the step in time"
+            time.sleep(0.05)
+    finally:
+        worker.send_signal(signal.SIGKILL)
+        worker.wait()
+
+    return db_path, calls_path.read_text().split()
+
+@pytest.mark.asyncio
+async def test_resume_after_worker_crash_skips_completed_steps(tmp_path):
+    """Test that resuming a killed run only executes the incomplete steps"""
+    db_path, crashed_calls = run_worker_until(tmp_path, "report_generation")
+    assert crashed_calls == ["topic_analysis", "information_gathering", "data_analysis", "report_generation"]
+
+    store = CheckpointStore(str(db_path))
+    run = await store.get_run("crash-run")
+    assert run["status"] == "running"
+    assert run["completed_steps"] == ["topic_analysis", "information_gathering", "data_analysis"]
+
+    resumed_calls = []
+
+    async def runner(step, inputs, handle):
+        resumed_calls.append(step["id"])
+        return {name: f"{step['id']}:{name}" for name in step["outputs"]}
+
+    result = await WorkflowEngine(runner, checkpoints=store).run(
+        load_plan(), run["input"], run_id="crash-run"
+    )
+
+    assert resumed_calls == ["report_generation", "archival"]
+    assert result["status"] == "completed"
+    assert [step.get("restored", False) for step in result["steps"]] == [True, True, True, False, False]
+    assert (await store.get_run("crash-run"))["status"] == "completed"
+    store.close()
+
+@pytest.mark.asyncio
+async def test_resume_reruns_edited_steps(tmp_path):
+    """Test that checkpoints are not reused for steps whose definition changed"""
+    store = CheckpointStore(str(tmp_path / "runs.db"))
+    await store.create_run("run-1", "research", {"query": "q"})
+    calls = []
+
+    async def runner(step, inputs, handle):
+        calls.append(step["id"])
+        return {name: f"{step['id']}:{name}" for name in step["outputs"]}
+
+    engine = WorkflowEngine(runner, checkpoints=store)
+    await engine.run(load_plan(), {"query": "q"}, run_id="run-1")
+
+    with open(RESEARCH_WORKFLOW) as f:
+        steps = json.load(f)["steps"]
+    steps[2]["parameters"]["analysis_type"] = "quick"
+    calls.clear()
+    await engine.run(compile_workflow(steps), {"query": "q"}, run_id="run-1")
+
+    assert calls == ["data_analysis", "report_generation", "archival"]
+    store.close()
+
+@pytest.mark.asyncio
+async def test_flush_writes_only_its_own_run_and_keeps_failed_rows(tmp_path, monkeypatch):
+    """Test that runs flush separate buffers and a failed write is retried by the next flush"""
+    store = CheckpointStore(str(tmp_path / "runs.db"))
+    for run_id in ("run-1", "run-2"):
+        await store.create_run(run_id, "research", {})
+    store.record_step("run-1", {"id": "a"}, {"x": 1})
+    store.record_step("run-2", {"id": "b"}, {"y": 2})
+
+    await store.flush("run-1")
+    assert (await store.get_run("run-1"))["completed_steps"] == ["a"]
+    assert (await store.get_run("run-2"))["completed_steps"] == []
+
+    write_checkpoints = store._write_checkpoints
+
+    def fail_once(rows):
+        monkeypatch.setattr(store, "_write_checkpoints", write_checkpoints)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "_write_checkpoints", fail_once)
+    with pytest.raises(OSError):
+        await store.flush("run-2")
+    store.record_step("run-2", {"id": "c"}, {"z": 3})
+    await store.flush("run-2")
+
+    assert (await store.get_run("run-2"))["completed_steps"] == ["b", "c"]
+    assert (await store.load_checkpoints("run-2"))["b"]["outputs"] == {"y": 2}
+    store.close()
+
+@pytest.mark.asyncio
+async def test_steps_with_non_json_outputs_are_not_checkpointed(tmp_path):
+    """Test that a step whose outputs can't be stored as JSON runs again on resume"""
+    store = CheckpointStore(str(tmp_path / "runs.db"))
+    await store.create_run("run-1", "research", {"query": "q"})
+    calls = []
+
+    async def runner(step, inputs, handle):
+        calls.append(step["id"])
+        if step["id"] == "information_gathering":
+            return {name: {"sources": {"a", "b"}} for name in step["outputs"]}
+        return {name: f"{step['id']}:{name}" for name in step["outputs"]}
+
+    engine = WorkflowEngine(runner, checkpoints=store)
+    await engine.run(load_plan(), {"query": "q"}, run_id="run-1")
+    assert "information_gathering" not in (await store.get_run("run-1"))["completed_steps"]
+
+    calls.clear()
+    await engine.run(load_plan(), {"query": "q"}, run_id="run-1")
+
+    assert calls == ["information_gathering", "data_analysis", "report_generation", "archival"]
+    store.close()
@@ -0,0 +1,244 @@
+import asyncio
+import errno
+import subprocess
+import sys
+import time
+import pytest
+from plugins.core_plugins.code_executor import CodeExecutor
+from plugins.python_sandbox import WORKER_SCRIPT, PythonSandboxPool
+
+@pytest.mark.asyncio
+async def test_long_script_does_not_block_other_requests():
+    """Test that the event loop keeps serving while a shell script runs"""
+    executor = CodeExecutor({"timeout": 5})
+    latencies = []
+
+    async def other_requests():
+        for _ in range(20):
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            latencies.append(time.perf_counter() - start)
+
+    result, _ = await asyncio.gather(
+        executor.execute({"code": "sleep 0.5; echo done", "language": "shell"}),
+        other_requests()
+    )
+
+    assert result["success"]
+    assert result["output"] == "done\n"
+    assert len(latencies) == 20
+    assert max(latencies) < 0.1
+
+@pytest.mark.asyncio
+async def test_output_is_capped_while_reading():
+    """Test that output beyond max_output_length is discarded as it streams in"""
+    executor = CodeExecutor({"max_output_length": 100})
+
+    result = await executor.execute({"code": "seq 1 200000", "language": "shell"})
+
+    assert result["success"]
+    assert result["output"].endswith("... [output truncated]")
+    assert len(result["output"]) == 100 + len("... [output truncated]")
+
+@pytest.mark.asyncio
+async def test_multibyte_characters_split_across_reads_are_kept():
+    """Test that a UTF-8 character spanning two pipe reads is decoded intact"""
+    executor = CodeExecutor()
+
+    result = await executor.execute({"code": "printf 'a'; printf '\\303'; sleep 0.2; printf '\\251\\n'", "language": "shell"})
+
+    assert result["success"]
+    assert result["output"] == "aé\n"
+
+@pytest.mark.asyncio
+async def test_timeout_kills_script_and_its_children():
+    """Test that a timed out script's whole process group is killed promptly"""
+    executor = CodeExecutor({"timeout": 0.3, "sandboxed": False})
+
+    start = time.perf_counter()
+    result = await executor.execute({"code": "sh -c 'sleep 10'; sleep 10", "language": "shell"})
+
+    assert result["error"] == "Execution timed out"
+    assert time.perf_counter() - start < 2
+
+@pytest.mark.asyncio
+async def test_concurrent_scripts_are_limited():
+    """Test that no more than max_concurrent scripts run at once"""
+    executor = CodeExecutor({"max_concurrent": 2})
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        executor.execute({"code": "sleep 0.2", "language": "shell"}) for _ in range(4)
+    ))
+
+    assert all(result["success"] for result in results)
+    assert time.perf_counter() - start >= 0.4
+
+@pytest.mark.asyncio
+async def test_python_runs_in_sandbox_workers_with_separate_output():
+    """Test that concurrent Python snippets run in sandbox workers without mixing output"""
+    executor = CodeExecutor({"sandbox_workers": 2})
+    await executor.initialize()
+
+    try:
+        results = await asyncio.gather(*(
+            executor.execute({"code": f"for i in range(3):\n    print({n}, i)", "language": "python"})
+            for n in range(6)
+        ))
+
+        for n, result in enumerate(results):
+            assert result["success"]
+            assert result["output"] == "".join(f"{n} {i}\n" for i in range(3))
+        metrics = executor.get_sandbox_metrics()
+        assert metrics["executions"] == 6 and metrics["recycled"] == 6
+        assert metrics["queue_wait"]["p95"] > 0
+    finally:
+        await executor.cleanup()
+
+@pytest.mark.asyncio
+async def test_python_workers_are_reused_and_limits_recycle_them():
+    """Test that workers serve sandbox_max_tasks snippets and are replaced after a runaway one"""
+    executor = CodeExecutor({"sandbox_workers": 1, "sandbox_max_tasks": 10, "timeout": 1})
+    await executor.initialize()
+
+    try:
+        assert (await executor.execute({"code": "x = 1", "language": "python"}))["success"]
+        leaked = await executor.execute({"code": "print(x)", "language": "python"})
+        assert not leaked["success"] and "not defined" in leaked["error"]
+        assert executor.get_sandbox_metrics()["recycled"] == 0
+
+        start = time.perf_counter()
+        looped = await executor.execute({"code": "while True:\n    pass", "language": "python"})
+        assert not looped["success"]
+        assert time.perf_counter() - start < 3
+
+        result = await executor.execute({"code": "print('ok')", "language": "python"})
+        assert result["output"] == "ok\n"
+        assert executor.get_sandbox_metrics()["recycled"] == 1
+    finally:
+        await executor.cleanup()
+
+@pytest.mark.asyncio
+async def test_streamed_output_arrives_before_the_script_finishes():
+    """Test that output events are flushed while the script runs, coalesced per interval"""
+    executor = CodeExecutor({"stream_flush_interval": 0.05})
+
+    start = time.perf_counter()
+    events = []
+    async for event in executor.stream({"code": "seq 1 100; sleep 0.5; echo done", "language": "shell"}):
+        events.append((time.perf_counter() - start, event))
+
+    output = [event for _, event in events if event["type"] == "output"]
+    assert "".join(event["data"] for event in output) == "".join(f"{i}\n" for i in range(1, 101)) + "done\n"
+    assert len(output) == 2
+    assert events[0][0] < 0.3
+    assert events[-1][1] == {"type": "result", "result": {
+        "success": True, "language": "shell", "return_code": 0, "output_bytes": 297, "truncated": False
+    }}
+
+@pytest.mark.asyncio
+async def test_stream_byte_cap_stops_the_script():
+    """Test that a script producing endless output is killed at max_stream_bytes"""
+    executor = CodeExecutor({"max_stream_bytes": 10000, "timeout": 10})
+
+    start = time.perf_counter()
+    events = [event async for event in executor.stream({"code": "yes", "language": "shell"})]
+
+    result = events[-1]["result"]
+    assert not result["success"] and result["truncated"]
+    assert result["output_bytes"] == 10000
+    assert sum(len(event["data"]) for event in events[:-1]) == 10000
+    assert time.perf_counter() - start < 2
+
+@pytest.mark.asyncio
+async def test_python_output_is_streamed_from_the_sandbox():
+    """Test that Python snippets stream printed output and end with a result event"""
+    executor = CodeExecutor({"sandbox_workers": 1, "stream_flush_interval": 0})
+    await executor.initialize()
+
+    try:
+        events = [event async for event in executor.stream({
+            "code": "for i in range(3):\n    print(i)", "language": "python"
+        })]
+
+        assert [event["data"] for event in events[:-1]] == ["0", "\n", "1", "\n", "2", "\n"]
+        assert events[-1] == {"type": "result", "result": {"success": True, "truncated": False, "language": "python"}}
+    finally:
+        await executor.cleanup()
+
+@pytest.mark.asyncio
+async def test_python_stream_cap_stops_the_snippet():
+    """Test that a snippet printing endlessly is stopped at max_stream_bytes rather than timing out"""
+    executor = CodeExecutor({"sandbox_workers": 1, "max_stream_bytes": 100, "timeout": 5})
+    await executor.initialize()
+
+    try:
+        start = time.perf_counter()
+        events = [event async for event in executor.stream({"code": "while True:\n    print('x')", "language": "python"})]
+
+        result = events[-1]["result"]
+        assert result["error"] == "Output limit of 100 characters exceeded"
+        assert result["truncated"]
+        output = "".join(event["data"] for event in events[:-1]) + result.get("output", "")
+        assert output == "x\n" * 50
+        assert time.perf_counter() - start < 2
+    finally:
+        await executor.cleanup()
+
+def test_pattern_scan_reports_every_pattern_in_listed_order():
+    """Test that the combined matcher finds the same patterns as checking each one"""
+    executor = CodeExecutor()
+    code = "x = getattr(a, 'b')\nimport subprocess\nformat = 1; model = 2"
+
+    violations = executor._check_code_security(code, "javascript")["violations"]
+
+    assert violations == [
+        "Contains dangerous pattern: import subprocess",
+        "Contains dangerous pattern: getattr",
+        "Contains dangerous pattern: del ",
+        "Contains dangerous pattern: format "
+    ]
+    assert executor._check_shell_command("echo hi; SHUTDOWN now")["error"] == "Blocked command: shutdown"
+    assert executor._check_code_security("echo ok", "shell") == {"allowed": True}
+
+@pytest.mark.asyncio
+async def test_resubmitted_snippets_are_checked_and_compiled_once():
+    """Test that security verdicts and compiled code are cached by snippet content"""
+    executor = CodeExecutor({"sandbox_workers": 1})
+    await executor.initialize()
+
+    try:
+        for _ in range(3):
+            result = await executor.execute({"code": "print(6 * 7)", "language": "python"})
+            assert result["output"] == "42\n"
+        rejected = [await executor.execute({"code": "eval('1')", "language": "python"}) for _ in range(2)]
+
+        assert executor.get_cache_stats() == {"entries": 2, "hits": 6, "misses": 2, "hit_rate": 0.75}
+        assert rejected[0] == rejected[1] and not rejected[0]["success"]
+        assert executor._analyze("print(6 * 7)", "python")["bytecode"] is not None
+    finally:
+        await executor.cleanup()
+
+@pytest.mark.asyncio
+async def test_sandbox_workers_cannot_open_files_or_sockets():
+    """Test that a snippet escaping the restricted builtins still gets EMFILE for new descriptors"""
+    pool = PythonSandboxPool(size=1)
+    await pool.start()
+    escape = "os = [c for c in ().__class__.__base__.__subclasses__() if c.__name__ == '_wrap_close'][0].__init__.__globals__\n"
+
+    try:
+        for attempt in ("os['open']('/etc/hostname', os['O_RDONLY'])", "os['pipe']()"):
+            result = await pool.execute(escape + attempt)
+            assert not result["success"]
+            assert "[Errno 24]" in result["error"]
+    finally:
+        await pool.close()
+
+    # The worker can't import socket once limited, so check a socket against the same limits
+    check = (
+        "import errno, socket, sys; sys.path.insert(0, sys.argv[1]); import sandbox_worker\n"
+        "sandbox_worker.apply_limits({})\n"
+        "try:\n    socket.socket()\nexcept OSError as e:\n    sys.exit(e.errno)\n"
+    )
+    child = subprocess.run([sys.executable, "-I", "-S", "-c", check, str(WORKER_SCRIPT.parent)])
+    assert child.returncode == errno.EMFILE
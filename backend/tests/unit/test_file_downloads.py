@@ -0,0 +1,128 @@
+import asyncio
+import gzip
+import os
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+from backend.api.endpoints import files
+from backend.core.config import settings
+from backend.utils import file_responses
+from backend.utils.file_responses import DownloadResponse, parse_range
+
+CONTENT = bytes(range(256)) * 40
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_PATH", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "DOWNLOAD_ACCEL_REDIRECT", "")
+    (tmp_path / "uploads" / "docs").mkdir(parents=True)
+    (tmp_path / "uploads" / "docs" / "data.bin").write_bytes(CONTENT)
+    (tmp_path / "secret.txt").write_text("outside the uploads")
+    app = FastAPI()
+    app.include_router(files.router, prefix="/files")
+    return TestClient(app)
+
+def test_ranges_are_parsed_and_clamped():
+    """Test single, open-ended and suffix ranges, and which ones are ignored or unsatisfiable"""
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=-500", 100) == (0, 99)
+    for ignored in ["bytes=0-1,5-6", "items=0-5", "bytes=9-2", "bytes=a-b", "bytes=-"]:
+        assert parse_range(ignored, 100) is None
+    for unsatisfiable in ["bytes=100-", "bytes=-0"]:
+        with pytest.raises(ValueError):
+            parse_range(unsatisfiable, 100)
+
+def test_downloads_support_ranges_and_validators(client):
+    """Test full, partial, unsatisfiable, conditional and HEAD downloads"""
+    response = client.get("/files/download/docs/data.bin")
+    assert response.status_code == 200 and response.content == CONTENT
+    assert response.headers["accept-ranges"] == "bytes"
+    etag, last_modified = response.headers["etag"], response.headers["last-modified"]
+
+    response = client.get("/files/download/docs/data.bin", headers={"Range": "bytes=100-355"})
+    assert response.status_code == 206 and response.content == CONTENT[100:356]
+    assert response.headers["content-range"] == f"bytes 100-355/{len(CONTENT)}"
+
+    response = client.get("/files/download/docs/data.bin", headers={"Range": "bytes=-16"})
+    assert response.content == CONTENT[-16:]
+
+    response = client.get("/files/download/docs/data.bin", headers={"Range": f"bytes={len(CONTENT)}-"})
+    assert response.status_code == 416 and response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+    for headers in ({"If-None-Match": f'"other", {etag}'}, {"If-Modified-Since": last_modified}):
+        response = client.get("/files/download/docs/data.bin", headers=headers)
+        assert response.status_code == 304 and response.content == b""
+        assert response.headers["etag"] == etag
+
+    # A resumed download of an older copy gets the whole current file
+    response = client.get("/files/download/docs/data.bin", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200 and response.content == CONTENT
+    response = client.get("/files/download/docs/data.bin", headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert response.status_code == 206
+
+    response = client.head("/files/download/docs/data.bin")
+    assert response.status_code == 200 and response.content == b""
+    assert response.headers["content-length"] == str(len(CONTENT))
+
+    for missing in ["docs/nope.bin", "docs/..%2F..%2Fsecret.txt", "docs"]:
+        assert client.get(f"/files/download/{missing}").status_code == 404
+
+def test_precompressed_variants_are_served_when_accepted_and_current(client, tmp_path):
+    """Test that a fresh .gz copy is sent to clients accepting gzip, with its own ETag"""
+    original = tmp_path / "uploads" / "docs" / "data.bin"
+    variant = tmp_path / "uploads" / "docs" / "data.bin.gz"
+    variant.write_bytes(gzip.compress(CONTENT))
+
+    plain = client.get("/files/download/docs/data.bin", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    response = client.get("/files/download/docs/data.bin", headers={"Accept-Encoding": "br;q=0, gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == CONTENT
+    assert response.headers["etag"] != plain.headers["etag"]
+    assert response.headers["vary"] == "Accept-Encoding"
+
+    # A copy older than the file is stale and ignored
+    stat = original.stat()
+    os.utime(variant, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10 ** 9))
+    response = client.get("/files/download/docs/data.bin", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+def test_downloads_are_handed_to_the_proxy_or_the_zero_copy_extension(client, tmp_path, monkeypatch):
+    """Test X-Accel-Redirect responses and use of the ASGI zero-copy send extension"""
+    monkeypatch.setattr(settings, "DOWNLOAD_ACCEL_REDIRECT", "/protected-uploads/")
+    response = client.get("/files/download/docs/data.bin")
+    assert response.headers["x-accel-redirect"] == "/protected-uploads/docs/data.bin"
+    assert response.content == b""
+
+    messages = []
+
+    async def send(message):
+        if message["type"] == "http.response.zerocopysend":
+            message = dict(message, data=os.pread(message["file"].fileno(), message["count"], message["offset"]))
+        messages.append(message)
+
+    scope = {"type": "http", "extensions": {"http.response.zerocopysend": {}}}
+    headers = Headers({"range": "bytes=10-19"})
+    asyncio.run(DownloadResponse(tmp_path / "uploads" / "docs" / "data.bin", headers)(scope, None, send))
+    assert messages[0]["status"] == 206
+    assert messages[1]["type"] == "http.response.zerocopysend" and messages[1]["data"] == CONTENT[10:20]
+
+def test_ranges_are_read_without_pread(client, tmp_path, monkeypatch):
+    """Test that chunked reads fall back to seek and read where os.pread doesn't exist"""
+    monkeypatch.delattr(file_responses.os, "pread")
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    headers = Headers({"range": "bytes=50-1049"})
+    response = DownloadResponse(tmp_path / "uploads" / "docs" / "data.bin", headers, chunk_size=300)
+    asyncio.run(response({"type": "http"}, None, send))
+    assert messages[0]["status"] == 206
+    assert [len(message["body"]) for message in messages[1:]] == [300, 300, 300, 100]
+    assert b"".join(message["body"] for message in messages[1:]) == CONTENT[50:1050]
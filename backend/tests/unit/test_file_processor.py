@@ -0,0 +1,302 @@
+import json
+import os
+import shutil
+import pytest
+from plugins.core_plugins.file_processor import FileProcessor
+from plugins.file_streams import count_text, iter_json_array
+from plugins.text_index import FullTextIndex, build_match_expression
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1024])
+def test_counts_match_whole_file_counts_across_chunk_boundaries(tmp_path, chunk_size):
+    """Test that streamed line, word and character counts equal those of the whole text"""
+    path = tmp_path / "notes.txt"
+    content = "alpha beta\n  gammaé delta\r\n\nlast line without newline"
+    path.write_text(content, encoding="utf-8", newline="")
+    text = path.read_text(encoding="utf-8")
+
+    assert count_text(str(path), chunk_size) == {
+        "line_count": len(text.splitlines()),
+        "word_count": len(text.split()),
+        "character_count": len(text)
+    }
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 4096])
+def test_json_array_items_are_streamed_one_at_a_time(tmp_path, chunk_size):
+    """Test that array items split across chunks, including numbers, decode exactly"""
+    items = [1, -35000000000.0, 1e-07, "a \"quoted\", ]", {"nested": [1, {"b": None}]}, [], True, None]
+    path = tmp_path / "items.json"
+    path.write_text(json.dumps(items * 20, indent=2))
+
+    assert list(iter_json_array(str(path), chunk_size)) == items * 20
+
+    for malformed in ["[1, 2", "[1 2]", "{\"a\": 1}"]:
+        path.write_text(malformed)
+        with pytest.raises(ValueError):
+            list(iter_json_array(str(path), chunk_size))
+
+@pytest.mark.asyncio
+async def test_large_files_are_read_in_pages_and_chunks(tmp_path):
+    """Test CSV and JSON pagination and streamed reads of files over max_read_bytes"""
+    processor = FileProcessor({
+        "base_path": str(tmp_path),
+        "max_read_bytes": 100,
+        "chunk_size": 64,
+        "search_index_path": str(tmp_path / "search.db")
+    })
+    (tmp_path / "rows.csv").write_text("id,name\n" + "".join(f"{i},row {i}\n" for i in range(50)))
+    (tmp_path / "items.json").write_text(json.dumps([{"id": i} for i in range(50)]))
+
+    rejected = await processor.execute({"operation": "read", "filename": "rows.csv"})
+    assert not rejected["success"] and "too large" in rejected["error"]
+
+    page = await processor.execute({"operation": "read_rows", "filename": "rows.csv", "offset": 45, "limit": 10})
+    assert page["columns"] == ["id", "name"]
+    assert [row["id"] for row in page["rows"]] == ["45", "46", "47", "48", "49"]
+    assert page["next_offset"] is None
+
+    page = await processor.execute({"operation": "read_items", "filename": "items.json", "offset": 10, "limit": 5})
+    assert page["items"] == [{"id": i} for i in range(10, 15)] and page["next_offset"] == 15
+
+    counts = await processor.execute({"operation": "process", "process_type": "word_count", "filename": "rows.csv"})
+    assert (counts["line_count"], counts["word_count"]) == (51, 101)
+
+    events = [event async for event in processor.stream({"operation": "read", "filename": "rows.csv"})]
+    chunks = [event["data"] for event in events if event["type"] == "chunk"]
+    assert all(len(chunk) <= 64 for chunk in chunks)
+    assert "".join(chunks) == (tmp_path / "rows.csv").read_text()
+    assert events[-1]["result"]["success"]
+
+@pytest.mark.asyncio
+async def test_line_and_byte_ranges_use_a_persisted_line_index(tmp_path):
+    """Test range reads, index reuse across instances and rebuilds after the file changes"""
+    config = {
+        "base_path": str(tmp_path / "files"),
+        "index_path": str(tmp_path / "index"),
+        "search_index_path": str(tmp_path / "search.db")
+    }
+    processor = FileProcessor(config)
+    log = tmp_path / "files" / "app.txt"
+    log.write_text("".join(f"line {i}\r\n" for i in range(1, 5001)))
+
+    result = await processor.execute({"operation": "read_range", "filename": "app.txt", "start_line": 4999, "end_line": 5005})
+    assert result["lines"] == ["line 4999", "line 5000"]
+    assert (result["end_line"], result["total_lines"]) == (5000, 5000)
+
+    result = await processor.execute({"operation": "read_range", "filename": "app.txt", "start_byte": 6, "end_byte": 14})
+    assert result["content"] == "\r\nline 2"
+
+    # A new instance loads the persisted index instead of scanning the file
+    reopened = FileProcessor(config)
+    result = await reopened.execute({"operation": "read_range", "filename": "app.txt", "start_line": 1025})
+    assert result["lines"] == ["line 1025"]
+    assert reopened.line_indexes.builds == 0
+
+    with open(log, "a") as f:
+        f.write("appended\n")
+    os.utime(log, ns=(log.stat().st_atime_ns, log.stat().st_mtime_ns + 1))
+    result = await reopened.execute({"operation": "read_range", "filename": "app.txt", "start_line": 5001})
+    assert result["lines"] == ["appended"]
+    assert reopened.line_indexes.builds == 1
+
+
+def test_search_queries_cannot_inject_fts_syntax():
+    """Test that keywords, phrases and prefixes become quoted FTS5 terms"""
+    assert build_match_expression('error "disk full" time*') == '"disk full" AND "error" AND "time"*'
+    assert build_match_expression('a) OR NEAR(b') == '"a" AND "OR" AND "NEAR" AND "b"'
+    assert build_match_expression('"" -- *') == ""
+
+@pytest.mark.asyncio
+async def test_search_finds_lines_and_follows_writes_and_deletes(tmp_path):
+    """Test search hits, incremental reindexing on write and delete, and startup sync"""
+    config = {"base_path": str(tmp_path / "files"), "search_index_path": str(tmp_path / "search.db")}
+    processor = FileProcessor(config)
+    (tmp_path / "files" / "old.md").write_text("written before the plugin started\n")
+    await processor.initialize()
+
+    await processor.execute({"operation": "write", "filename": "logs/app.txt", "content": "boot ok\nDisk FULL on /var\n"})
+    await processor.execute({"operation": "write", "filename": "notes.json", "content": '{"status": "disk is full"}'})
+    assert processor.text_index.wait(5)
+
+    result = await processor.execute({"operation": "search", "query": "disk full"})
+    assert sorted((hit["filename"], hit["line"]) for hit in result["results"]) == [
+        (os.path.join("logs", "app.txt"), 2), ("notes.json", 1)
+    ]
+    result = await processor.execute({"operation": "search", "query": '"disk full"'})
+    assert [hit["filename"] for hit in result["results"]] == [os.path.join("logs", "app.txt")]
+    result = await processor.execute({"operation": "search", "query": "plug*"})
+    assert [hit["filename"] for hit in result["results"]] == ["old.md"]
+
+    await processor.execute({"operation": "write", "filename": "notes.json", "content": '{"status": "ok"}'})
+    await processor.execute({"operation": "delete", "filename": "logs/app.txt"})
+    assert processor.text_index.wait(5)
+    result = await processor.execute({"operation": "search", "query": "disk"})
+    assert result["count"] == 0
+    assert processor.text_index.get_stats()["files"] == 2
+
+    # A second index over the same database only rescans what changed
+    (tmp_path / "files" / "old.md").unlink()
+    reopened = FullTextIndex(str(tmp_path / "search.db"))
+    reopened.add_root(processor.index_root, str(tmp_path / "files"))
+    reopened.sync()
+    assert reopened.wait(5)
+    assert (reopened.indexed, reopened.removed) == (0, 1)
+    assert reopened.search("ok")[0]["path"] == "notes.json"
+    reopened.close()
+
+@pytest.mark.asyncio
+async def test_processors_sharing_an_index_search_only_their_own_files(tmp_path):
+    """Test that processors with different base paths keep separate roots in one index"""
+    processors = [
+        FileProcessor({"base_path": str(tmp_path / name), "search_index_path": str(tmp_path / "search.db")})
+        for name in ("first", "second")
+    ]
+    for processor in processors:
+        await processor.initialize()
+        await processor.execute({"operation": "write", "filename": "notes.txt", "content": f"shared {processor.base_path}\n"})
+    assert processors[0].text_index is processors[1].text_index
+    assert processors[0].text_index.wait(5)
+
+    for processor in processors:
+        result = await processor.execute({"operation": "search", "query": "shared"})
+        assert [hit["text"] for hit in result["results"]] == [f"shared {processor.base_path}"]
+
+def test_group_by_is_exact_for_many_keys_and_large_integers():
+    """Test grouping on keys whose combined cardinality overflows int64, and exact integer sums"""
+    np = pytest.importorskip("numpy")
+    from collections import OrderedDict
+    from plugins.columnar import ColumnarTable
+
+    rows = 4000
+    columns = OrderedDict((f"k{i}", np.arange(rows) % 1000 + i * 1000) for i in range(8))
+    columns["n"] = np.full(rows, 2 ** 60 + 1, dtype=np.int64)
+    table = ColumnarTable(columns)
+
+    groups = table.group_by([f"k{i}" for i in range(8)], {"n": ["sum", "min", "count"]})
+
+    assert len(groups) == 1000
+    assert groups[0] == {
+        **{f"k{i}": i * 1000 for i in range(8)}, "n_sum": 4 * (2 ** 60 + 1), "n_min": 2 ** 60 + 1, "n_count": 4
+    }
+
+def test_scheduled_directories_are_expanded_by_the_indexer(tmp_path):
+    """Test that scheduling a new or deleted directory indexes or drops just the files under it"""
+    index = FullTextIndex(str(tmp_path / "search.db"))
+    index.add_root("docs", str(tmp_path / "docs"))
+    for name in ("reports/a.txt", "reports/2024/b.md", "reports-old/c.txt", "d.txt"):
+        (tmp_path / "docs" / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / "docs" / name).write_text(f"quarterly {name}\n")
+
+    assert index.schedule(str(tmp_path / "docs" / "reports"))
+    assert index.wait(5)
+    assert sorted(hit["path"] for hit in index.search("quarterly")) == [
+        os.path.join("reports", "2024", "b.md"), os.path.join("reports", "a.txt")
+    ]
+
+    index.sync()
+    assert index.wait(5)
+    shutil.rmtree(tmp_path / "docs" / "reports")
+    index.schedule(str(tmp_path / "docs" / "reports"))
+    assert index.wait(5)
+    assert sorted(hit["path"] for hit in index.search("quarterly")) == [
+        "d.txt", os.path.join("reports-old", "c.txt")
+    ]
+    assert index.removed == 2
+    index.close()
+
+def test_scheduled_files_are_reread_even_with_unchanged_mtime_and_size(tmp_path):
+    """Test that schedule() bypasses the mtime and size check that sync() relies on"""
+    index = FullTextIndex(str(tmp_path / "search.db"))
+    index.add_root("docs", str(tmp_path / "docs"))
+    path = tmp_path / "docs" / "a.txt"
+    path.parent.mkdir()
+    path.write_text("alpha\n")
+    index.schedule(str(path))
+    assert index.wait(5)
+
+    # Same size, restored mtime: only an explicit schedule can notice
+    stat = path.stat()
+    path.write_text("omega\n")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    index.sync()
+    assert index.wait(5)
+    assert [hit["text"] for hit in index.search("alpha")] == ["alpha"]
+
+    index.schedule(str(path))
+    assert index.wait(5)
+    assert index.search("alpha") == []
+    assert [hit["text"] for hit in index.search("omega")] == ["omega"]
+    index.close()
+
+@pytest.mark.asyncio
+async def test_datasets_are_queried_from_cached_typed_columns(tmp_path):
+    """Test filter, projection, group-by and describe, and reuse of the converted table"""
+    pytest.importorskip("numpy")
+    config = {
+        "base_path": str(tmp_path / "files"),
+        "columnar_cache_path": str(tmp_path / "columns"),
+        "search_index_path": str(tmp_path / "search.db")
+    }
+    processor = FileProcessor(config)
+    (tmp_path / "files" / "sales.csv").write_text(
+        "region,product,units,price\n"
+        "north,apple,3,1.5\nsouth,apple,5,\nnorth,pear,2,2.0\nnorth,apple,4,1.0\neast,\"fig, dried\",1,4.0\n"
+    )
+    (tmp_path / "files" / "events.json").write_text(json.dumps([
+        {"kind": "click", "ms": 12, "ok": True},
+        {"kind": "view", "ms": 30, "ok": False, "extra": {"a": 1}},
+        {"kind": "click", "ok": True}
+    ]))
+
+    result = await processor.execute({
+        "operation": "query", "filename": "sales.csv",
+        "where": [{"column": "units", "op": ">=", "value": 3}],
+        "columns": ["region", "units"], "sort_by": "units", "descending": True
+    })
+    assert result["rows"] == [{"region": "south", "units": 5}, {"region": "north", "units": 4}, {"region": "north", "units": 3}]
+    assert result["total"] == 3 and result["next_offset"] is None
+
+    result = await processor.execute({
+        "operation": "query", "filename": "sales.csv",
+        "group_by": ["region", "product"], "aggregate": {"units": ["sum", "count"], "price": ["mean", "max"]}
+    })
+    groups = {(group["region"], group["product"]): group for group in result["groups"]}
+    assert groups[("north", "apple")] == {
+        "region": "north", "product": "apple", "units_sum": 7, "units_count": 2, "price_mean": 1.25, "price_max": 1.5
+    }
+    assert groups[("south", "apple")]["price_mean"] is None
+    assert groups[("east", "fig, dried")]["units_sum"] == 1
+
+    result = await processor.execute({"operation": "describe", "filename": "events.json"})
+    assert result["schema"] == {"kind": "str", "ms": "float", "ok": "bool", "extra": "str"}
+    assert result["summary"]["ms"]["count"] == 2 and result["summary"]["ms"]["mean"] == 21.0
+    assert result["summary"]["kind"] == {"count": 3, "unique": 2, "top": "click", "freq": 2}
+
+    # Later queries, even from a new instance, load the persisted columns
+    reopened = FileProcessor(config)
+    result = await reopened.execute({
+        "operation": "query", "filename": "events.json",
+        "where": [{"column": "kind", "op": "in", "value": ["view"]}]
+    })
+    assert result["rows"] == [{"kind": "view", "ms": 30.0, "ok": False, "extra": "{\"a\": 1}"}]
+    assert reopened.datasets.builds == 0
+
+    result = await reopened.execute({"operation": "query", "filename": "sales.csv", "where": [{"column": "nope"}]})
+    assert not result["success"] and "Unknown column" in result["error"]
+
+@pytest.mark.asyncio
+async def test_dataset_query_pages_are_capped(tmp_path):
+    """Test that a query returns at most max_query_rows rows or groups however large its limit"""
+    pytest.importorskip("numpy")
+    processor = FileProcessor({
+        "base_path": str(tmp_path / "files"),
+        "columnar_cache_path": str(tmp_path / "columns"),
+        "search_index_path": str(tmp_path / "search.db"),
+        "max_query_rows": 10
+    })
+    (tmp_path / "files" / "numbers.csv").write_text("n\n" + "".join(f"{i}\n" for i in range(50)))
+
+    result = await processor.execute({"operation": "query", "filename": "numbers.csv", "limit": 10 ** 9})
+    assert len(result["rows"]) == 10 and result["next_offset"] == 10
+
+    result = await processor.execute({"operation": "query", "filename": "numbers.csv", "group_by": "n", "limit": 10 ** 9})
+    assert len(result["groups"]) == 10 and result["next_offset"] == 10
@@ -0,0 +1,87 @@
+import asyncio
+import hashlib
+import tracemalloc
+import pytest
+from backend.core.config import settings
+from backend.core.exceptions import AgentKException
+from backend.utils.file_utils import list_files, stream_upload
+
+class GeneratedUpload:
+    """An upload whose content is produced as it is read, like a request body"""
+
+    def __init__(self, filename: str, size: int):
+        self.filename = filename
+        self.remaining = size
+
+    async def read(self, size: int = -1) -> bytes:
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        self.remaining -= size
+        await asyncio.sleep(0)
+        return b"a" * size
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_PATH", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "TEXT_INDEX_DB", str(tmp_path / "search.db"))
+    return tmp_path / "uploads"
+
+@pytest.mark.asyncio
+async def test_uploads_are_hashed_and_renamed_into_place(upload_dir):
+    """Test that a streamed upload is saved whole with its hash, outside no other directory"""
+    upload = await stream_upload(GeneratedUpload("../../report.txt", 3 * 1024 + 5), "docs", chunk_size=1024)
+
+    assert upload["path"] == upload_dir / "docs" / "report.txt"
+    assert upload["size"] == 3 * 1024 + 5
+    assert upload["sha256"] == hashlib.sha256(b"a" * (3 * 1024 + 5)).hexdigest()
+    assert [path.name for path in (upload_dir / "docs").iterdir()] == ["report.txt"]
+
+@pytest.mark.asyncio
+async def test_uploads_without_a_name_or_outside_the_upload_path_are_rejected(upload_dir):
+    """Test that empty, "." and ".." names and escaping directories get a 400 and write nothing"""
+    for filename in ["", ".", "..", "docs/.."]:
+        with pytest.raises(AgentKException) as error:
+            await stream_upload(GeneratedUpload(filename, 10), "docs")
+        assert error.value.code == 400
+    for directory in ["..", "docs/../../elsewhere", str(upload_dir.parent)]:
+        with pytest.raises(AgentKException) as error:
+            await stream_upload(GeneratedUpload("report.txt", 10), directory)
+        assert error.value.code == 400
+
+    assert not upload_dir.parent.joinpath("report.txt").exists()
+    assert not upload_dir.parent.joinpath("elsewhere").exists()
+    assert (await stream_upload(GeneratedUpload("report.txt", 10), "docs/../reports"))["size"] == 10
+
+@pytest.mark.asyncio
+async def test_oversized_uploads_stop_early_and_leave_nothing(upload_dir):
+    """Test that an upload over the limit is rejected before it is read to the end"""
+    (upload_dir / "docs").mkdir(parents=True)
+    (upload_dir / "docs" / "big.txt").write_text("previous version")
+    body = GeneratedUpload("big.txt", 100 * 1024 * 1024)
+
+    with pytest.raises(AgentKException) as error:
+        await stream_upload(body, "docs", max_size=1024 * 1024, chunk_size=64 * 1024)
+
+    assert error.value.code == 413
+    assert body.remaining > 90 * 1024 * 1024
+    assert (upload_dir / "docs" / "big.txt").read_text() == "previous version"
+    assert [file["name"] for file in await list_files("docs")] == ["big.txt"]
+    assert len(list((upload_dir / "docs").iterdir())) == 1
+
+@pytest.mark.asyncio
+async def test_parallel_large_uploads_use_flat_memory(upload_dir):
+    """Test that memory stays around one chunk per upload, not one file per upload"""
+    uploads, size, chunk_size = 16, 8 * 1024 * 1024, 256 * 1024
+
+    tracemalloc.start()
+    try:
+        results = await asyncio.gather(*(
+            stream_upload(GeneratedUpload(f"data{i}.bin", size), max_size=size, chunk_size=chunk_size)
+            for i in range(uploads)
+        ))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert all(result["size"] == size for result in results)
+    assert peak < uploads * chunk_size * 3
+    assert peak < uploads * size / 10
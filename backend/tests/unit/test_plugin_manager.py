@@ -0,0 +1,220 @@
+import asyncio
+import importlib.util
+import os
+import sys
+import time
+import pytest
+from plugins import plugin_workers
+from plugins.capability_index import CapabilityIndex
+from plugins.plugin_manager import PluginManager
+
+PLUGIN_TEMPLATE = '''
+import asyncio
+from plugins.base_plugin import BasePlugin
+
+class {class_name}(BasePlugin):
+    eager = {eager}
+    initialize_calls = 0
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.name = "{class_name}"
+        self.capabilities = {capabilities!r}
+
+    async def initialize(self):
+        type(self).initialize_calls += 1
+        await asyncio.sleep({delay})
+        await super().initialize()
+
+    async def execute(self, parameters):
+        return {{"success": True, "plugin": self.name}}
+'''
+
+def make_plugins(tmp_path, monkeypatch, package, plugins):
+    """Write plugin files into an importable package and return its path"""
+    root = tmp_path / package
+    for directory in ("core_plugins", "custom_plugins"):
+        (root / directory).mkdir(parents=True)
+    for plugin_id, (class_name, capabilities, eager, delay) in plugins.items():
+        (root / "core_plugins" / f"{plugin_id}.py").write_text(PLUGIN_TEMPLATE.format(
+            class_name=class_name, capabilities=capabilities, eager=eager, delay=delay
+        ))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    return root
+
+@pytest.mark.asyncio
+async def test_startup_discovers_plugins_without_importing_them(tmp_path, monkeypatch):
+    """Test that only eager plugins are imported at startup while all are discoverable"""
+    root = make_plugins(tmp_path, monkeypatch, "lazy_plugins", {
+        "searcher": ("Searcher", ["web_search"], True, 0),
+        "renderer": ("Renderer", ["image_generation"], False, 0)
+    })
+    manager = PluginManager(root)
+    await manager.initialize()
+
+    assert set(manager.manifests) == {"searcher", "renderer"}
+    assert manager.manifests["renderer"].capabilities == ("image_generation",)
+    assert "lazy_plugins.core_plugins.renderer" not in sys.modules
+    assert manager.get_plugin("renderer") is None
+    assert manager.get_plugin("searcher").initialized
+
+    result = await manager.execute_plugin("renderer", {})
+
+    assert result == {"success": True, "plugin": "Renderer"}
+    assert "lazy_plugins.core_plugins.renderer" in sys.modules
+
+@pytest.mark.asyncio
+async def test_concurrent_first_calls_load_plugin_once(tmp_path, monkeypatch):
+    """Test that simultaneous first uses of a plugin share one import and initialization"""
+    root = make_plugins(tmp_path, monkeypatch, "shared_plugins", {
+        "slow": ("Slow", ["analysis"], False, 0.05)
+    })
+    manager = PluginManager(root)
+    await manager.initialize()
+
+    results = await asyncio.gather(*(manager.execute_plugin("slow", {}) for _ in range(5)))
+
+    assert all(result["success"] for result in results)
+    assert type(manager.get_plugin("slow")).initialize_calls == 1
+    with pytest.raises(ValueError):
+        await manager.execute_plugin("missing", {})
+
+@pytest.mark.asyncio
+async def test_eager_plugins_initialize_concurrently(tmp_path, monkeypatch):
+    """Test that eager plugins are initialized at the same time rather than one by one"""
+    root = make_plugins(tmp_path, monkeypatch, "eager_plugins", {
+        f"eager_{i}": (f"Eager{i}", ["utility"], True, 0.2) for i in range(4)
+    })
+    manager = PluginManager(root)
+
+    start = time.perf_counter()
+    await manager.initialize()
+
+    assert len(manager.get_all_plugins()) == 4
+    assert time.perf_counter() - start < 0.6
+
+def test_capability_index_ranks_fast_healthy_providers_first():
+    """Test that providers are ordered by latency and success rate, with failing ones last"""
+    index = CapabilityIndex(failure_threshold=2, cooldown=10.0)
+    index.add("slow", ["search"])
+    index.add("fast", ["search", "summarize"])
+    index.add("flaky", ["search"])
+    index.record("slow", 0.5, success=True, now=0.0)
+    index.record("fast", 0.1, success=True, now=0.0)
+    index.record("flaky", 0.05, success=True, now=0.0)
+    assert index.providers("search", now=1.0) == ["flaky", "fast", "slow"]
+
+    index.record("flaky", 0.05, success=False, now=1.0)
+    index.record("flaky", 0.05, success=False, now=2.0)
+    assert index.providers("search", now=3.0) == ["fast", "slow", "flaky"]
+    # After the cooldown the failing provider is tried again
+    assert index.providers("search", now=12.0)[0] == "flaky"
+
+    index.remove("fast")
+    assert index.providers("summarize") == []
+    assert index.capabilities() == ["search"]
+
+@pytest.mark.asyncio
+async def test_capability_routing_follows_load_unload_and_failures(tmp_path, monkeypatch):
+    """Test that capability routing tracks plugin lifecycle and falls back past failing providers"""
+    root = make_plugins(tmp_path, monkeypatch, "routed_plugins", {
+        "primary": ("Primary", ["translate"], False, 0),
+        "backup": ("Backup", ["translate"], False, 0)
+    })
+    manager = PluginManager(root)
+    await manager.initialize()
+    assert set(manager.capability_index.providers("translate")) == {"primary", "backup"}
+
+    await manager.get_or_load_plugin("primary")
+    await manager.reload_plugin("backup")
+    assert set(manager.capability_index.providers("translate")) == {"primary", "backup"}
+
+    async def broken(parameters):
+        raise RuntimeError("model unavailable")
+    manager.get_plugin("primary").execute = broken
+    manager.capability_index.record("backup", 10.0, success=True)
+
+    result = await manager.execute_capability("translate", {})
+
+    assert result == {"success": True, "plugin": "Backup"}
+    assert manager.get_plugin_stats()["primary"]["failures"] == 1
+
+    await manager.unload_plugin("backup")
+    assert manager.capability_index.providers("translate") == ["primary"]
+    with pytest.raises(ValueError):
+        await manager.execute_capability("unknown", {})
+
+WORKER_PLUGIN = '''
+import os
+import time
+from plugins.base_plugin import BasePlugin
+
+class Worker(BasePlugin):
+    execution_mode = "process"
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.name = "Worker"
+        self.capabilities = ["render"]
+        self.calls = 0
+
+    async def execute(self, parameters):
+        self.calls += 1
+        time.sleep(parameters.get("sleep", 0))
+        return {"success": True, "pid": os.getpid(), "calls": self.calls}
+'''
+
+@pytest.mark.asyncio
+async def test_process_plugins_run_in_recycled_warm_workers(tmp_path, monkeypatch):
+    """Test that process-mode plugins run in worker processes that are recycled and time out"""
+    root = make_plugins(tmp_path, monkeypatch, "process_plugins", {})
+    (root / "core_plugins" / "worker.py").write_text(WORKER_PLUGIN)
+    manager = PluginManager(root)
+    manager.set_plugin_config("worker", {"process_workers": 1, "max_tasks_per_worker": 2, "task_timeout": 1.0})
+    await manager.initialize()
+
+    try:
+        first, second, third = [await manager.execute_plugin("worker", {}) for _ in range(3)]
+
+        assert first["pid"] != os.getpid()
+        assert (second["pid"], second["calls"]) == (first["pid"], 2)
+        assert third["pid"] != first["pid"] and third["calls"] == 1
+
+        timed_out = await manager.execute_plugin("worker", {"sleep": 5})
+        assert not timed_out["success"] and "timed out" in timed_out["error"]
+        assert (await manager.execute_plugin("worker", {}))["success"]
+        assert manager.get_plugin_stats()["worker"]["workers"]["recycled"] == 2
+    finally:
+        await manager.cleanup()
+
+@pytest.mark.asyncio
+async def test_thread_plugins_do_not_block_the_event_loop(tmp_path, monkeypatch):
+    """Test that a blocking plugin in thread mode leaves the event loop responsive"""
+    root = make_plugins(tmp_path, monkeypatch, "thread_plugins", {})
+    (root / "core_plugins" / "worker.py").write_text(WORKER_PLUGIN)
+    manager = PluginManager(root)
+    manager.set_plugin_config("worker", {"execution_mode": "thread"})
+    await manager.initialize()
+
+    ticks = 0
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    result = await manager.execute_plugin("worker", {"sleep": 0.3})
+    task.cancel()
+
+    assert result["pid"] == os.getpid()
+    assert ticks >= 10
+
+def test_workers_load_without_the_resource_module(monkeypatch):
+    """Test that the workers module imports where resource doesn't exist, as on Windows"""
+    monkeypatch.setitem(sys.modules, "resource", None)
+    spec = importlib.util.spec_from_file_location("plugin_workers_without_resource", plugin_workers.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    assert module._peak_memory() == 0
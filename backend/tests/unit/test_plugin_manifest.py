@@ -0,0 +1,65 @@
+import os
+from pathlib import Path
+from plugins.plugin_manifest import ManifestIndex
+
+PLUGINS_PATH = Path(__file__).parent.parent.parent.parent / "plugins"
+
+PLUGIN_SOURCE = '''
+from plugins.base_plugin import BasePlugin
+
+class {class_name}(BasePlugin):
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.name = "{class_name}"
+        self.capabilities = ["{capability}"]
+
+    async def execute(self, parameters):
+        return {{"success": True}}
+'''
+
+def write_plugin(directory, plugin_id, class_name, capability):
+    (directory / f"{plugin_id}.py").write_text(
+        PLUGIN_SOURCE.format(class_name=class_name, capability=capability)
+    )
+
+def test_manifest_records_class_capabilities_and_config_schema():
+    """Test that a core plugin is described from its source without importing it"""
+    index = ManifestIndex()
+
+    manifests = index.scan_directory(PLUGINS_PATH / "core_plugins", "plugins.core_plugins", is_core=True)
+
+    executor = manifests["code_executor"]
+    assert executor.class_name == "CodeExecutor"
+    assert "python" in executor.capabilities
+    assert executor.config_schema["timeout"] == {"default": 30, "type": "integer"}
+    assert executor.config_schema["sandboxed"] == {"default": True, "type": "boolean"}
+    assert manifests["web_search"].eager
+    assert "api_key" in manifests["web_search"].config_schema
+
+def test_index_persists_and_reparses_only_changed_files(tmp_path):
+    """Test that a restarted index reuses manifests of unchanged files"""
+    directory = tmp_path / "custom_plugins"
+    directory.mkdir()
+    write_plugin(directory, "alpha", "Alpha", "first")
+    write_plugin(directory, "beta", "Beta", "second")
+    index_path = str(tmp_path / "index.json")
+
+    index = ManifestIndex(index_path)
+    index.scan_directory(directory, "custom_plugins", is_core=False)
+    index.save()
+    assert index.parsed == 2
+
+    # A touched file with unchanged content is hashed but not parsed again
+    os.utime(directory / "alpha.py", ns=(1, 1))
+    write_plugin(directory, "beta", "Beta", "changed")
+    write_plugin(directory, "gamma", "Gamma", "third")
+
+    restarted = ManifestIndex(index_path)
+    manifests = restarted.scan_directory(directory, "custom_plugins", is_core=False)
+
+    assert restarted.parsed == 2
+    assert manifests["beta"].capabilities == ("changed",)
+    assert manifests["gamma"].module == "custom_plugins.gamma"
+
+    (directory / "alpha.py").unlink()
+    assert set(restarted.scan_directory(directory, "custom_plugins", is_core=False)) == {"beta", "gamma"}
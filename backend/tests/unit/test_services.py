@@ -1,7 +1,9 @@
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from backend.services.agent_service import AgentService
 from backend.services.llm_service import LLMService
+from backend.services.workflow_service import WorkflowService
 from backend.models.agent import Agent, AgentCreate, AgentStatus, AgentCapability
 
 @pytest.fixture
@@ -94,4 +96,37 @@ async def test_llm_service_get_available_models():
         # Should have models from both services
         assert len(models) >= 2
         assert any(m["type"] == "lmstudio" for m in models)
-        assert any(m["type"] == "ollama" for m in models)
\ No newline at end of file
+        assert any(m["type"] == "ollama" for m in models)
+
+@pytest.mark.asyncio
+async def test_workflow_service_resumes_only_failed_or_cancelled_runs():
+    """Test that pending, running and completed runs are refused, and a run is resumed once at a time"""
+    service = WorkflowService.__new__(WorkflowService)
+    service.engine = MagicMock()
+    service.get_plan = AsyncMock(return_value=MagicMock())
+    runs = {
+        status: {"run_id": status, "workflow_id": "research", "status": status, "input": {}}
+        for status in ("pending", "running", "completed", "failed")
+    }
+    service.engine.checkpoints.get_run = AsyncMock(side_effect=runs.get)
+    
+    for status in ("pending", "running", "completed"):
+        with pytest.raises(ValueError):
+            await service.resume_run(status)
+    service.engine.run.assert_not_called()
+    
+    started = asyncio.Event()
+    release = asyncio.Event()
+    
+    async def run(plan, input_data, use_cache, run_id):
+        started.set()
+        await release.wait()
+        return {"run_id": run_id, "status": "completed"}
+    
+    service.engine.run = run
+    resume = asyncio.create_task(service.resume_run("failed"))
+    await started.wait()
+    with pytest.raises(ValueError):
+        await service.resume_run("failed")
+    release.set()
+    assert (await resume)["status"] == "completed"
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import pytest
+from backend.services.workflow_batch import RecordTooLarge, iter_jsonl, run_batch
+from backend.services.workflow_engine import WorkflowEngine
+from backend.services.workflow_plan import compile_workflow
+
+STEPS = [
+    {"id": "clean", "agent": "analyst", "inputs": ["record"], "outputs": ["clean_record"]},
+    {"id": "score", "agent": "analyst", "inputs": ["clean_record"], "outputs": ["score"]}
+]
+
+async def runner(step, inputs, handle):
+    await asyncio.sleep(0.01)
+    if step["id"] == "clean":
+        return {"clean_record": inputs["record"].strip()}
+    return {"score": len(inputs["clean_record"])}
+
+async def collect(results):
+    return [result async for result in results]
+
+@pytest.mark.asyncio
+async def test_iter_jsonl_splits_lines_across_chunks():
+    """Test that JSONL lines split across chunks are reassembled"""
+    async def chunks():
+        for chunk in [b'{"a": 1}\n{"a"', b': 2}\n\n', b'{"a": 3}']:
+            yield chunk
+
+    lines = [line async for line in iter_jsonl(chunks())]
+
+    assert [json.loads(line) for line in lines] == [{"a": 1}, {"a": 2}, {"a": 3}]
+
+@pytest.mark.asyncio
+async def test_iter_jsonl_rejects_records_over_the_limit():
+    """Test that an oversized line becomes an error item without being buffered whole"""
+    async def chunks():
+        yield b'{"a": 1}\n{"big": "'
+        for _ in range(1000):
+            yield b"x" * 1000
+        yield b'"}\n{"a": 2}'
+
+    lines = [line async for line in iter_jsonl(chunks(), max_record_bytes=100)]
+
+    assert lines[0] == b'{"a": 1}' and lines[2] == b'{"a": 2}'
+    assert isinstance(lines[1], RecordTooLarge)
+    assert str(lines[1]) == "Record larger than 100 bytes"
+
+@pytest.mark.asyncio
+async def test_batch_runs_every_item_and_reports_throughput():
+    """Test that a batch streams a result per item followed by a summary"""
+    async def items():
+        for i in range(20):
+            yield json.dumps({"record": f" record {i} "})
+        yield b"not json"
+        yield RecordTooLarge("Record larger than 10 bytes")
+
+    results = await collect(run_batch(WorkflowEngine(runner), compile_workflow(STEPS), items(), concurrency=8))
+
+    summary = results.pop()
+    by_index = {result["index"]: result for result in results}
+    assert summary["items"] == 22
+    assert summary["completed"] == 20
+    assert summary["failed"] == 2
+    assert summary["throughput"] > 0
+    assert by_index[3]["output"] == {"score": len("record 3")}
+    assert by_index[20]["status"] == "failed"
+    assert by_index[21]["error"] == "Record larger than 10 bytes"
+
+@pytest.mark.asyncio
+async def test_batch_reads_input_lazily():
+    """Test that no more than `concurrency` items are pulled from the input ahead of completion"""
+    read = 0
+    finished = 0
+    max_ahead = 0
+
+    async def items():
+        nonlocal read, max_ahead
+        for i in range(30):
+            read += 1
+            max_ahead = max(max_ahead, read - finished)
+            yield {"record": str(i)}
+
+    async for result in run_batch(WorkflowEngine(runner), compile_workflow(STEPS), items(), concurrency=4):
+        if result["type"] == "result":
+            finished += 1
+
+    assert finished == 30
+    assert max_ahead <= 4
+
+@pytest.mark.asyncio
+async def test_batch_failure_waits_for_cancelled_items():
+    """Test that items in flight are cancelled and finished before a batch failure propagates"""
+    async def slow_runner(step, inputs, handle):
+        await asyncio.sleep(10)
+
+    async def items():
+        for i in range(3):
+            yield {"record": str(i)}
+        await asyncio.sleep(0.01)
+        raise OSError("input stream broken")
+
+    with pytest.raises(OSError):
+        await collect(run_batch(WorkflowEngine(slow_runner), compile_workflow(STEPS), items(), concurrency=4))
+
+    pending = [task for task in asyncio.all_tasks() if task.get_coro().__name__ == "_run_item"]
+    assert pending == []
@@ -0,0 +1,166 @@
+import asyncio
+import pytest
+from backend.services.workflow_cache import StepResultCache
+from backend.services.workflow_engine import WorkflowEngine
+from backend.services.workflow_plan import WorkflowPlanCache, build_dependency_graph, compile_workflow
+
+def make_steps():
+    """Diamond-shaped workflow: plan -> (code, docs) -> review"""
+    return [
+        {"id": "plan", "inputs": ["query"], "outputs": ["spec"]},
+        {"id": "code", "inputs": ["spec"], "outputs": ["codebase"]},
+        {"id": "docs", "inputs": ["spec"], "outputs": ["documentation"]},
+        {"id": "review", "inputs": ["codebase", "documentation"], "outputs": ["report"]},
+    ]
+
+def test_build_dependency_graph():
+    """Test that dependencies are derived from step inputs and outputs"""
+    graph = build_dependency_graph(make_steps())
+
+    assert graph["plan"] == set()
+    assert graph["code"] == {"plan"}
+    assert graph["review"] == {"code", "docs"}
+
+def test_build_dependency_graph_detects_cycle():
+    """Test that cyclic workflows are rejected"""
+    steps = [
+        {"id": "a", "inputs": ["y"], "outputs": ["x"]},
+        {"id": "b", "inputs": ["x"], "outputs": ["y"]},
+    ]
+
+    with pytest.raises(ValueError, match="cycle"):
+        build_dependency_graph(steps)
+
+def test_compile_workflow_levels_and_diagnostics():
+    """Test plan levels, producer index and cycle/unreachable diagnostics"""
+    plan = compile_workflow(make_steps(), workflow_id="wf-1", version="1.0")
+
+    assert plan.valid
+    assert plan.levels == (("plan",), ("code", "docs"), ("review",))
+    assert plan.producers["codebase"] == "code"
+    assert plan.external_inputs == {"query"}
+
+    broken = compile_workflow([
+        {"id": "a", "inputs": ["y"], "outputs": ["x"]},
+        {"id": "b", "inputs": ["x"], "outputs": ["y"]},
+        {"id": "c", "inputs": ["y"], "outputs": ["z"]},
+    ])
+
+    assert not broken.valid
+    assert "Dependency cycle between steps: a, b" in broken.errors
+    assert "Unreachable steps: c" in broken.warnings
+
+def test_plan_cache_versions_and_invalidation():
+    """Test that cached plans are keyed by workflow ID and version"""
+    cache = WorkflowPlanCache(max_size=1)
+    plan = compile_workflow(make_steps(), workflow_id="wf-1", version="1.0")
+    cache.put(plan)
+
+    assert cache.get("wf-1") is plan
+    assert cache.get("wf-1", version="2.0") is None
+
+    cache.invalidate("wf-1")
+    assert cache.get("wf-1") is None
+
+def test_plan_cache_skips_plans_compiled_before_an_invalidation():
+    """Test that a plan compiled from a definition read before an update is not cached"""
+    cache = WorkflowPlanCache()
+    generation = cache.generation
+    stale = compile_workflow(make_steps(), workflow_id="wf-1")
+
+    cache.invalidate("wf-1")
+    cache.put(stale, generation)
+    assert cache.get("wf-1") is None
+
+    fresh = compile_workflow(make_steps(), workflow_id="wf-1")
+    cache.put(fresh, cache.generation)
+    assert cache.get("wf-1") is fresh
+
+@pytest.mark.asyncio
+async def test_engine_runs_independent_steps_concurrently():
+    """Test that independent steps overlap and outputs flow downstream"""
+    active = 0
+    peak = 0
+
+    async def runner(step, inputs, handle):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return {name: f"{step['id']}({','.join(sorted(inputs))})" for name in step["outputs"]}
+
+    engine = WorkflowEngine(runner, max_parallelism=4)
+    result = await engine.run(make_steps(), {"query": "q"})
+
+    assert result["status"] == "completed"
+    assert peak == 2
+    assert result["output"] == {"report": "review(codebase,documentation)"}
+
+@pytest.mark.asyncio
+async def test_engine_cancels_downstream_on_failure():
+    """Test that a failing step cancels its dependents but not other branches"""
+    async def runner(step, inputs, handle):
+        if step["id"] == "code":
+            raise RuntimeError("boom")
+        return {name: "ok" for name in step["outputs"]}
+
+    engine = WorkflowEngine(runner, max_parallelism=1)
+    result = await engine.run(compile_workflow(make_steps()), {"query": "q"})
+    statuses = {step["step_id"]: step["status"] for step in result["steps"]}
+
+    assert result["status"] == "failed"
+    assert statuses == {"plan": "completed", "code": "failed", "docs": "completed", "review": "cancelled"}
+
+@pytest.mark.asyncio
+async def test_engine_memoizes_unchanged_steps():
+    """Test that editing the last step only re-executes that step"""
+    executed = []
+
+    async def runner(step, inputs, handle):
+        executed.append(step["id"])
+        return {name: f"{step['id']}-out" for name in step["outputs"]}
+
+    engine = WorkflowEngine(runner, cache=StepResultCache())
+    await engine.run(compile_workflow(make_steps()), {"query": "q"})
+    assert len(executed) == 4
+
+    edited = make_steps()
+    edited[-1]["parameters"] = {"format": "markdown"}
+    executed.clear()
+    result = await engine.run(compile_workflow(edited), {"query": "q"})
+
+    assert executed == ["review"]
+    assert [step["cached"] for step in result["steps"]] == [True, True, True, False]
+
+    # Opted-out steps always run
+    edited[0]["memoize"] = False
+    executed.clear()
+    await engine.run(compile_workflow(edited), {"query": "q"})
+    assert executed == ["plan"]
+
+@pytest.mark.asyncio
+async def test_engine_does_not_cache_steps_with_non_json_inputs():
+    """Test that inputs which only have a string form are never looked up or stored in the cache"""
+    class Document:
+        def __init__(self, text):
+            self.text = text
+
+        def __str__(self):
+            return "<Document>"
+
+    executed = []
+
+    async def runner(step, inputs, handle):
+        executed.append(inputs["query"].text)
+        return {"spec": inputs["query"].text.upper()}
+
+    cache = StepResultCache()
+    engine = WorkflowEngine(runner, cache=cache)
+    steps = [{"id": "plan", "inputs": ["query"], "outputs": ["spec"]}]
+    first = await engine.run(compile_workflow(steps), {"query": Document("a")})
+    second = await engine.run(compile_workflow(steps), {"query": Document("b")})
+
+    assert executed == ["a", "b"]
+    assert (first["output"], second["output"]) == ({"spec": "A"}, {"spec": "B"})
+    assert cache.get_stats()["entries"] == 0
@@ -0,0 +1,105 @@
+import pytest
+from backend.services.workflow_estimator import WorkflowEstimator
+from backend.services.workflow_history import RunHistory
+from backend.services.workflow_plan import StepHandle, compile_workflow
+from backend.services.workflow_scheduler import FairRunQueue
+
+STEPS = [
+    {"id": "plan", "agent": "planner", "action": "plan", "inputs": ["topic"], "outputs": ["outline"]},
+    {"id": "search", "agent": "researcher", "action": "search", "inputs": ["outline"], "outputs": ["notes"]},
+    {"id": "draft", "agent": "writer", "action": "draft", "inputs": ["outline"], "outputs": ["draft"]},
+    {"id": "report", "agent": "writer", "action": "report", "inputs": ["notes", "draft"], "outputs": ["report"]}
+]
+
+def resolver(step):
+    return StepHandle(agent=step.get("agent"), model="local-model")
+
+def distribution(duration, tokens, count=10):
+    return {
+        "count": count,
+        "duration": {"p10": duration / 2, "p50": duration, "p90": duration * 2},
+        "tokens": {"p10": tokens, "p50": tokens, "p90": tokens}
+    }
+
+def test_estimate_follows_critical_path():
+    """Test that the duration follows the slowest chain of dependencies and tokens add up"""
+    plan = compile_workflow(STEPS, "research", resolver=resolver)
+    estimator = WorkflowEstimator(max_parallelism=4, cost_per_1k_tokens=2.0)
+
+    estimate = estimator.estimate_with(plan, {
+        ("planner", "local-model", "plan"): distribution(1.0, 100),
+        ("researcher", "local-model", "search"): distribution(8.0, 1000),
+        ("writer", "local-model", "draft"): distribution(2.0, 400),
+        ("writer", "local-model", "report"): distribution(3.0, 500)
+    })
+
+    assert estimate["critical_path"] == ["plan", "search", "report"]
+    assert estimate["duration"] == {"p10": 6.0, "p50": 12.0, "p90": 24.0}
+    assert estimate["tokens"]["p50"] == 2000
+    assert estimate["cost"]["p50"] == 4.0
+    assert estimate["coverage"] == 1.0
+
+def test_estimate_falls_back_to_agent_history_then_defaults():
+    """Test that steps without enough history use their agent's history, then the defaults"""
+    plan = compile_workflow(STEPS, "research", resolver=resolver)
+    estimator = WorkflowEstimator(default_duration=5.0, default_tokens=50, min_samples=5)
+
+    estimate = estimator.estimate_with(plan, {
+        ("planner", "local-model", "plan"): distribution(1.0, 100),
+        ("writer", "local-model", "report"): distribution(3.0, 500, count=2),
+        ("writer", "*", "*"): distribution(2.5, 300)
+    })
+
+    sources = {step["step_id"]: step["source"] for step in estimate["steps"]}
+    assert sources == {"plan": "history", "search": "default", "draft": "agent", "report": "agent"}
+    assert estimate["coverage"] == 0.75
+
+def test_estimate_is_bounded_by_parallelism():
+    """Test that wide workflows are estimated as total work spread over the engine's parallelism"""
+    steps = [{"id": f"s{i}", "inputs": ["x"], "outputs": [f"o{i}"]} for i in range(8)]
+    plan = compile_workflow(steps, "wide")
+
+    estimate = WorkflowEstimator(max_parallelism=2, default_duration=1.0).estimate_with(plan, {})
+
+    assert estimate["duration"]["p50"] == 4.0
+
+@pytest.mark.asyncio
+async def test_estimator_reads_distributions_from_history(tmp_path):
+    """Test that executed steps recorded in history drive the estimate"""
+    history = RunHistory(str(tmp_path / "history.db"))
+    for i in range(10):
+        await history.record_run({
+            "run_id": None,
+            "workflow_id": "summary",
+            "status": "completed",
+            "duration": 2.0,
+            "steps": [
+                {"step_id": "summarize", "agent": "writer", "model": "local-model", "action": "summarize",
+                 "status": "completed", "cached": False, "duration": 2.0, "tokens": 300},
+                {"step_id": "cached", "agent": "writer", "model": "local-model", "action": "summarize",
+                 "status": "completed", "cached": True, "duration": 0.0, "tokens": 0}
+            ]
+        })
+    steps = [{"id": "summarize", "agent": "writer", "action": "summarize", "inputs": ["text"], "outputs": ["summary"]}]
+    plan = compile_workflow(steps, "summary", resolver=resolver)
+
+    estimate = await WorkflowEstimator(history).estimate(plan)
+
+    [step] = estimate["steps"]
+    assert step["source"] == "history"
+    assert step["samples"] == 10
+    assert 2.0 <= estimate["duration"]["p50"] <= 2.2
+    assert 300 <= estimate["tokens"]["p50"] <= 330
+    history.close()
+
+@pytest.mark.asyncio
+async def test_fair_queue_runs_shorter_jobs_first():
+    """Test that a user's short runs overtake long ones without starving runs submitted much earlier"""
+    queue = FairRunQueue()
+    await queue.put("long", "user", 0.0, estimate=60.0)
+    await queue.put("short", "user", 1.0, estimate=5.0)
+    await queue.put("late", "user", 100.0, estimate=1.0)
+
+    order = [(await queue.get())[0] for _ in range(3)]
+
+    assert order == ["short", "long", "late"]
@@ -0,0 +1,62 @@
+import pytest
+from backend.services.workflow_engine import WorkflowEngine
+from backend.services.workflow_events import WorkflowEventBus, report_progress
+
+@pytest.mark.asyncio
+async def test_progress_events_are_coalesced_per_step():
+    """Test that consecutive token progress for a step is merged into one event"""
+    bus = WorkflowEventBus()
+    subscription = bus.subscribe("run-1")
+
+    bus.publish("run-1", "step_started", step_id="a")
+    for token in ["solar ", "power ", "is "]:
+        bus.publish("run-1", "step_progress", step_id="a", tokens=1, text=token)
+    bus.publish("run-1", "step_completed", step_id="a")
+
+    events = [await subscription.get() for _ in range(len(subscription))]
+
+    assert [event["type"] for event in events] == ["step_started", "step_progress", "step_completed"]
+    assert events[1]["tokens"] == 3
+    assert events[1]["text"] == "solar power is "
+
+@pytest.mark.asyncio
+async def test_full_buffer_evicts_progress_before_lifecycle_events():
+    """Test that a slow subscriber loses progress events first and is told how many were dropped"""
+    bus = WorkflowEventBus(max_buffer=3)
+    subscription = bus.subscribe("run-1")
+
+    bus.publish("run-1", "step_started", step_id="a")
+    bus.publish("run-1", "step_progress", step_id="a", tokens=5, text="")
+    bus.publish("run-1", "step_started", step_id="b")
+    bus.publish("run-1", "step_completed", step_id="a")
+
+    events = [await subscription.get() for _ in range(len(subscription))]
+
+    assert [(event["type"], event["step_id"]) for event in events] == [
+        ("step_started", "a"), ("step_started", "b"), ("step_completed", "a")
+    ]
+    assert all(event["dropped"] == 1 for event in events)
+
+@pytest.mark.asyncio
+async def test_engine_publishes_run_events():
+    """Test that a run publishes lifecycle and progress events to its subscribers"""
+    bus = WorkflowEventBus()
+    steps = [
+        {"id": "fetch", "agent": "researcher", "inputs": ["query"], "outputs": ["notes"]},
+        {"id": "write", "agent": "writer", "inputs": ["notes"], "outputs": ["report"]}
+    ]
+
+    async def runner(step, inputs, handle):
+        report_progress(tokens=2, text="ok")
+        return {name: step["id"] for name in step["outputs"]}
+
+    subscription = bus.subscribe("run-1")
+    await WorkflowEngine(runner, events=bus).run(steps, {"query": "q"}, run_id="run-1")
+    events = [await subscription.get() for _ in range(len(subscription))]
+
+    assert [(event["type"], event.get("step_id")) for event in events] == [
+        ("run_started", None),
+        ("step_started", "fetch"), ("step_progress", "fetch"), ("step_completed", "fetch"),
+        ("step_started", "write"), ("step_progress", "write"), ("step_completed", "write"),
+        ("run_completed", None)
+    ]
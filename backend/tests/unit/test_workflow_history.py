@@ -0,0 +1,92 @@
+import time
+import pytest
+from backend.services.workflow_engine import WorkflowEngine
+from backend.services.workflow_events import report_progress
+from backend.services.workflow_history import RunHistory, duration_bucket, bucket_upper_bound
+
+def run_result(duration, status="completed", cached=False, error=None):
+    return {
+        "run_id": None,
+        "workflow_id": "research",
+        "status": status,
+        "duration": duration + 0.5,
+        "steps": [
+            {"step_id": "gather", "agent": "researcher", "status": "completed", "cached": False,
+             "duration": 0.5, "tokens": 10},
+            {"step_id": "report", "agent": "writer", "status": status, "cached": cached,
+             "duration": duration, "tokens": 20, "error": error}
+        ]
+    }
+
+def test_duration_buckets_bound_relative_error():
+    """Test that the histogram bucket of a duration overestimates it by at most 10%"""
+    for duration in [0.0123, 0.5, 7.0, 3600.0]:
+        upper = bucket_upper_bound(duration_bucket(duration))
+        assert duration <= upper <= duration * 1.1
+
+@pytest.mark.asyncio
+async def test_step_stats_report_percentiles_errors_and_cache_hits(tmp_path):
+    """Test that step aggregates are answered from the rollups"""
+    history = RunHistory(str(tmp_path / "history.db"))
+    for i in range(1, 101):
+        await history.record_run(run_result(i / 100, cached=(i % 10 == 0)))
+    await history.record_run(run_result(0.2, status="failed", error="boom"))
+
+    [report] = await history.step_stats("research", "report")
+    runs = await history.run_stats("research")
+
+    assert report["count"] == 101
+    assert report["failures"] == 1
+    assert report["cache_hits"] == 10
+    assert report["tokens"] == 2020
+    assert 0.95 <= report["p95"] <= 0.95 * 1.1
+    assert report["max_duration"] == 1.0
+    assert runs[0]["failures"] == 1
+    assert "step_id" not in runs[0]
+    history.close()
+
+@pytest.mark.asyncio
+async def test_stats_are_limited_to_the_time_window(tmp_path):
+    """Test that rollups outside the requested window are ignored"""
+    history = RunHistory(str(tmp_path / "history.db"))
+    await history.record_run(run_result(9.0), finished_at=time.time() - 10 * 86400)
+    await history.record_run(run_result(0.1))
+
+    [report] = await history.step_stats("research", "report", days=7)
+
+    assert report["count"] == 1
+    assert report["max_duration"] == 0.1
+    history.close()
+
+@pytest.mark.asyncio
+async def test_prune_drops_expired_partitions(tmp_path):
+    """Test that raw partitions past retention are dropped while recent runs are kept"""
+    history = RunHistory(str(tmp_path / "history.db"), retention_days=7)
+    await history.record_run(run_result(1.0), finished_at=time.time() - 10 * 86400)
+    await history.record_run(run_result(2.0))
+
+    runs = await history.recent_runs("research")
+
+    assert len(runs) == 1
+    assert runs[0]["duration"] == 2.5
+    assert len(history._partitions) == 1
+    history.close()
+
+@pytest.mark.asyncio
+async def test_engine_records_runs_with_token_usage(tmp_path):
+    """Test that the engine records each finished run with the tokens its steps reported"""
+    history = RunHistory(str(tmp_path / "history.db"))
+
+    async def runner(step, inputs, handle):
+        report_progress(tokens=7)
+        return {name: "ok" for name in step["outputs"]}
+
+    steps = [{"id": "summarize", "agent": "writer", "inputs": ["text"], "outputs": ["summary"]}]
+    await WorkflowEngine(runner, history=history).run(steps, {"text": "t"})
+
+    [summary] = await history.step_stats(step_id="summarize")
+    [run] = await history.recent_runs()
+    assert summary["tokens"] == 7
+    assert run["tokens"] == 7
+    assert run["status"] == "completed"
+    history.close()
@@ -0,0 +1,149 @@
+import asyncio
+import time
+import pytest
+from backend.services.workflow_cache import StepResultCache
+from backend.services.workflow_engine import WorkflowEngine
+from backend.services.workflow_map import split_items
+from backend.services.workflow_plan import compile_workflow
+
+def test_split_items():
+    """Test that map inputs are split from lists, JSON arrays and lines of text"""
+    assert split_items(["a", "b"]) == ["a", "b"]
+    assert split_items('["a", "b"]') == ["a", "b"]
+    assert split_items("1. solar\n\n2. wind\n") == ["1. solar", "2. wind"]
+    assert split_items("Questions to research:\n- solar\n* wind\nLet me know!") == ["- solar", "* wind"]
+    assert split_items("A single paragraph\nover two lines") == ["A single paragraph\nover two lines"]
+    assert split_items(None) == []
+
+def test_compile_rejects_invalid_map_steps():
+    """Test that map definitions are validated at compile time"""
+    plan = compile_workflow([
+        {"id": "a", "inputs": ["x"], "outputs": ["y"], "map": {"over": "z"}},
+        {"id": "b", "inputs": ["y"], "outputs": ["w"], "map": {"over": "y", "reduce": "sum"}},
+        {"id": "c", "inputs": ["w"], "outputs": ["v"], "map": {"over": "w", "max_items": 0}}
+    ])
+
+    assert plan.errors == (
+        "Map step 'a' must map over one of its inputs",
+        "Map step 'b' has unknown reducer 'sum' (expected one of: list, concat, merge)",
+        "Map step 'c' max_items must be a positive integer"
+    )
+
+@pytest.mark.asyncio
+async def test_map_step_runs_items_with_bounded_parallelism():
+    """Test that a map step runs each item, capped at its parallelism, and reduces in item order"""
+    active = 0
+    peak = 0
+
+    async def runner(step, inputs, handle):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        # Later items finish first so the reducer has to restore item order
+        await asyncio.sleep(0.05 / len(inputs["source"]))
+        active -= 1
+        return {"summary": inputs["source"].upper()}
+
+    steps = [{
+        "id": "gather", "inputs": ["sources"], "outputs": ["summary"],
+        "map": {"over": "sources", "as": "source", "max_parallelism": 3}
+    }]
+    result = await WorkflowEngine(runner).run(steps, {"sources": ["a", "bb", "ccc", "dddd", "eeeee"]})
+
+    assert result["output"] == {"summary": ["A", "BB", "CCC", "DDDD", "EEEEE"]}
+    assert peak == 3
+
+@pytest.mark.asyncio
+async def test_map_step_runs_at_most_max_items():
+    """Test that items past max_items are not run, whether the input is ready or streamed"""
+    gathered = []
+
+    async def runner(step, inputs, handle):
+        if step["id"] == "plan":
+            return {"topic": inputs["question"].upper()}
+        gathered.append(inputs["topic"])
+        return {"notes": inputs["topic"]}
+
+    gather = {
+        "id": "gather", "inputs": ["topic"], "outputs": ["notes"],
+        "map": {"over": "topic", "as": "topic", "max_items": 3}
+    }
+    result = await WorkflowEngine(runner).run([gather], {"topic": "\n".join(f"- t{i}" for i in range(20))})
+    assert result["output"] == {"notes": ["- t0", "- t1", "- t2"]}
+
+    gathered.clear()
+    plan = {"id": "plan", "inputs": ["questions"], "outputs": ["topic"], "map": {"over": "questions", "as": "question"}}
+    result = await WorkflowEngine(runner).run([plan, gather], {"questions": [f"q{i}" for i in range(20)]})
+    assert len(result["output"]["notes"]) == 3
+    assert len(gathered) == 3
+
+@pytest.mark.asyncio
+async def test_downstream_map_consumes_items_as_they_complete():
+    """Test that a map over another map's output starts before the upstream map finishes"""
+    events = []
+
+    async def runner(step, inputs, handle):
+        if step["id"] == "fetch":
+            await asyncio.sleep(0.02 * inputs["url"])
+            events.append(("fetch", inputs["url"], time.perf_counter()))
+            return {"pages": inputs["url"] * 10}
+        if step["id"] == "report":
+            return {"report": f"fact {inputs['fact']}"}
+        events.append(("parse", inputs["page"], time.perf_counter()))
+        return {"facts": inputs["page"] + 1}
+
+    steps = [
+        {"id": "fetch", "inputs": ["urls"], "outputs": ["pages"], "map": {"over": "urls", "as": "url"}},
+        {"id": "parse", "inputs": ["pages"], "outputs": ["facts"], "map": {"over": "pages", "as": "page"}},
+        {"id": "report", "inputs": ["facts"], "outputs": ["report"], "map": {"over": "facts", "as": "fact", "reduce": "concat"}}
+    ]
+    plan = compile_workflow(steps)
+    assert dict(plan.streams) == {"parse": "fetch", "report": "parse"}
+
+    result = await WorkflowEngine(runner).run(plan, {"urls": [3, 1, 2]})
+
+    first_parse = min(at for name, _, at in events if name == "parse")
+    last_fetch = max(at for name, _, at in events if name == "fetch")
+    assert first_parse < last_fetch
+    assert result["status"] == "completed"
+    assert result["output"] == {"report": "fact 31\n\nfact 11\n\nfact 21"}
+
+@pytest.mark.asyncio
+async def test_failed_map_item_fails_step_and_streaming_dependents():
+    """Test that one failing item fails the map step and cancels its consumers"""
+    async def runner(step, inputs, handle):
+        if step["id"] == "fetch" and inputs["url"] == "bad":
+            raise RuntimeError("boom")
+        await asyncio.sleep(0.01)
+        return {name: "ok" for name in step["outputs"]}
+
+    steps = [
+        {"id": "fetch", "inputs": ["urls"], "outputs": ["pages"], "map": {"over": "urls", "as": "url"}},
+        {"id": "parse", "inputs": ["pages"], "outputs": ["facts"], "map": {"over": "pages", "as": "page"}},
+        {"id": "report", "inputs": ["facts"], "outputs": ["report"]}
+    ]
+    result = await WorkflowEngine(runner).run(steps, {"urls": ["a", "bad", "c"]})
+
+    statuses = {step["step_id"]: step["status"] for step in result["steps"]}
+    assert result["status"] == "failed"
+    assert statuses["fetch"] == "failed"
+    assert statuses["parse"] in ("failed", "cancelled")
+    assert statuses["report"] == "cancelled"
+
+@pytest.mark.asyncio
+async def test_map_items_are_memoized_individually():
+    """Test that re-running a map over a longer list only executes the new items"""
+    calls = []
+
+    async def runner(step, inputs, handle):
+        calls.append(inputs["topic"])
+        return {"notes": f"notes on {inputs['topic']}"}
+
+    steps = [{"id": "research", "inputs": ["topics"], "outputs": ["notes"], "map": {"over": "topics", "as": "topic"}}]
+    engine = WorkflowEngine(runner, cache=StepResultCache())
+    await engine.run(steps, {"topics": ["solar", "wind"]})
+    calls.clear()
+    result = await engine.run(steps, {"topics": ["solar", "wind", "hydro"]})
+
+    assert calls == ["hydro"]
+    assert result["output"]["notes"] == ["notes on solar", "notes on wind", "notes on hydro"]
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+from backend.services.workflow_registry import WorkflowRegistry
+
+REPO_ROOT = Path(__file__).parent.parent.parent.parent
+
+async def wait_for(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "Timed out waiting for reload"
+        await asyncio.sleep(0.02)
+
+def write_workflow(path, name, step_ids):
+    steps = [{"id": step_id, "inputs": ["query"], "outputs": [f"{step_id}_out"]} for step_id in step_ids]
+    path.write_text(json.dumps({"name": name, "description": "", "steps": steps}))
+
+def test_registry_loads_shipped_definitions():
+    """Test that workflow files and frontend graphs are compiled and indexed by ID and name"""
+    registry = WorkflowRegistry([
+        str(REPO_ROOT / "workflow"), str(REPO_ROOT / "frontend" / "config" / "workflows.json")
+    ])
+    registry.load_all()
+
+    assert registry.load_errors == {}
+    assert registry.get("research").plan.levels[0] == ("topic_analysis",)
+    assert registry.get_by_name("research assistant workflow").id == "research"
+    summarize = registry.get("research-and-summarize")
+    assert [step["id"] for step in summarize.steps] == ["research", "summarize"]
+    assert summarize.steps[1]["inputs"] == ["research_output"]
+
+def test_registry_keeps_last_good_version_of_broken_file(tmp_path):
+    """Test that a file that fails to parse or compile doesn't drop its workflows"""
+    path = tmp_path / "demo.json"
+    write_workflow(path, "Demo", ["a"])
+    registry = WorkflowRegistry([str(tmp_path)])
+    registry.load_all()
+
+    path.write_text("{ not json")
+    registry.reload(path)
+    assert registry.get("demo") is not None
+    assert str(path) in registry.load_errors
+
+    path.unlink()
+    registry.reload(path)
+    assert registry.get("demo") is None
+    assert registry.get_by_name("Demo") is None
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_inotify", [True, False])
+async def test_registry_hot_reloads_changed_files(tmp_path, use_inotify):
+    """Test that edits, atomic saves and new files are picked up while watching"""
+    shutil.copy(REPO_ROOT / "workflow" / "research.json", tmp_path / "research.json")
+    registry = WorkflowRegistry([str(tmp_path)], poll_interval=0.05, use_inotify=use_inotify)
+    registry.load_all()
+    await registry.start()
+    try:
+        write_workflow(tmp_path / "new.json", "New", ["a"])
+        await wait_for(lambda: registry.get("new") is not None)
+
+        # Editors often save by renaming a temporary file over the original
+        write_workflow(tmp_path / ".research.json.tmp", "Research v2", ["a", "b"])
+        (tmp_path / ".research.json.tmp").rename(tmp_path / "research.json")
+        await wait_for(lambda: registry.get("research").name == "Research v2")
+        assert registry.get_by_name("Research Assistant Workflow") is None
+    finally:
+        await registry.stop()
@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from backend.services.workflow_checkpoint import CheckpointStore
+from backend.services.workflow_plan import StepHandle
+from backend.services.workflow_scheduler import ConcurrencyLimiter, FairRunQueue, WorkflowScheduler, percentile
+
+@pytest.mark.asyncio
+async def test_fair_queue_round_robins_between_users():
+    """Test that a user with many queued runs can't starve other users"""
+    queue = FairRunQueue()
+    for i in range(3):
+        await queue.put(f"noisy-{i}", "noisy", 0.0)
+    await queue.put("quiet-0", "quiet", 0.0)
+
+    order = [(await queue.get())[0] for _ in range(4)]
+
+    assert order == ["noisy-0", "quiet-0", "noisy-1", "noisy-2"]
+
+def test_percentile_uses_nearest_rank():
+    """Test that percentiles pick the ceil(pct / 100 * n)-th smallest value"""
+    assert percentile([4.0, 1.0, 3.0, 2.0], 50) == 2.0
+    assert percentile([1.0, 2.0, 3.0], 50) == 2.0
+    assert percentile([float(i) for i in range(1, 21)], 95) == 19.0
+    assert percentile([5.0], 0) == 5.0
+    assert percentile([], 95) == 0.0
+
+@pytest.mark.asyncio
+async def test_concurrency_limiter_caps_steps_per_agent():
+    """Test that steps for one agent are capped while other agents proceed"""
+    limiter = ConcurrencyLimiter(agent_limit=2)
+    active = {"analyst": 0, "archivist": 0}
+    peak = {"analyst": 0, "archivist": 0}
+
+    async def runner(step, inputs, handle):
+        active[handle.agent] += 1
+        peak[handle.agent] = max(peak[handle.agent], active[handle.agent])
+        await asyncio.sleep(0.01)
+        active[handle.agent] -= 1
+        return {}
+
+    limited = limiter.wrap(runner)
+    await asyncio.gather(
+        *[limited({}, {}, StepHandle(agent="analyst")) for _ in range(6)],
+        limited({}, {}, StepHandle(agent="archivist"))
+    )
+
+    assert peak == {"analyst": 2, "archivist": 1}
+
+@pytest.mark.asyncio
+async def test_scheduler_executes_submitted_runs():
+    """Test that submitted runs are executed by the worker pool and measured"""
+    executed = []
+
+    async def executor(run_id):
+        await asyncio.sleep(0.01)
+        executed.append(run_id)
+
+    scheduler = WorkflowScheduler(executor, workers=2)
+    for i in range(4):
+        await scheduler.submit(f"run-{i}", user_id="user-1")
+    while len(executed) < 4:
+        await asyncio.sleep(0.01)
+    await scheduler.stop()
+
+    metrics = scheduler.get_metrics()
+    assert sorted(executed) == ["run-0", "run-1", "run-2", "run-3"]
+    assert metrics["completed"] == 4
+    assert metrics["queue_depth"] == 0
+    assert metrics["run_duration"]["p95"] > 0
+
+@pytest.mark.asyncio
+async def test_scheduler_recovers_only_its_runs_and_fails_broken_ones(tmp_path):
+    """Test that only scheduled runs are recovered on start and a run that raises is marked failed"""
+    store = CheckpointStore(str(tmp_path / "checkpoints.db"))
+    await store.create_run("inline-run", "research", {})
+    await store.create_run("queued-run", "research", {}, scheduled=True)
+    executed = []
+
+    async def executor(run_id):
+        executed.append(run_id)
+        raise ValueError("Workflow with ID research not found")
+
+    scheduler = WorkflowScheduler(executor, store=store, workers=1)
+    await scheduler.start()
+    while scheduler.get_metrics()["failed"] < 1:
+        await asyncio.sleep(0.01)
+    await scheduler.stop()
+
+    assert executed == ["queued-run"]
+    queued = await store.get_run("queued-run")
+    assert queued["status"] == "failed" and queued["error"] == "Workflow with ID research not found"
+    assert (await store.get_run("inline-run"))["status"] == "pending"
+    assert await store.list_runs(["pending", "running"], scheduled_only=True) == []
+    store.close()
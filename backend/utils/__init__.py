@@ -2,7 +2,7 @@
 Utility functions for AgentK
 """
 
-from backend.utils.llm_connector import connect_to_llm, generate_response
+from backend.utils.llm_connector import connect_to_llm, generate_response, close_session
 from backend.utils.file_utils import save_upload_file, get_file_info, list_files
 from backend.utils.logging_utils import setup_logging, get_logger
 from backend.utils.validation import validate_email, validate_url, validate_json
@@ -11,7 +11,7 @@ from backend.utils.crypto import encrypt_data, decrypt_data, hash_password
 from backend.utils.helpers import generate_id, format_timestamp, truncate_text
 
 __all__ = [
-    "connect_to_llm", "generate_response",
+    "connect_to_llm", "generate_response", "close_session",
     "save_upload_file", "get_file_info", "list_files",
     "setup_logging", "get_logger",
     "validate_email", "validate_url", "validate_json",
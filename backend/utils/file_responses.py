@@ -0,0 +1,248 @@
+import os
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# Bytes read and sent per step when the server can't send files itself
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Precompressed variants, most preferred first: Content-Encoding and file suffix
+PRECOMPRESSED_ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+def read_at(file, count: int, offset: int) -> bytes:
+    """Read count bytes at offset, with pread where the platform has it (not Windows)"""
+    if hasattr(os, "pread"):
+        return os.pread(file.fileno(), count, offset)
+    file.seek(offset)
+    return file.read(count)
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range Range header into an inclusive (first, last) byte span
+
+    Returns:
+        The span, or None if the header isn't a single byte range (the
+        whole file is then sent)
+
+    Raises:
+        ValueError: If the range is not satisfiable
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    try:
+        start = int(first) if first else None
+        end = int(last) if last else None
+    except ValueError:
+        return None
+    if not dash or (start is None and end is None):
+        return None
+    if start is None:
+        # Suffix range: the last end bytes
+        if end == 0 or size == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(size - end, 0), size - 1
+    if end is not None and end < start:
+        return None
+    if start >= size:
+        raise ValueError("Unsatisfiable range")
+    return start, size - 1 if end is None else min(end, size - 1)
+
+def accepted_encodings(header: str) -> List[str]:
+    """Get the content codings an Accept-Encoding header allows, ignoring q=0"""
+    encodings = []
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = params.strip().replace(" ", "")
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            encodings.append(coding.strip().lower())
+    return encodings
+
+def select_variant(path: Path, stat_result: os.stat_result, accept_encoding: str) -> Tuple[Path, os.stat_result, Optional[str]]:
+    """
+    Pick a precompressed copy of a file the client accepts
+
+    A copy is used only if it is at least as new as the file, so a stale
+    .gz or .br left next to an updated file is ignored.
+
+    Returns:
+        Path and stat of the file to send, and its Content-Encoding (None for the file itself)
+    """
+    accepted = accepted_encodings(accept_encoding)
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        if encoding not in accepted and "*" not in accepted:
+            continue
+        variant = path.with_name(path.name + suffix)
+        try:
+            variant_stat = variant.stat()
+        except OSError:
+            continue
+        if stat.S_ISREG(variant_stat.st_mode) and variant_stat.st_mtime_ns >= stat_result.st_mtime_ns:
+            return variant, variant_stat, encoding
+    return path, stat_result, None
+
+def make_etag(stat_result: os.stat_result, encoding: Optional[str] = None) -> str:
+    """Strong validator from modification time and size, distinct per encoding"""
+    tag = f"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"
+    return f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+
+def is_not_modified(request_headers: Headers, etag: str, mtime: float) -> bool:
+    """Evaluate If-None-Match, or failing that If-Modified-Since"""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def if_range_matches(request_headers: Headers, etag: str, last_modified: str) -> bool:
+    """Check If-Range: a Range only applies if the client's copy is still current"""
+    if_range = request_headers.get("if-range")
+    return if_range is None or if_range.strip() in (etag, last_modified)
+
+class DownloadResponse(Response):
+    """
+    Sends a file with support for resumable and conditional downloads
+
+    Range requests get 206 Partial Content (416 when unsatisfiable), and
+    If-None-Match / If-Modified-Since requests for an unchanged file get 304
+    Not Modified. A .br or .gz copy next to the file is sent instead when the
+    client accepts it. When the server offers the ASGI zero-copy send
+    extension the body goes out through sendfile; otherwise it's read in a
+    worker thread, DOWNLOAD_CHUNK_SIZE bytes at a time.
+
+    With accel_redirect set, no body is sent at all: the response carries an
+    X-Accel-Redirect to that internal location and the reverse proxy serves
+    the file (including ranges and validators) with sendfile.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        request_headers: Headers,
+        method: str = "GET",
+        filename: Optional[str] = None,
+        accel_redirect: Optional[str] = None,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE
+    ):
+        self.path = Path(path)
+        self.request_headers = request_headers
+        self.send_header_only = method.upper() == "HEAD"
+        self.filename = filename or self.path.name
+        self.accel_redirect = accel_redirect
+        self.chunk_size = chunk_size
+        self.background = None
+        self.status_code = 200
+        self.init_headers({})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+        if not stat.S_ISREG(stat_result.st_mode):
+            raise RuntimeError(f"File at path {self.path} is not a file.")
+
+        headers = {
+            "content-type": guess_type(self.filename)[0] or "application/octet-stream",
+            "content-disposition": self._content_disposition()
+        }
+        if self.accel_redirect:
+            headers["x-accel-redirect"] = self.accel_redirect
+            await self._send_head(send, 200, headers)
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        path, stat_result, encoding = await anyio.to_thread.run_sync(
+            select_variant, self.path, stat_result, self.request_headers.get("accept-encoding", "")
+        )
+        etag = make_etag(stat_result, encoding)
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        headers.update({
+            "accept-ranges": "bytes",
+            "etag": etag,
+            "last-modified": last_modified,
+            "vary": "Accept-Encoding"
+        })
+        if encoding:
+            headers["content-encoding"] = encoding
+
+        if is_not_modified(self.request_headers, etag, stat_result.st_mtime):
+            del headers["content-type"], headers["content-disposition"]
+            await self._send_head(send, 304, headers)
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        size = stat_result.st_size
+        status_code, start, end = 200, 0, size
+        range_header = self.request_headers.get("range")
+        if range_header and if_range_matches(self.request_headers, etag, last_modified):
+            try:
+                span = parse_range(range_header, size)
+            except ValueError:
+                headers["content-range"] = f"bytes */{size}"
+                headers["content-length"] = "0"
+                await self._send_head(send, 416, headers)
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+            if span is not None:
+                status_code, start, end = 206, span[0], span[1] + 1
+                headers["content-range"] = f"bytes {span[0]}-{span[1]}/{size}"
+        headers["content-length"] = str(end - start)
+
+        await self._send_head(send, status_code, headers)
+        if self.send_header_only or start == end:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        file = await anyio.to_thread.run_sync(open, path, "rb")
+        try:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": start,
+                    "count": end - start,
+                    "more_body": False
+                })
+                return
+            position = start
+            while position < end:
+                chunk = await anyio.to_thread.run_sync(
+                    read_at, file, min(self.chunk_size, end - position), position
+                )
+                if not chunk:
+                    # The file shrank while it was being sent
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+                    break
+                position += len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": position < end})
+        finally:
+            file.close()
+
+    async def _send_head(self, send: Send, status_code: int, headers: Dict[str, str]) -> None:
+        self.status_code = status_code
+        self.init_headers(headers)
+        await send({"type": "http.response.start", "status": status_code, "headers": self.raw_headers})
+
+    def _content_disposition(self) -> str:
+        quoted = quote(self.filename)
+        if quoted != self.filename:
+            return f"attachment; filename*=utf-8''{quoted}"
+        return f'attachment; filename="{self.filename}"'
@@ -1,23 +1,94 @@
 import aiofiles
+import hashlib
+import os
 import shutil
+import uuid
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from fastapi import UploadFile
 from backend.core.config import settings
+from backend.core.exceptions import AgentKException
+from plugins.text_index import FullTextIndex, get_text_index
 
-async def save_upload_file(file: UploadFile, directory: str = "") -> Path:
-    """Save an uploaded file to the specified directory"""
-    upload_path = Path(settings.UPLOAD_PATH)
+# Bytes read from an upload and written per step; memory per upload is about one chunk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+def get_upload_index() -> FullTextIndex:
+    """Get the full-text index, with the upload directory as its "uploads" root"""
+    index = get_text_index(settings.TEXT_INDEX_DB)
+    index.add_root("uploads", settings.UPLOAD_PATH)
+    return index
+
+async def stream_upload(
+    file: UploadFile,
+    directory: str = "",
+    upload_path: Optional[Path] = None,
+    max_size: Optional[int] = None,
+    chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Copy an upload to disk chunk by chunk
+    
+    The file is written to a temporary name next to its destination and
+    hashed as it is copied, then renamed into place, so readers never see
+    a partial file and at most one chunk is held in memory.
+    
+    Args:
+        file: The uploaded file
+        directory: Directory under the upload path to save to
+        upload_path: Upload root, settings.UPLOAD_PATH by default
+        max_size: Largest accepted upload in bytes, settings.MAX_FILE_SIZE by default
+        chunk_size: Bytes copied per step
+    
+    Returns:
+        Dict with path, size and sha256 of the saved file
+    
+    Raises:
+        AgentKException: With code 400 for a missing file name or a directory
+            outside the upload path, and 413 as soon as the upload exceeds max_size
+    """
+    upload_path = Path(upload_path or settings.UPLOAD_PATH)
+    max_size = settings.MAX_FILE_SIZE if max_size is None else max_size
+    
+    # Only the name is used, so a client can't write outside the directory
+    filename = Path(file.filename or "").name
+    if filename in ("", ".", ".."):
+        raise AgentKException("Invalid file name", 400)
     directory_path = upload_path / directory
+    resolved_root = upload_path.resolve()
+    resolved_directory = directory_path.resolve()
+    if resolved_directory != resolved_root and resolved_root not in resolved_directory.parents:
+        raise AgentKException("Upload directory must be inside the upload path", 400)
     directory_path.mkdir(parents=True, exist_ok=True)
     
-    file_path = directory_path / file.filename
+    file_path = directory_path / filename
+    tmp_path = directory_path / f".{file_path.name}.{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
     
-    async with aiofiles.open(file_path, 'wb') as f:
-        content = await file.read()
-        await f.write(content)
+    try:
+        async with aiofiles.open(tmp_path, 'wb') as f:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise AgentKException(f"File larger than {max_size} bytes", 413)
+                digest.update(chunk)
+                await f.write(chunk)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
     
-    return file_path
+    get_upload_index().schedule(str(file_path))
+    return {"path": file_path, "size": size, "sha256": digest.hexdigest()}
+
+async def save_upload_file(file: UploadFile, directory: str = "") -> Path:
+    """Save an uploaded file to the specified directory"""
+    upload = await stream_upload(file, directory)
+    return upload["path"]
 
 async def get_file_info(file_path: Path) -> Dict[str, Any]:
     """Get information about a file"""
@@ -44,12 +115,16 @@ async def list_files(directory: str = "") -> List[Dict[str, Any]]:
     
     files = []
     for file_path in directory_path.iterdir():
-        if file_path.is_file():
+        if file_path.is_file() and not is_partial_upload(file_path):
             file_info = await get_file_info(file_path)
             files.append(file_info)
     
     return files
 
+def is_partial_upload(file_path: Path) -> bool:
+    """Check whether a file is an upload still being written by stream_upload"""
+    return file_path.name.startswith(".") and file_path.name.endswith(".part")
+
 def _format_size(size_bytes: int) -> str:
     """Format file size in human-readable format"""
     if size_bytes == 0:
@@ -1,8 +1,29 @@
 from typing import Dict, Any, List, Optional
 import aiohttp
+import asyncio
 import json
 from backend.core.config import settings
 
+# Shared HTTP session so repeated generations reuse pooled connections
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+async def get_session() -> aiohttp.ClientSession:
+    """Get the shared HTTP session for LLM requests, creating it on first use"""
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session = aiohttp.ClientSession()
+        _session_loop = loop
+    return _session
+
+async def close_session() -> None:
+    """Close the shared HTTP session"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
 async def connect_to_llm(model_type: str, model_config: Dict[str, Any]) -> bool:
     """Test connection to an LLM service"""
     try:
@@ -40,13 +61,13 @@ async def generate_response(
                 "stream": False
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(f"{url}/v1/chat/completions", json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data["choices"][0]["message"]["content"]
-                    else:
-                        return f"Error: LM Studio API returned status {response.status}"
+            session = await get_session()
+            async with session.post(f"{url}/v1/chat/completions", json=payload) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return data["choices"][0]["message"]["content"]
+                else:
+                    return f"Error: LM Studio API returned status {response.status}"
         
         elif model_type == "ollama":
             url = settings.OLLAMA_URL
@@ -56,13 +77,13 @@ async def generate_response(
                 "stream": False
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(f"{url}/api/chat", json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data["message"]["content"]
-                    else:
-                        return f"Error: Ollama API returned status {response.status}"
+            session = await get_session()
+            async with session.post(f"{url}/api/chat", json=payload) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return data["message"]["content"]
+                else:
+                    return f"Error: Ollama API returned status {response.status}"
         
         else:
             return "Error: Unsupported model type"
@@ -3,7 +3,7 @@ Base plugin class for AgentK plugins
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import AsyncIterator, Dict, Any, List
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,6 +13,13 @@ class BasePlugin(ABC):
     Abstract base class for all AgentK plugins
     """
     
+    # Eager plugins are loaded at startup; others on first use
+    eager = False
+    
+    # Where execute() runs: "inline" on the event loop, "thread" in a worker
+    # thread, or "process" in a pool of warm worker processes for CPU-bound work
+    execution_mode = "inline"
+    
     def __init__(self, config: Dict[str, Any] = None):
         """
         Initialize the plugin with configuration
@@ -51,6 +58,20 @@ class BasePlugin(ABC):
         """
         pass
     
+    async def stream(self, parameters: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute the plugin, yielding events as it makes progress.
+        Plugins with incremental output override this; by default the
+        result of execute() is yielded as a single "result" event.
+        
+        Args:
+            parameters: Dictionary of parameters for the plugin execution
+            
+        Yields:
+            Event dictionaries with a "type" key, ending with a "result" event
+        """
+        yield {"type": "result", "result": await self.execute(parameters)}
+    
     async def cleanup(self) -> None:
         """
         Clean up any resources used by the plugin.
@@ -0,0 +1,138 @@
+"""
+Capability index for AgentK - Routes capabilities to the fastest healthy plugin
+"""
+
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Floor on the success rate used for ranking, so scores stay finite
+MIN_SUCCESS_RATE = 0.05
+
+
+class PluginStats:
+    """Live latency and error statistics of one plugin"""
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.last_failure: Optional[float] = None
+
+    def record(self, duration: float, success: bool, alpha: float, now: float) -> None:
+        """Fold one call into the moving averages"""
+        self.calls += 1
+        self.latency = duration if self.latency is None else alpha * duration + (1 - alpha) * self.latency
+        self.error_rate = alpha * (0.0 if success else 1.0) + (1 - alpha) * self.error_rate
+        if success:
+            self.consecutive_failures = 0
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_failure = now
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the statistics for API responses"""
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "latency": round(self.latency, 6) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 4)
+        }
+
+
+class CapabilityIndex:
+    """
+    Inverted index from capability to the plugins that provide it
+
+    Providers of a capability are ranked by expected time to a successful
+    call: moving-average latency divided by the recent success rate. A
+    plugin that failed several calls in a row is ranked last until a
+    cooldown passes, after which it is tried again. Plugins without calls
+    yet rank first, so every provider gets measured.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0
+    ):
+        """
+        Initialize the index
+
+        Args:
+            alpha: Weight of the latest call in the moving averages
+            failure_threshold: Consecutive failures after which a plugin is unhealthy
+            cooldown: Seconds an unhealthy plugin is ranked last before being retried
+        """
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._providers: Dict[str, Set[str]] = {}
+        self._capabilities: Dict[str, Set[str]] = {}
+        self._stats: Dict[str, PluginStats] = {}
+
+    def add(self, plugin_id: str, capabilities: Iterable[str]) -> None:
+        """Index a plugin under its capabilities, replacing any previous entry"""
+        self.remove(plugin_id)
+        self._capabilities[plugin_id] = set(capabilities)
+        for capability in self._capabilities[plugin_id]:
+            self._providers.setdefault(capability, set()).add(plugin_id)
+
+    def remove(self, plugin_id: str) -> None:
+        """Stop offering a plugin for any capability; its stats are kept"""
+        for capability in self._capabilities.pop(plugin_id, ()):
+            providers = self._providers[capability]
+            providers.discard(plugin_id)
+            if not providers:
+                del self._providers[capability]
+
+    def clear(self) -> None:
+        """Remove every plugin from the index"""
+        self._providers.clear()
+        self._capabilities.clear()
+
+    def capabilities(self) -> List[str]:
+        """Get all capabilities offered by at least one plugin"""
+        return sorted(self._providers)
+
+    def providers(self, capability: str, now: Optional[float] = None) -> List[str]:
+        """Get the plugins offering a capability, best first"""
+        now = time.monotonic() if now is None else now
+        return sorted(
+            self._providers.get(capability, ()),
+            key=lambda plugin_id: (not self.is_healthy(plugin_id, now), self._score(plugin_id), plugin_id)
+        )
+
+    def record(self, plugin_id: str, duration: float, success: bool, now: Optional[float] = None) -> None:
+        """Record the latency and outcome of a plugin call"""
+        now = time.monotonic() if now is None else now
+        self._stats.setdefault(plugin_id, PluginStats()).record(duration, success, self.alpha, now)
+
+    def is_healthy(self, plugin_id: str, now: Optional[float] = None) -> bool:
+        """Check whether a plugin is outside a failure streak's cooldown"""
+        stats = self._stats.get(plugin_id)
+        if stats is None or stats.consecutive_failures < self.failure_threshold:
+            return True
+        now = time.monotonic() if now is None else now
+        return now - stats.last_failure >= self.cooldown
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get the call statistics of every plugin that has been called"""
+        return {
+            plugin_id: {**stats.to_dict(), "healthy": self.is_healthy(plugin_id)}
+            for plugin_id, stats in self._stats.items()
+        }
+
+    def _score(self, plugin_id: str) -> float:
+        """Expected cost of routing a call to a plugin; lower is better"""
+        stats = self._stats.get(plugin_id)
+        if stats is None or stats.latency is None:
+            return 0.0
+        return stats.latency / max(1.0 - stats.error_rate, MIN_SUCCESS_RATE)
@@ -0,0 +1,462 @@
+"""
+Columnar tables for AgentK - Typed NumPy columns for CSV and JSON datasets
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from plugins.file_streams import iter_json_array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+TABLE_VERSION = 1
+
+# Rows parsed before their values are packed into arrays, bounding the
+# Python objects alive during a conversion
+BLOCK_ROWS = 65536
+
+FILTER_OPERATORS = ("==", "!=", "<", "<=", ">", ">=", "in", "contains")
+AGGREGATES = ("count", "sum", "mean", "min", "max")
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("numpy is required for columnar tables")
+
+
+def _infer_text_column(values: "np.ndarray") -> "np.ndarray":
+    """Type a column of CSV strings as int64, float64 (empty cells NaN) or str"""
+    empty = values == ""
+    present = values[~empty]
+    if not empty.any():
+        try:
+            return present.astype(np.int64)
+        except (ValueError, OverflowError):
+            pass
+    if len(present):
+        try:
+            column = np.full(len(values), np.nan)
+            column[~empty] = present.astype(np.float64)
+            return column
+        except ValueError:
+            pass
+    return values
+
+
+def _infer_json_column(values: List[Any]) -> "np.ndarray":
+    """Type a column of JSON values as int64, float64 (null NaN), bool or str"""
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, bool) for value in present) and len(present) == len(values):
+        return np.array(values, dtype=bool)
+    if present and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        if len(present) == len(values) and all(isinstance(value, int) for value in present):
+            try:
+                return np.array(values, dtype=np.int64)
+            except OverflowError:
+                pass
+        return np.array([math.nan if value is None else value for value in values], dtype=np.float64)
+    return np.array([
+        "" if value is None else json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+        for value in values
+    ], dtype=str)
+
+
+def _to_python(values: "np.ndarray") -> List[Any]:
+    """Convert array values to JSON-friendly Python values, NaN as None"""
+    items = values.tolist()
+    if values.dtype.kind == "f":
+        return [None if item != item else item for item in items]
+    return items
+
+
+class ColumnarTable:
+    """
+    A dataset held as one typed NumPy array per column
+
+    Filtering, sorting, grouping and statistics work on whole columns, so
+    they run at array speed instead of building a dict per row.
+    """
+
+    def __init__(self, columns: "OrderedDict[str, np.ndarray]", mtime_ns: int = 0, size: int = 0):
+        self.columns = columns
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self._factors: Dict[str, Any] = {}
+
+    @property
+    def row_count(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    @classmethod
+    def from_csv(cls, path: str) -> "ColumnarTable":
+        """Parse a CSV file with a header row, in blocks of BLOCK_ROWS rows"""
+        _require_numpy()
+        stat = os.stat(path)
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            blocks: List[List["np.ndarray"]] = [[] for _ in header]
+            while True:
+                rows = [row for _, row in zip(range(BLOCK_ROWS), reader)]
+                if not rows:
+                    break
+                width = len(header)
+                if any(len(row) != width for row in rows):
+                    rows = [(row + [""] * width)[:width] for row in rows]
+                cells = np.array(rows, dtype=str).reshape(len(rows), width)
+                for index in range(width):
+                    blocks[index].append(cells[:, index])
+        columns = OrderedDict()
+        for name, parts in zip(header, blocks):
+            values = np.concatenate(parts) if parts else np.array([], dtype=str)
+            # Blocks are as wide as their widest cell in any column
+            if len(values):
+                values = values.astype(f"<U{max(int(np.char.str_len(values).max()), 1)}")
+            columns[name] = _infer_text_column(values)
+        return cls(columns, stat.st_mtime_ns, stat.st_size)
+
+    @classmethod
+    def from_json(cls, path: str) -> "ColumnarTable":
+        """Read a JSON array of flat objects; missing keys become nulls"""
+        _require_numpy()
+        stat = os.stat(path)
+        values: "OrderedDict[str, List[Any]]" = OrderedDict()
+        count = 0
+        for item in iter_json_array(path):
+            if not isinstance(item, dict):
+                raise ValueError("JSON dataset items must be objects")
+            for key in item:
+                if key not in values:
+                    values[key] = [None] * count
+            for key, column in values.items():
+                column.append(item.get(key))
+            count += 1
+        columns = OrderedDict((name, _infer_json_column(column)) for name, column in values.items())
+        return cls(columns, stat.st_mtime_ns, stat.st_size)
+
+    @classmethod
+    def load(cls, table_file: Path) -> Optional["ColumnarTable"]:
+        """Read a persisted table, or None if it is missing or unreadable"""
+        _require_numpy()
+        try:
+            with np.load(table_file, allow_pickle=False) as data:
+                meta = json.loads(str(data["__meta__"]))
+                if meta.get("version") != TABLE_VERSION:
+                    return None
+                columns = OrderedDict(
+                    (name, data[f"column_{index}"]) for index, name in enumerate(meta["columns"])
+                )
+            return cls(columns, meta["mtime_ns"], meta["size"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, table_file: Path) -> None:
+        """Persist the table atomically"""
+        table_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = table_file.with_name(f"{table_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        meta = {
+            "version": TABLE_VERSION,
+            "mtime_ns": self.mtime_ns,
+            "size": self.size,
+            "columns": list(self.columns)
+        }
+        arrays = {f"column_{index}": values for index, values in enumerate(self.columns.values())}
+        with open(tmp_file, "wb") as f:
+            np.savez(f, __meta__=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp_file, table_file)
+
+    def is_current(self, stat: os.stat_result) -> bool:
+        """Check whether the table still describes a file"""
+        return self.mtime_ns == stat.st_mtime_ns and self.size == stat.st_size
+
+    def schema(self) -> Dict[str, str]:
+        """Get the type of every column: int, float, bool or str"""
+        kinds = {"i": "int", "f": "float", "b": "bool"}
+        return {name: kinds.get(values.dtype.kind, "str") for name, values in self.columns.items()}
+
+    def filter(self, conditions: Sequence[Dict[str, Any]]) -> "np.ndarray":
+        """
+        Get the mask of rows matching every condition
+
+        Args:
+            conditions: Dicts with column, op (one of FILTER_OPERATORS) and value
+
+        Raises:
+            ValueError: If a column or operator is unknown
+        """
+        mask = np.ones(self.row_count, dtype=bool)
+        for condition in conditions:
+            values = self._column(condition.get("column"))
+            op = condition.get("op", "==")
+            value = condition.get("value")
+            if op == "==":
+                mask &= values == value
+            elif op == "!=":
+                mask &= values != value
+            elif op == "<":
+                mask &= values < value
+            elif op == "<=":
+                mask &= values <= value
+            elif op == ">":
+                mask &= values > value
+            elif op == ">=":
+                mask &= values >= value
+            elif op == "in":
+                mask &= np.isin(values, list(value))
+            elif op == "contains":
+                mask &= np.char.find(values.astype(str), str(value)) >= 0
+            else:
+                raise ValueError(f"Unknown filter operator: {op}")
+        return mask
+
+    def select(
+        self,
+        mask: Optional["np.ndarray"] = None,
+        columns: Optional[Sequence[str]] = None,
+        sort_by: Optional[str] = None,
+        descending: bool = False,
+        offset: int = 0,
+        limit: int = 100
+    ) -> Dict[str, Any]:
+        """
+        Get a page of the rows in a mask, projected onto some columns
+
+        Returns:
+            Dict with columns, rows (as dicts), total (matching rows) and next_offset
+        """
+        names = list(columns) if columns else list(self.columns)
+        for name in names:
+            self._column(name)
+        rows = np.flatnonzero(mask) if mask is not None else np.arange(self.row_count)
+        if sort_by:
+            order = np.argsort(self._column(sort_by)[rows], kind="stable")
+            rows = rows[order[::-1] if descending else order]
+        page = rows[offset:offset + limit]
+        values = [_to_python(self.columns[name][page]) for name in names]
+        return {
+            "columns": names,
+            "rows": [dict(zip(names, row)) for row in zip(*values)],
+            "total": len(rows),
+            "next_offset": offset + len(page) if offset + len(page) < len(rows) else None
+        }
+
+    def group_by(
+        self,
+        keys: Sequence[str],
+        aggregates: Dict[str, Sequence[str]],
+        mask: Optional["np.ndarray"] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Aggregate columns per distinct combination of key values
+
+        Rows are sorted by group once, then every aggregate is a single
+        reduceat over the sorted column. NaN values are skipped.
+
+        Args:
+            keys: Columns to group by
+            aggregates: Column name to a list of AGGREGATES
+            mask: Only aggregate these rows
+
+        Returns:
+            One dict per group with the key values and "<column>_<aggregate>" values
+        """
+        rows = np.flatnonzero(mask) if mask is not None else np.arange(self.row_count)
+        if not keys:
+            raise ValueError("group_by needs at least one key column")
+        if not len(rows):
+            return []
+
+        # Combine one key at a time, renumbering the combinations after each so
+        # codes stay below rows * distinct values instead of the product of all keys
+        codes = np.zeros(len(rows), dtype=np.int64)
+        for key in keys:
+            uniques, inverse = self._factorize(key)
+            _, codes = np.unique(codes * len(uniques) + inverse[rows], return_inverse=True)
+            codes = codes.reshape(-1)
+        _, first, group_ids = np.unique(codes, return_index=True, return_inverse=True)
+        order = np.argsort(group_ids, kind="stable")
+        starts = np.flatnonzero(np.r_[True, np.diff(group_ids[order]) != 0])
+
+        results: Dict[str, List[Any]] = {key: _to_python(self._column(key)[rows[first]]) for key in keys}
+        for name, functions in aggregates.items():
+            values = self._column(name)[rows][order]
+            for function in functions:
+                if function not in AGGREGATES:
+                    raise ValueError(f"Unknown aggregate: {function}")
+                results[f"{name}_{function}"] = self._aggregate(values, starts, function)
+        return [dict(zip(results, group)) for group in zip(*results.values())]
+
+    def describe(self, columns: Optional[Sequence[str]] = None, mask: Optional["np.ndarray"] = None) -> Dict[str, Any]:
+        """
+        Summarize columns: count, mean, std, min, quartiles and max of numeric
+        ones; count, unique, top and freq of the others
+        """
+        summary = {}
+        for name in columns or list(self.columns):
+            values = self._column(name)
+            if mask is not None:
+                values = values[mask]
+            if values.dtype.kind in "if":
+                numbers = values.astype(np.float64)
+                numbers = numbers[~np.isnan(numbers)]
+                if not len(numbers):
+                    summary[name] = {"count": 0}
+                    continue
+                quartiles = np.percentile(numbers, [25, 50, 75])
+                summary[name] = {
+                    "count": int(len(numbers)),
+                    "mean": float(numbers.mean()),
+                    "std": float(numbers.std(ddof=1)) if len(numbers) > 1 else 0.0,
+                    "min": float(numbers.min()),
+                    "25%": float(quartiles[0]),
+                    "50%": float(quartiles[1]),
+                    "75%": float(quartiles[2]),
+                    "max": float(numbers.max())
+                }
+            else:
+                if values.dtype.kind != "b":
+                    values = values[values != ""]
+                uniques, counts = np.unique(values, return_counts=True)
+                top = int(counts.argmax()) if len(counts) else None
+                summary[name] = {
+                    "count": int(len(values)),
+                    "unique": int(len(uniques)),
+                    "top": uniques[top].item() if top is not None else None,
+                    "freq": int(counts[top]) if top is not None else 0
+                }
+        return summary
+
+    def _factorize(self, name: str) -> Any:
+        """Get the distinct values of a column and each row's index into them, computed once"""
+        if name not in self._factors:
+            uniques, inverse = np.unique(self._column(name), return_inverse=True)
+            self._factors[name] = (uniques, inverse.reshape(-1))
+        return self._factors[name]
+
+    def _column(self, name: Optional[str]) -> "np.ndarray":
+        if name not in self.columns:
+            raise ValueError(f"Unknown column: {name}")
+        return self.columns[name]
+
+    @staticmethod
+    def _aggregate(values: "np.ndarray", starts: "np.ndarray", function: str) -> List[Any]:
+        """Reduce each group of sorted values, starting at starts"""
+        if values.dtype.kind not in "ifb":
+            if function != "count":
+                raise ValueError(f"Cannot compute {function} of a text column")
+            return _to_python(np.add.reduceat((values != "").astype(np.int64), starts))
+        if values.dtype.kind in "ib":
+            # Integer columns have no missing values, and reducing them as
+            # integers keeps sums and extremes above 2**53 exact
+            integers = values.astype(np.int64)
+            counts = np.diff(np.r_[starts, len(integers)])
+            if function == "count":
+                return _to_python(counts)
+            if function in ("sum", "mean"):
+                sums = np.add.reduceat(integers, starts)
+                return _to_python(sums if function == "sum" else sums / counts)
+            reduce = np.minimum if function == "min" else np.maximum
+            return _to_python(reduce.reduceat(integers, starts))
+        numbers = values.astype(np.float64)
+        present = ~np.isnan(numbers)
+        counts = np.add.reduceat(present.astype(np.int64), starts)
+        if function == "count":
+            return _to_python(counts)
+        if function in ("sum", "mean"):
+            sums = np.add.reduceat(np.where(present, numbers, 0.0), starts)
+            if function == "sum":
+                return _to_python(sums)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return _to_python(np.where(counts > 0, sums / np.maximum(counts, 1), np.nan))
+        if function == "min":
+            reduced = np.minimum.reduceat(np.where(present, numbers, np.inf), starts)
+        else:
+            reduced = np.maximum.reduceat(np.where(present, numbers, -np.inf), starts)
+        return _to_python(np.where(counts > 0, reduced, np.nan))
+
+
+class ColumnarStore:
+    """
+    Converts CSV and JSON datasets to columnar tables on first use, persists
+    them and keeps recent ones in memory
+
+    Tables are stored under cache_dir, named by a hash of the file's path,
+    and rebuilt when the file's mtime or size no longer match, so repeated
+    analyses of the same file skip parsing entirely.
+    """
+
+    def __init__(self, cache_dir: str, max_cached: int = 8):
+        """
+        Initialize the store
+
+        Args:
+            cache_dir: Directory persisted tables are written to
+            max_cached: Number of tables kept in memory
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_cached = max_cached
+        self.builds = 0
+        self._cache: "OrderedDict[str, ColumnarTable]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> ColumnarTable:
+        """
+        Get a current table for a .csv or .json file, converting it if needed
+
+        Raises:
+            ValueError: If the file is not a supported dataset
+        """
+        _require_numpy()
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            table = self._cache.get(path)
+            if table is not None and table.is_current(stat):
+                self._cache.move_to_end(path)
+                return table
+
+        table_file = self._table_file(path)
+        table = ColumnarTable.load(table_file)
+        if table is None or not table.is_current(stat):
+            suffix = Path(path).suffix.lower()
+            if suffix == ".csv":
+                table = ColumnarTable.from_csv(path)
+            elif suffix == ".json":
+                table = ColumnarTable.from_json(path)
+            else:
+                raise ValueError(f"Not a tabular file: {Path(path).name}")
+            self.builds += 1
+            try:
+                table.save(table_file)
+            except OSError as e:
+                logger.warning(f"Could not persist columnar table for {path}: {e}")
+
+        with self._lock:
+            self._cache[path] = table
+            self._cache.move_to_end(path)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return table
+
+    def invalidate(self, path: str) -> None:
+        """Forget the table of a file, e.g. after deleting it"""
+        path = os.path.abspath(path)
+        with self._lock:
+            self._cache.pop(path, None)
+        self._table_file(path).unlink(missing_ok=True)
+
+    def _table_file(self, path: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha256(path.encode('utf-8')).hexdigest()}.npz"
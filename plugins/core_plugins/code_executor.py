@@ -1,14 +1,193 @@
-import subprocess
+import asyncio
+import codecs
+import hashlib
+import marshal
+import re
+import signal
 import tempfile
 import os
 import ast
 import json
-from typing import Dict, Any
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional
 from plugins.base_plugin import BasePlugin
+from plugins.python_sandbox import PythonSandboxPool
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Substrings rejected in code of any language
+DANGEROUS_PATTERNS = [
+    'import os', 'import sys', 'import subprocess',
+    'open(', 'file(', 'exec(', 'eval(', 'compile(',
+    '__import__', 'getattr', 'setattr',
+    'rm ', 'del ', 'format ', 'mkfs', 'fdisk'
+]
+
+# Characters rejected in sandboxed shell scripts
+SHELL_SPECIAL_CHARACTERS = ['&', '|', '>', '<', '`', '$(']
+
+# Commands rejected in sandboxed shell scripts, matched case-insensitively
+BLOCKED_SHELL_COMMANDS = ['rm', 'mv', 'dd', 'format', 'mkfs', 'fdisk', 'shutdown', 'reboot']
+
+
+def _compile_patterns(patterns: List[str], flags: int = 0) -> "re.Pattern":
+    """
+    Combine substrings into one regex that finds every occurrence of each
+
+    The alternation sits in a lookahead, so matching advances one character
+    at a time and overlapping patterns are all reported, like a loop of
+    `in` checks but in a single pass over the code.
+    """
+    return re.compile("(?=(" + "|".join(map(re.escape, patterns)) + "))", flags)
+
+
+def _find_patterns(matcher: "re.Pattern", patterns: List[str], text: str) -> List[str]:
+    """Get the patterns occurring in text, in the order they are listed"""
+    found = {match.group(1) for match in matcher.finditer(text)}
+    # A pattern that is a prefix of another one starting at the same place
+    # loses the alternation, but then occurs inside the match
+    return [pattern for pattern in patterns if any(pattern in match for match in found)]
+
+
+_DANGEROUS_PATTERN_MATCHER = _compile_patterns(DANGEROUS_PATTERNS)
+_SHELL_SPECIAL_MATCHER = _compile_patterns(SHELL_SPECIAL_CHARACTERS)
+_BLOCKED_SHELL_MATCHER = _compile_patterns(BLOCKED_SHELL_COMMANDS)
+
+
+class _CodeCache:
+    """LRU cache of security verdicts and compiled code keyed by content hash"""
+    
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    
+    @staticmethod
+    def key(code: str, language: str) -> str:
+        """Content hash of a snippet in a language"""
+        return hashlib.sha256(f"{language}\0{code}".encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached analysis, or None if missing"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+    
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """Cache the analysis of a snippet"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class _OutputCapture:
+    """Collects a process's stdout and stderr up to a shared character budget"""
+    
+    def __init__(self, limit: int):
+        self.remaining = limit
+        self.truncated = False
+        self._chunks: Dict[str, List[str]] = {"stdout": [], "stderr": []}
+    
+    async def read(self, stream: asyncio.StreamReader, name: str) -> None:
+        """Read a stream to EOF, keeping output only while the budget lasts"""
+        # Characters split across reads are decoded once all their bytes are in
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            chunk = await stream.read(4096)
+            if not chunk:
+                self._keep(name, decoder.decode(b"", final=True))
+                return
+            if self.remaining <= 0:
+                # Keep draining so the process doesn't block on a full pipe
+                self.truncated = True
+                continue
+            self._keep(name, decoder.decode(chunk))
+    
+    def _keep(self, name: str, text: str) -> None:
+        if not text or self.remaining <= 0:
+            return
+        if len(text) > self.remaining:
+            text = text[:self.remaining]
+            self.truncated = True
+        self._chunks[name].append(text)
+        self.remaining -= len(text)
+    
+    def text(self, name: str) -> str:
+        """Get the captured output of a stream"""
+        return "".join(self._chunks[name])
+
+
+class _OutputStream:
+    """
+    Forwards a process's stdout and stderr as output events
+    
+    Output is buffered per stream until drain() is called, so the caller
+    decides how often events go out. Once `limit` bytes have been read,
+    on_limit is called to stop the process and the rest is discarded.
+    """
+    
+    def __init__(self, limit: int, on_limit: Callable[[], None]):
+        self.remaining = limit
+        self.total = 0
+        self.truncated = False
+        self._on_limit = on_limit
+        self._decoders = {
+            name: codecs.getincrementaldecoder("utf-8")(errors="replace") for name in ("stdout", "stderr")
+        }
+        self._pending: Dict[str, List[str]] = {"stdout": [], "stderr": []}
+    
+    async def read(self, stream: asyncio.StreamReader, name: str) -> None:
+        """Read a stream to EOF, buffering output while the budget lasts"""
+        decoder = self._decoders[name]
+        while True:
+            chunk = await stream.read(4096)
+            if not chunk:
+                break
+            if len(chunk) > self.remaining:
+                chunk = chunk[:self.remaining]
+                if not self.truncated:
+                    self.truncated = True
+                    self._on_limit()
+            self.remaining -= len(chunk)
+            self.total += len(chunk)
+            self._pending[name].append(decoder.decode(chunk))
+        self._pending[name].append(decoder.decode(b"", final=True))
+    
+    def drain(self) -> List[Dict[str, Any]]:
+        """Take the output buffered since the last drain as one event per stream"""
+        events = []
+        for name, parts in self._pending.items():
+            data = "".join(parts)
+            parts.clear()
+            if data:
+                events.append({"type": "output", "stream": name, "data": data})
+        return events
+
+
+def _kill_process_group(pid: int) -> None:
+    """Kill a process and every process in its group"""
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
 class CodeExecutor(BasePlugin):
     
     def __init__(self, config: Dict[str, Any] = None):
@@ -21,15 +200,42 @@ class CodeExecutor(BasePlugin):
         # Default configuration
         self.timeout = self.get_config_value("timeout", 30)
         self.max_output_length = self.get_config_value("max_output_length", 10000)
+        self.max_concurrent = self.get_config_value("max_concurrent", 4)
         self.allowed_languages = self.get_config_value("allowed_languages", ["python", "javascript", "shell"])
         
         # Security settings
         self.sandboxed = self.get_config_value("sandboxed", True)
         self.allow_network = self.get_config_value("allow_network", False)
         self.allow_file_access = self.get_config_value("allow_file_access", False)
+        
+        # Python sandbox pool: warm workers, snippets per worker before it is
+        # replaced, and address space limit of each worker
+        self.sandbox_workers = self.get_config_value("sandbox_workers", 4)
+        self.sandbox_max_tasks = self.get_config_value("sandbox_max_tasks", 1)
+        self.sandbox_memory_mb = self.get_config_value("sandbox_memory_mb", 256)
+        
+        # Streaming: seconds between output events and total output allowed
+        self.stream_flush_interval = self.get_config_value("stream_flush_interval", 0.1)
+        self.max_stream_bytes = self.get_config_value("max_stream_bytes", 1024 * 1024)
+        
+        # Security verdicts and compiled code of recently seen snippets
+        self._code_cache = _CodeCache(self.get_config_value("code_cache_size", 1024))
+        
+        # Limits how many scripts run at once
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._sandbox: Optional[PythonSandboxPool] = None
     
     async def initialize(self) -> None:
         """Initialize the code executor plugin"""
+        if "python" in self.allowed_languages:
+            self._sandbox = PythonSandboxPool(
+                size=self.sandbox_workers,
+                max_tasks=self.sandbox_max_tasks,
+                timeout=self.timeout,
+                memory_limit_mb=self.sandbox_memory_mb,
+                max_output_length=self.max_output_length
+            )
+            await self._sandbox.start()
         await super().initialize()
         logger.info("Code Executor plugin initialized")
     
@@ -43,31 +249,13 @@ class CodeExecutor(BasePlugin):
         Returns:
             Dictionary with execution results
         """
-        if not self.validate_parameters(parameters, ["code", "language"]):
-            return {
-                "success": False,
-                "error": "Missing required parameters: code and language"
-            }
+        error = self._check_request(parameters)
+        if error:
+            return error
         
         code = parameters["code"]
         language = parameters["language"].lower()
         
-        # Validate language
-        if language not in self.allowed_languages:
-            return {
-                "success": False,
-                "error": f"Language not allowed: {language}. Allowed: {self.allowed_languages}"
-            }
-        
-        # Security check
-        security_check = self._check_code_security(code, language)
-        if not security_check["allowed"]:
-            return {
-                "success": False,
-                "error": f"Security violation: {security_check['reason']}",
-                "security_check": security_check
-            }
-        
         try:
             if language == "python":
                 return await self._execute_python(code)
@@ -89,72 +277,106 @@ class CodeExecutor(BasePlugin):
                 "language": language
             }
     
+    async def stream(self, parameters: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute code, yielding its output as it is produced
+        
+        Output is sent as {"type": "output", "stream": ..., "data": ...}
+        events, at most once per stream_flush_interval seconds, followed by a
+        "result" event. A script whose output exceeds max_stream_bytes
+        (characters for Python) is stopped.
+        
+        Args:
+            parameters: Should contain 'code' and 'language'
+            
+        Yields:
+            Output events, then the result event
+        """
+        error = self._check_request(parameters)
+        if error:
+            yield {"type": "result", "result": error}
+            return
+        
+        code = parameters["code"]
+        language = parameters["language"].lower()
+        
+        if language == "python":
+            events = self._stream_python(code)
+        elif language == "javascript":
+            events = self._stream_javascript(code)
+        elif language == "shell":
+            blocked = self._check_shell_command(code)
+            if blocked:
+                yield {"type": "result", "result": blocked}
+                return
+            events = self._stream_subprocess(['/bin/sh', '-c', code], "shell")
+        else:
+            yield {"type": "result", "result": {"success": False, "error": f"Unsupported language: {language}"}}
+            return
+        
+        async for event in events:
+            yield event
+    
+    def _check_request(self, parameters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Validate parameters, language and code security, returning an error result if rejected"""
+        if not self.validate_parameters(parameters, ["code", "language"]):
+            return {
+                "success": False,
+                "error": "Missing required parameters: code and language"
+            }
+        
+        code = parameters["code"]
+        language = parameters["language"].lower()
+        
+        # Validate language
+        if language not in self.allowed_languages:
+            return {
+                "success": False,
+                "error": f"Language not allowed: {language}. Allowed: {self.allowed_languages}"
+            }
+        
+        # Security check
+        security_check = self._analyze(code, language)["security"]
+        if not security_check["allowed"]:
+            return {
+                "success": False,
+                "error": f"Security violation: {security_check['reason']}",
+                "security_check": security_check
+            }
+        return None
+    
     async def _execute_python(self, code: str) -> Dict[str, Any]:
-        """Execute Python code safely"""
+        """
+        Execute Python code in a warm sandbox worker
+        
+        The AST is checked here, then the code runs in a separate
+        resource-limited interpreter from the sandbox pool, so it can't
+        block the event loop or see the server's stdout.
+        """
         try:
-            # For safety, we'll use a restricted environment
-            restricted_globals = {
-                '__builtins__': {
-                    'print': print,
-                    'len': len,
-                    'range': range,
-                    'str': str,
-                    'int': int,
-                    'float': float,
-                    'list': list,
-                    'dict': dict,
-                    'set': set,
-                    'tuple': tuple,
-                    'bool': bool,
-                    'type': type,
-                    'isinstance': isinstance,
-                    'issubclass': issubclass,
-                    'hasattr': hasattr,
-                    'getattr': getattr,
-                    'setattr': setattr,
-                    ' ValueError': ValueError,
-                    'TypeError': TypeError,
-                    'AttributeError': AttributeError,
+            # Check for unsafe operations; the verdict is usually cached
+            analysis = self._analyze(code, "python")
+            security_check = analysis["security"]
+            if not security_check["allowed"]:
+                return {
+                    "success": False,
+                    "error": f"Python security violation: {security_check['reason']}",
+                    "security_check": security_check
                 }
-            }
             
-            # Capture stdout
-            import io
-            import sys
+            if self._sandbox is None:
+                raise RuntimeError("Code Executor is not initialized")
+            result = await self._sandbox.execute(code, analysis["bytecode"])
             
-            old_stdout = sys.stdout
-            captured_output = io.StringIO()
-            sys.stdout = captured_output
-            
-            try:
-                # Parse and compile the code first
-                parsed = ast.parse(code)
-                
-                # Check for unsafe operations
-                security_check = self._check_python_ast(parsed)
-                if not security_check["allowed"]:
-                    return {
-                        "success": False,
-                        "error": f"Python security violation: {security_check['reason']}",
-                        "security_check": security_check
-                    }
-                
-                # Execute the code
-                exec(compile(parsed, '<string>', 'exec'), restricted_globals)
-                
-                # Get the output
-                output = captured_output.getvalue()
-                
-                return {
-                    "success": True,
-                    "language": "python",
-                    "output": output,
-                    "output_length": len(output)
-                }
-                
-            finally:
-                sys.stdout = old_stdout
-                captured_output.close()
+            output = result.pop("output", "")
+            if result.pop("truncated", False):
+                output += "... [output truncated]"
+            return {
+                **result,
+                "language": "python",
+                "output": output,
+                "output_length": len(output)
+            }
                 
         except Exception as e:
             return {
@@ -173,40 +395,11 @@ class CodeExecutor(BasePlugin):
             
             try:
                 # Execute with Node.js
-                result = subprocess.run(
-                    ['node', temp_file],
-                    capture_output=True,
-                    text=True,
-                    timeout=self.timeout
-                )
-                
-                output = result.stdout
-                if result.stderr:
-                    output += f"\nErrors:\n{result.stderr}"
-                
-                # Limit output length
-                if len(output) > self.max_output_length:
-                    output = output[:self.max_output_length] + "... [output truncated]"
-                
-                return {
-                    "success": result.returncode == 0,
-                    "language": "javascript",
-                    "output": output,
-                    "return_code": result.returncode,
-                    "output_length": len(output)
-                }
-                
+                return await self._run_subprocess(['node', temp_file], "javascript")
             finally:
                 # Clean up temporary file
                 os.unlink(temp_file)
                 
-        except subprocess.TimeoutExpired:
-            return {
-                "success": False,
-                "error": "Execution timed out",
-                "language": "javascript",
-                "timeout": self.timeout
-            }
         except Exception as e:
             return {
                 "success": False,
@@ -218,48 +411,13 @@ class CodeExecutor(BasePlugin):
         """Execute shell commands"""
         try:
             # Security check for shell commands
-            if self.sandboxed:
-                blocked_commands = ['rm', 'mv', 'dd', 'format', 'mkfs', 'fdisk', 'shutdown', 'reboot']
-                for cmd in blocked_commands:
-                    if cmd in code.lower():
-                        return {
-                            "success": False,
-                            "error": f"Blocked command: {cmd}",
-                            "language": "shell"
-                        }
+            blocked = self._check_shell_command(code)
+            if blocked:
+                return blocked
             
             # Execute the command
-            result = subprocess.run(
-                code,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=self.timeout
-            )
-            
-            output = result.stdout
-            if result.stderr:
-                output += f"\nErrors:\n{result.stderr}"
-            
-            # Limit output length
-            if len(output) > self.max_output_length:
-                output = output[:self.max_output_length] + "... [output truncated]"
+            return await self._run_subprocess(['/bin/sh', '-c', code], "shell")
             
-            return {
-                "success": result.returncode == 0,
-                "language": "shell",
-                "output": output,
-                "return_code": result.returncode,
-                "output_length": len(output)
-            }
-            
-        except subprocess.TimeoutExpired:
-            return {
-                "success": False,
-                "error": "Execution timed out",
-                "language": "shell",
-                "timeout": self.timeout
-            }
         except Exception as e:
             return {
                 "success": False,
@@ -267,26 +425,233 @@ class CodeExecutor(BasePlugin):
                 "language": "shell"
             }
     
-    def _check_code_security(self, code: str, language: str) -> Dict[str, Any]:
-        """Check code for security violations"""
+    def _check_shell_command(self, code: str) -> Optional[Dict[str, Any]]:
+        """Return an error result if a sandboxed shell script uses a blocked command"""
+        if self.sandboxed:
+            blocked = _find_patterns(_BLOCKED_SHELL_MATCHER, BLOCKED_SHELL_COMMANDS, code.lower())
+            if blocked:
+                return {
+                    "success": False,
+                    "error": f"Blocked command: {blocked[0]}",
+                    "language": "shell"
+                }
+        return None
+    
+    async def _stream_python(self, code: str) -> AsyncIterator[Dict[str, Any]]:
+        """Run Python code in a sandbox worker, yielding its output as it is printed"""
+        analysis = self._analyze(code, "python")
+        security_check = analysis["security"]
+        if not security_check["allowed"]:
+            yield {"type": "result", "result": {
+                "success": False,
+                "error": f"Python security violation: {security_check['reason']}",
+                "security_check": security_check
+            }}
+            return
+        if self._sandbox is None:
+            raise RuntimeError("Code Executor is not initialized")
+        
+        async for message in self._sandbox.stream(
+            code, self.stream_flush_interval, self.max_stream_bytes, analysis["bytecode"]
+        ):
+            output = message.pop("output", "")
+            if output:
+                yield {"type": "output", "stream": "stdout", "data": output}
+            if "success" in message:
+                yield {"type": "result", "result": {**message, "language": "python"}}
+    
+    async def _stream_javascript(self, code: str) -> AsyncIterator[Dict[str, Any]]:
+        """Run JavaScript with Node.js, yielding its output as it is produced"""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.js', delete=False) as f:
+            f.write(code)
+            temp_file = f.name
+        try:
+            async for event in self._stream_subprocess(['node', temp_file], "javascript"):
+                yield event
+        finally:
+            os.unlink(temp_file)
+    
+    async def _stream_subprocess(self, args: List[str], language: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run a command, yielding its stdout and stderr as they are produced
+        
+        Output is forwarded at most once per stream_flush_interval, so a
+        chatty script doesn't produce an event per write, and only what
+        arrived since the last flush is held in memory. Reaching
+        max_stream_bytes or the timeout kills the command's process group.
+        
+        Args:
+            args: Program and arguments to run
+            language: Language name reported in the result
+            
+        Yields:
+            Output events, then the result event
+        """
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True
+            )
+            output = _OutputStream(self.max_stream_bytes, lambda: _kill_process_group(process.pid))
+            reading = asyncio.ensure_future(asyncio.gather(
+                output.read(process.stdout, "stdout"),
+                output.read(process.stderr, "stderr"),
+                process.wait()
+            ))
+            deadline = loop.time() + self.timeout
+            timed_out = False
+            try:
+                while not reading.done():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        timed_out = True
+                        break
+                    await asyncio.wait([reading], timeout=min(self.stream_flush_interval, remaining))
+                    for event in output.drain():
+                        yield event
+            finally:
+                # Also reached when the client goes away mid-stream
+                if process.returncode is None:
+                    _kill_process_group(process.pid)
+                await reading
+        
+        for event in output.drain():
+            yield event
+        
+        if timed_out:
+            result = {"success": False, "error": "Execution timed out", "timeout": self.timeout}
+        elif output.truncated:
+            result = {"success": False, "error": f"Output limit of {self.max_stream_bytes} bytes exceeded"}
+        else:
+            result = {"success": process.returncode == 0}
+        yield {"type": "result", "result": {
+            **result,
+            "language": language,
+            "return_code": process.returncode,
+            "output_bytes": output.total,
+            "truncated": output.truncated
+        }}
+    
+    async def _run_subprocess(self, args: List[str], language: str) -> Dict[str, Any]:
+        """
+        Run a command without blocking the event loop
+        
+        stdout and stderr are read as they are produced, keeping at most
+        max_output_length characters between them and discarding the rest.
+        The command runs in its own process group, so a timeout kills any
+        children it started too.
+        
+        Args:
+            args: Program and arguments to run
+            language: Language name reported in the result
+            
+        Returns:
+            Dictionary with execution results
+        """
+        async with self._semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True
+            )
+            capture = _OutputCapture(self.max_output_length)
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(
+                        capture.read(process.stdout, "stdout"),
+                        capture.read(process.stderr, "stderr"),
+                        process.wait()
+                    ),
+                    self.timeout
+                )
+            except asyncio.TimeoutError:
+                return {
+                    "success": False,
+                    "error": "Execution timed out",
+                    "language": language,
+                    "timeout": self.timeout
+                }
+            finally:
+                if process.returncode is None:
+                    _kill_process_group(process.pid)
+                    await process.wait()
+        
+        output = capture.text("stdout")
+        errors = capture.text("stderr")
+        if errors:
+            output += f"\nErrors:\n{errors}"
+        
+        # Limit output length
+        if capture.truncated:
+            output += "... [output truncated]"
+        
+        return {
+            "success": process.returncode == 0,
+            "language": language,
+            "output": output,
+            "return_code": process.returncode,
+            "output_length": len(output)
+        }
+    
+    def _analyze(self, code: str, language: str) -> Dict[str, Any]:
+        """
+        Get the security verdict and, for Python, the compiled code of a snippet
+        
+        Results are cached by content hash, so a resubmitted snippet is
+        parsed, checked and compiled only once. Python code is parsed a
+        single time for both the AST check and compilation; the compiled
+        code is marshalled so sandbox workers can load it without compiling.
+        
+        Returns:
+            Dict with "security" (the verdict) and "bytecode" (or None)
+        """
+        key = _CodeCache.key(code, language)
+        entry = self._code_cache.get(key)
+        if entry is not None:
+            return entry
+        
+        tree = None
+        if language == "python":
+            try:
+                tree = ast.parse(code)
+            except SyntaxError:
+                pass
+        security = self._check_code_security(code, language, tree)
+        
+        bytecode = None
+        if tree is not None and security["allowed"]:
+            try:
+                bytecode = marshal.dumps(compile(tree, '<string>', 'exec'))
+            except SyntaxError:
+                # Reported by the sandbox worker when it compiles the source
+                pass
+        
+        entry = {"security": security, "bytecode": bytecode}
+        self._code_cache.put(key, entry)
+        return entry
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get hit and miss counts of the security verdict and compiled code cache"""
+        return self._code_cache.get_stats()
+    
+    def _check_code_security(self, code: str, language: str, tree: Optional[ast.AST] = None) -> Dict[str, Any]:
+        """Check code for security violations, reusing an already parsed Python AST"""
         violations = []
         
         # Common dangerous patterns
-        dangerous_patterns = [
-            'import os', 'import sys', 'import subprocess',
-            'open(', 'file(', 'exec(', 'eval(', 'compile(',
-            '__import__', 'getattr', 'setattr',
-            'rm ', 'del ', 'format ', 'mkfs', 'fdisk'
-        ]
-        
-        for pattern in dangerous_patterns:
-            if pattern in code:
-                violations.append(f"Contains dangerous pattern: {pattern}")
+        for pattern in _find_patterns(_DANGEROUS_PATTERN_MATCHER, DANGEROUS_PATTERNS, code):
+            violations.append(f"Contains dangerous pattern: {pattern}")
         
         # Language-specific checks
         if language == "python":
             try:
-                parsed = ast.parse(code)
+                parsed = tree if tree is not None else ast.parse(code)
                 py_violations = self._check_python_ast(parsed)
                 violations.extend(py_violations.get('violations', []))
             except:
@@ -294,10 +659,8 @@ class CodeExecutor(BasePlugin):
         
         elif language == "shell" and self.sandboxed:
             # Additional shell-specific checks
-            shell_dangerous = ['&', '|', '>', '<', '`', '$(']
-            for pattern in shell_dangerous:
-                if pattern in code:
-                    violations.append(f"Contains shell special character: {pattern}")
+            for pattern in _find_patterns(_SHELL_SPECIAL_MATCHER, SHELL_SPECIAL_CHARACTERS, code):
+                violations.append(f"Contains shell special character: {pattern}")
         
         if violations:
             return {
@@ -342,7 +705,14 @@ class CodeExecutor(BasePlugin):
         else:
             return {"allowed": True}
     
+    def get_sandbox_metrics(self) -> Dict[str, Any]:
+        """Get occupancy and queueing metrics of the Python sandbox pool"""
+        return self._sandbox.get_metrics() if self._sandbox else {}
+    
     async def cleanup(self) -> None:
         """Clean up resources"""
+        if self._sandbox is not None:
+            await self._sandbox.close()
+            self._sandbox = None
         await super().cleanup()
         logger.info("Code Executor plugin cleaned up")
\ No newline at end of file
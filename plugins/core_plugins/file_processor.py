@@ -3,12 +3,17 @@ File processor plugin for AgentK - Handles file operations
 """
 
 import aiofiles
+import asyncio
 import os
 import json
 import csv
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from plugins.base_plugin import BasePlugin
+from plugins.columnar import ColumnarStore
+from plugins.file_streams import CHUNK_SIZE, count_text, read_csv_page, read_json_page
+from plugins.line_index import LineIndexStore, read_byte_range
+from plugins.text_index import get_text_index
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,12 +34,32 @@ class FileProcessor(BasePlugin):
         self.base_path = self.get_config_value("base_path", "./data/files")
         self.allowed_extensions = self.get_config_value("allowed_extensions", [".txt", ".json", ".csv", ".md"])
         
+        # Larger files must be read with the paginated or streaming operations
+        self.max_read_bytes = self.get_config_value("max_read_bytes", 50 * 1024 * 1024)
+        self.chunk_size = self.get_config_value("chunk_size", CHUNK_SIZE)
+        
+        # Persisted line offsets for range reads, rebuilt when a file changes
+        self.line_indexes = LineIndexStore(self.get_config_value("index_path", "./data/file_index"))
+        
+        # CSV and JSON datasets converted to typed columns on first query
+        self.datasets = ColumnarStore(self.get_config_value("columnar_cache_path", "./data/columnar_cache"))
+        self.max_query_rows = self.get_config_value("max_query_rows", 1000)
+        
         # Create base directory if it doesn't exist
         Path(self.base_path).mkdir(parents=True, exist_ok=True)
+        
+        # Full-text index of the stored files, updated as they're written and deleted.
+        # The index is shared with the uploads and other processors, so the root is
+        # named after this processor's base path
+        self.text_index = get_text_index(self.get_config_value("search_index_path"))
+        self.index_root = f"files:{os.path.abspath(self.base_path)}"
+        self.text_index.add_root(self.index_root, self.base_path)
     
     async def initialize(self) -> None:
         """Initialize the file processor plugin"""
         await super().initialize()
+        # Pick up files changed while the plugin wasn't running
+        await asyncio.to_thread(self.text_index.sync, self.index_root)
         logger.info("File Processor plugin initialized")
     
     async def execute(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
@@ -66,6 +91,18 @@ class FileProcessor(BasePlugin):
                 return await self._delete_file(parameters)
             elif operation == "process":
                 return await self._process_file(parameters)
+            elif operation == "read_rows":
+                return await self._read_rows(parameters)
+            elif operation == "read_items":
+                return await self._read_items(parameters)
+            elif operation == "read_range":
+                return await self._read_range(parameters)
+            elif operation == "search":
+                return await self._search_files(parameters)
+            elif operation == "query":
+                return await self._query_dataset(parameters)
+            elif operation == "describe":
+                return await self._describe_dataset(parameters)
             else:
                 return {
                     "success": False,
@@ -104,6 +141,16 @@ class FileProcessor(BasePlugin):
                 "error": f"File not found: {filename}"
             }
         
+        size = os.path.getsize(filepath)
+        if size > self.max_read_bytes:
+            return {
+                "success": False,
+                "error": f"File too large to read at once ({size} bytes, limit {self.max_read_bytes}); "
+                         "use read_rows, read_items or a streamed read",
+                "filename": filename,
+                "size": size
+            }
+        
         try:
             async with aiofiles.open(filepath, 'r', encoding='utf-8') as f:
                 content = await f.read()
@@ -158,6 +205,7 @@ class FileProcessor(BasePlugin):
             
             async with aiofiles.open(filepath, 'w', encoding='utf-8') as f:
                 await f.write(content)
+            self.text_index.schedule(filepath)
             
             return {
                 "success": True,
@@ -236,6 +284,9 @@ class FileProcessor(BasePlugin):
         
         try:
             os.remove(filepath)
+            self.line_indexes.invalidate(filepath)
+            self.datasets.invalidate(filepath)
+            self.text_index.schedule(filepath)
             return {
                 "success": True,
                 "filename": filename,
@@ -259,7 +310,27 @@ class FileProcessor(BasePlugin):
         
         filename = parameters["filename"]
         process_type = parameters["process_type"]
-        filepath = self._get_full_path(filename)
+        
+        if process_type == "word_count":
+            # Counted in one streaming pass, without holding the file
+            filepath, error = self._get_existing_file(parameters)
+            if error:
+                return error
+            try:
+                counts = await asyncio.to_thread(count_text, filepath, self.chunk_size)
+            except Exception as e:
+                return {
+                    "success": False,
+                    "error": f"File processing failed: {str(e)}",
+                    "filename": filename,
+                    "process_type": process_type
+                }
+            return {
+                "success": True,
+                "filename": filename,
+                "process_type": process_type,
+                **counts
+            }
         
         # First read the file
         read_result = await self._read_file({"filename": filename})
@@ -279,16 +350,6 @@ class FileProcessor(BasePlugin):
                     "length": len(content)
                 }
                 
-            elif process_type == "word_count":
-                words = content.split()
-                return {
-                    "success": True,
-                    "filename": filename,
-                    "process_type": process_type,
-                    "word_count": len(words),
-                    "character_count": len(content)
-                }
-                
             else:
                 return {
                     "success": False,
@@ -304,6 +365,288 @@ class FileProcessor(BasePlugin):
                 "process_type": process_type
             }
     
+    async def _read_rows(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Read a page of CSV rows, given by offset and limit"""
+        filepath, error = self._get_existing_file(parameters)
+        if error:
+            return error
+        
+        offset = int(parameters.get("offset", 0))
+        limit = int(parameters.get("limit", 100))
+        try:
+            page = await asyncio.to_thread(read_csv_page, filepath, offset, limit)
+            return {"success": True, "filename": parameters["filename"], **page}
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Failed to read rows: {str(e)}",
+                "filename": parameters["filename"]
+            }
+    
+    async def _read_items(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Read a page of items from a JSON array file, given by offset and limit"""
+        filepath, error = self._get_existing_file(parameters)
+        if error:
+            return error
+        
+        offset = int(parameters.get("offset", 0))
+        limit = int(parameters.get("limit", 100))
+        try:
+            page = await asyncio.to_thread(read_json_page, filepath, offset, limit)
+            return {"success": True, "filename": parameters["filename"], **page}
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Failed to read items: {str(e)}",
+                "filename": parameters["filename"]
+            }
+    
+    async def _read_range(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Read a range of lines or bytes without loading the rest of the file
+        
+        Lines are given by start_line and end_line (1-based, inclusive) and
+        found through the file's line index; bytes by start_byte and
+        end_byte (end exclusive). Either way the file is memory-mapped and
+        only the range is read.
+        """
+        filepath, error = self._get_existing_file(parameters)
+        if error:
+            return error
+        filename = parameters["filename"]
+        
+        try:
+            if "start_line" in parameters:
+                start = int(parameters["start_line"])
+                end = int(parameters.get("end_line", start))
+                if start < 1 or end < start:
+                    return {"success": False, "error": "Invalid line range", "filename": filename}
+                return await asyncio.to_thread(self._read_line_range, filepath, filename, start, end)
+            
+            if "start_byte" in parameters:
+                start = int(parameters["start_byte"])
+                end = int(parameters.get("end_byte", start + self.chunk_size))
+                if start < 0 or end < start:
+                    return {"success": False, "error": "Invalid byte range", "filename": filename}
+                if end - start > self.max_read_bytes:
+                    return {
+                        "success": False,
+                        "error": f"Range larger than {self.max_read_bytes} bytes",
+                        "filename": filename
+                    }
+                data = await asyncio.to_thread(read_byte_range, filepath, start, end)
+                return {
+                    "success": True,
+                    "filename": filename,
+                    "start_byte": start,
+                    "end_byte": start + len(data),
+                    "content": data.decode("utf-8", errors="replace"),
+                    "file_size": os.path.getsize(filepath)
+                }
+            
+            return {
+                "success": False,
+                "error": "Missing range: start_line or start_byte",
+                "filename": filename
+            }
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Failed to read range: {str(e)}",
+                "filename": filename
+            }
+    
+    async def _search_files(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Find the lines of stored files matching a query
+        
+        The query's words must all occur in a line; "quoted" parts must occur
+        as phrases and a trailing * matches words by prefix. Files are indexed
+        in the background, so a file written moments ago may not match yet.
+        """
+        if not self.validate_parameters(parameters, ["query"]):
+            return {
+                "success": False,
+                "error": "Missing required parameter: query"
+            }
+        
+        query = parameters["query"]
+        limit = int(parameters.get("limit", 20))
+        try:
+            hits = await asyncio.to_thread(self.text_index.search, query, limit, self.index_root)
+            return {
+                "success": True,
+                "query": query,
+                "results": [
+                    {"filename": hit["path"], "line": hit["line"], "text": hit["text"]}
+                    for hit in hits
+                ],
+                "count": len(hits)
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Search failed: {str(e)}",
+                "query": query
+            }
+    
+    async def _query_dataset(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Filter, project, sort or group a CSV or JSON dataset
+        
+        Parameters, all optional besides filename:
+            where: List of {"column", "op", "value"} conditions, all of which must hold
+            columns: Columns to return
+            sort_by, descending: Order of the returned rows
+            group_by: Key columns; rows are then aggregated per group
+            aggregate: Column to a list of count, sum, mean, min and max
+            offset, limit: Page of rows or groups to return; limit is capped at max_query_rows
+        
+        The file is converted to typed columns on first use and the table
+        is cached, so later queries skip parsing.
+        """
+        filepath, error = self._get_existing_file(parameters)
+        if error:
+            return error
+        filename = parameters["filename"]
+        
+        def query() -> Dict[str, Any]:
+            table = self.datasets.get(filepath)
+            mask = table.filter(parameters.get("where", []))
+            offset = max(int(parameters.get("offset", 0)), 0)
+            limit = min(max(int(parameters.get("limit", 100)), 0), self.max_query_rows)
+            if parameters.get("group_by"):
+                keys = parameters["group_by"]
+                groups = table.group_by([keys] if isinstance(keys, str) else keys, parameters.get("aggregate", {}), mask)
+                return {
+                    "groups": groups[offset:offset + limit],
+                    "total": len(groups),
+                    "next_offset": offset + limit if offset + limit < len(groups) else None
+                }
+            return table.select(
+                mask,
+                parameters.get("columns"),
+                parameters.get("sort_by"),
+                bool(parameters.get("descending", False)),
+                offset,
+                limit
+            )
+        
+        try:
+            result = await asyncio.to_thread(query)
+            return {"success": True, "filename": filename, **result}
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Query failed: {str(e)}",
+                "filename": filename
+            }
+    
+    async def _describe_dataset(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Summarize the columns of a CSV or JSON dataset, optionally of the rows matching where"""
+        filepath, error = self._get_existing_file(parameters)
+        if error:
+            return error
+        filename = parameters["filename"]
+        
+        def describe() -> Dict[str, Any]:
+            table = self.datasets.get(filepath)
+            mask = table.filter(parameters["where"]) if parameters.get("where") else None
+            return {
+                "rows": table.row_count if mask is None else int(mask.sum()),
+                "schema": table.schema(),
+                "summary": table.describe(parameters.get("columns"), mask)
+            }
+        
+        try:
+            result = await asyncio.to_thread(describe)
+            return {"success": True, "filename": filename, **result}
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Describe failed: {str(e)}",
+                "filename": filename
+            }
+    
+    def _read_line_range(self, filepath: str, filename: str, start: int, end: int) -> Dict[str, Any]:
+        """Read lines start to end (1-based, inclusive) through the file's line index"""
+        index = self.line_indexes.get(filepath)
+        lines = index.read_lines(filepath, start - 1, end, self.max_read_bytes)
+        return {
+            "success": True,
+            "filename": filename,
+            "start_line": start,
+            "end_line": start + len(lines) - 1,
+            "lines": lines,
+            "total_lines": index.line_count
+        }
+    
+    async def stream(self, parameters: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute a file operation, streaming "read" as chunks
+        
+        A streamed read yields {"type": "chunk", "data": ...} events of at
+        most chunk_size characters, so files of any size can be read. Other
+        operations yield their result once.
+        """
+        if parameters.get("operation") != "read":
+            async for event in super().stream(parameters):
+                yield event
+            return
+        
+        filepath, error = self._get_existing_file(parameters)
+        if error:
+            yield {"type": "result", "result": error}
+            return
+        
+        characters = 0
+        try:
+            async with aiofiles.open(filepath, 'r', encoding='utf-8') as f:
+                while True:
+                    chunk = await f.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    characters += len(chunk)
+                    yield {"type": "chunk", "data": chunk}
+        except Exception as e:
+            yield {"type": "result", "result": {
+                "success": False,
+                "error": f"Failed to read file: {str(e)}",
+                "filename": parameters["filename"]
+            }}
+            return
+        yield {"type": "result", "result": {
+            "success": True,
+            "filename": parameters["filename"],
+            "size": characters
+        }}
+    
+    def _get_existing_file(self, parameters: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Resolve the 'filename' parameter to a path, or an error result if it can't be read"""
+        if not self.validate_parameters(parameters, ["filename"]):
+            return "", {
+                "success": False,
+                "error": "Missing required parameter: filename"
+            }
+        
+        filename = parameters["filename"]
+        filepath = self._get_full_path(filename)
+        
+        # Security check
+        if not self._is_valid_path(filepath):
+            return "", {
+                "success": False,
+                "error": "Invalid file path"
+            }
+        
+        if not os.path.isfile(filepath):
+            return "", {
+                "success": False,
+                "error": f"File not found: {filename}"
+            }
+        return filepath, None
+    
     def _get_full_path(self, filename: str) -> str:
         """Get the full path for a file"""
         return os.path.join(self.base_path, filename)
@@ -15,6 +15,9 @@ class ImageGenerator(BasePlugin):
     Image generator plugin that creates images from text descriptions
     """
     
+    # PIL rendering and filters are CPU-bound
+    execution_mode = "process"
+    
     def __init__(self, config: Dict[str, Any] = None):
         super().__init__(config)
         self.name = "Image Generator"
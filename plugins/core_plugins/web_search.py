@@ -15,6 +15,9 @@ class WebSearch(BasePlugin):
     Web search plugin that provides internet search capabilities
     """
     
+    # Research workflows use web search on almost every run
+    eager = True
+    
     def __init__(self, config: Dict[str, Any] = None):
         super().__init__(config)
         self.name = "Web Search"
@@ -0,0 +1,163 @@
+"""
+File streams for AgentK - Reads large files in bounded memory
+"""
+
+import csv
+import itertools
+import json
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Characters read per chunk; peak memory is a small multiple of this
+CHUNK_SIZE = 1024 * 1024
+
+_decoder = json.JSONDecoder()
+
+# Characters that may continue a JSON number
+_NUMBER_CHARACTERS = frozenset("0123456789.eE+-")
+
+
+def iter_text_chunks(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Yield a UTF-8 text file in chunks of at most chunk_size characters"""
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def count_text(path: str, chunk_size: int = CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Count the lines, words and characters of a text file in one pass
+
+    Words are runs of non-whitespace, as with str.split(); a word cut in two
+    by a chunk boundary is counted once.
+
+    Returns:
+        Dict with line_count, word_count and character_count
+    """
+    lines = words = characters = 0
+    last = ""
+    for chunk in iter_text_chunks(path, chunk_size):
+        lines += chunk.count("\n")
+        words += len(chunk.split())
+        if last and not last.isspace() and not chunk[0].isspace():
+            words -= 1
+        characters += len(chunk)
+        last = chunk[-1]
+    if last and last != "\n":
+        lines += 1
+    return {"line_count": lines, "word_count": words, "character_count": characters}
+
+
+def _page(items: Iterator[Any], offset: int, limit: int) -> Tuple[List[Any], bool]:
+    """Take items [offset, offset + limit) and whether more follow"""
+    page = list(itertools.islice(items, offset, offset + limit + 1))
+    return page[:limit], len(page) > limit
+
+
+def read_csv_page(path: str, offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+    """
+    Read a page of CSV rows as dicts without loading the rest of the file
+
+    Returns:
+        Dict with columns, rows, offset and next_offset (None on the last page)
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        rows, more = _page(reader, offset, limit)
+        return {
+            "columns": reader.fieldnames or [],
+            "rows": rows,
+            "offset": offset,
+            "next_offset": offset + len(rows) if more else None
+        }
+
+
+def iter_json_array(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yield the items of a top-level JSON array one at a time
+
+    Only the item being decoded and one chunk of lookahead are held in
+    memory, so arrays much larger than RAM can be scanned.
+
+    Raises:
+        ValueError: If the file is not a JSON array or is malformed
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = ""
+        position = 0
+        eof = False
+
+        def fill() -> bool:
+            """Append the next chunk, dropping what has been consumed"""
+            nonlocal buffer, position, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+                return False
+            buffer = buffer[position:] + chunk
+            position = 0
+            return True
+
+        def next_token() -> Optional[str]:
+            """Skip whitespace and return the next character without consuming it"""
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in " \t\r\n":
+                    position += 1
+                if position < len(buffer):
+                    return buffer[position]
+                if not fill():
+                    return None
+
+        if next_token() != "[":
+            raise ValueError("JSON file does not contain an array")
+        position += 1
+        if next_token() == "]":
+            return
+
+        while True:
+            if next_token() is None:
+                raise ValueError("Unterminated JSON array")
+            while True:
+                try:
+                    item, end = _decoder.raw_decode(buffer, position)
+                    # A number cut by the end of the buffer parses as a
+                    # shorter one, so only accept a value once the
+                    # character after it can't continue it
+                    if eof or (end < len(buffer) and buffer[end] not in _NUMBER_CHARACTERS):
+                        break
+                except json.JSONDecodeError:
+                    if eof:
+                        raise ValueError("Malformed JSON array")
+                if not fill():
+                    continue
+            position = end
+            yield item
+
+            token = next_token()
+            if token == ",":
+                position += 1
+            elif token == "]":
+                return
+            else:
+                raise ValueError("Malformed JSON array")
+
+
+def read_json_page(path: str, offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+    """
+    Read a page of items from a top-level JSON array
+
+    Returns:
+        Dict with items, offset and next_offset (None on the last page)
+    """
+    items, more = _page(iter_json_array(path), offset, limit)
+    return {
+        "items": items,
+        "offset": offset,
+        "next_offset": offset + len(items) if more else None
+    }
@@ -0,0 +1,210 @@
+"""
+Line index for AgentK - Random access to lines and byte ranges of large files
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+INDEX_MAGIC = b"LIDX"
+
+# magic, version, file mtime_ns, file size, stride, line count
+HEADER = struct.Struct("<4sIqQQQ")
+
+# Lines between recorded offsets; a lookup scans at most this many lines
+DEFAULT_STRIDE = 1024
+
+
+def _map(f) -> Optional[mmap.mmap]:
+    """Map a file read-only, or None if it is empty (which can't be mapped)"""
+    size = os.fstat(f.fileno()).st_size
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+
+def read_byte_range(path: str, start: int, end: int) -> bytes:
+    """Read bytes [start, end) of a file through a memory map"""
+    with open(path, "rb") as f:
+        mm = _map(f)
+        if mm is None:
+            return b""
+        with mm:
+            return mm[max(start, 0):max(end, 0)]
+
+
+class LineIndex:
+    """
+    Sparse index of where lines start in a file
+
+    The byte offset of every stride-th line is recorded, so the index of a
+    file with millions of lines stays small. Finding a line jumps to the
+    nearest recorded offset and scans forward over fewer than stride lines,
+    so reading a range costs time proportional to the range, not the file.
+    """
+
+    def __init__(self, mtime_ns: int, size: int, stride: int, line_count: int, offsets: array):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.stride = stride
+        self.line_count = line_count
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, path: str, stride: int = DEFAULT_STRIDE) -> "LineIndex":
+        """Scan a file once and record the offset of every stride-th line"""
+        stat = os.stat(path)
+        offsets = array("Q", [0])
+        line_count = 0
+        with open(path, "rb") as f:
+            mm = _map(f)
+            if mm is not None:
+                with mm:
+                    position = 0
+                    while True:
+                        position = mm.find(b"\n", position)
+                        if position < 0:
+                            break
+                        position += 1
+                        line_count += 1
+                        if line_count % stride == 0:
+                            offsets.append(position)
+                    # A last line without a newline still counts
+                    if mm[-1:] != b"\n":
+                        line_count += 1
+        return cls(stat.st_mtime_ns, stat.st_size, stride, line_count, offsets)
+
+    @classmethod
+    def load(cls, index_file: Path) -> Optional["LineIndex"]:
+        """Read a persisted index, or None if it is missing or unreadable"""
+        try:
+            data = index_file.read_bytes()
+            magic, version, mtime_ns, size, stride, line_count = HEADER.unpack_from(data)
+            if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                return None
+            offsets = array("Q")
+            offsets.frombytes(data[HEADER.size:])
+            return cls(mtime_ns, size, stride, line_count, offsets)
+        except (OSError, struct.error, ValueError):
+            return None
+
+    def save(self, index_file: Path) -> None:
+        """Persist the index atomically"""
+        index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = index_file.with_name(f"{index_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        header = HEADER.pack(INDEX_MAGIC, INDEX_VERSION, self.mtime_ns, self.size, self.stride, self.line_count)
+        tmp_file.write_bytes(header + self.offsets.tobytes())
+        os.replace(tmp_file, index_file)
+
+    def is_current(self, stat: os.stat_result) -> bool:
+        """Check whether the index still describes a file"""
+        return self.mtime_ns == stat.st_mtime_ns and self.size == stat.st_size
+
+    def line_span(self, mm: mmap.mmap, start: int, end: int) -> Tuple[int, int]:
+        """Get the byte span of lines [start, end), 0-based"""
+        start = min(max(start, 0), self.line_count)
+        end = min(max(end, start), self.line_count)
+        checkpoint = min(start // self.stride, len(self.offsets) - 1)
+        first = self._skip_lines(mm, self.offsets[checkpoint], start - checkpoint * self.stride)
+        return first, self._skip_lines(mm, first, end - start)
+
+    def read_lines(self, path: str, start: int, end: int, max_bytes: Optional[int] = None) -> List[str]:
+        """
+        Read lines [start, end), 0-based, without their line endings
+
+        Raises:
+            ValueError: If the lines span more than max_bytes
+        """
+        with open(path, "rb") as f:
+            mm = _map(f)
+            if mm is None:
+                return []
+            with mm:
+                first, last = self.line_span(mm, start, end)
+                if max_bytes is not None and last - first > max_bytes:
+                    raise ValueError(f"Range larger than {max_bytes} bytes")
+                text = mm[first:last].decode("utf-8", errors="replace")
+        lines = text.split("\n")
+        if text.endswith("\n") or not text:
+            lines.pop()
+        return [line[:-1] if line.endswith("\r") else line for line in lines]
+
+    @staticmethod
+    def _skip_lines(mm: mmap.mmap, position: int, count: int) -> int:
+        """Get the offset count lines after position, or the end of the file"""
+        for _ in range(count):
+            position = mm.find(b"\n", position)
+            if position < 0:
+                return len(mm)
+            position += 1
+        return position
+
+
+class LineIndexStore:
+    """
+    Builds line indexes on first use, persists them and keeps recent ones in memory
+
+    Indexes are stored under index_dir, named by a hash of the file's path,
+    and rebuilt when the file's mtime or size no longer match.
+    """
+
+    def __init__(self, index_dir: str, stride: int = DEFAULT_STRIDE, max_cached: int = 64):
+        """
+        Initialize the store
+
+        Args:
+            index_dir: Directory persisted indexes are written to
+            stride: Lines between recorded offsets in new indexes
+            max_cached: Number of indexes kept in memory
+        """
+        self.index_dir = Path(index_dir)
+        self.stride = stride
+        self.max_cached = max_cached
+        self.builds = 0
+        self._cache: "OrderedDict[str, LineIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> LineIndex:
+        """Get a current line index for a file, building it if needed"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            index = self._cache.get(path)
+            if index is not None and index.is_current(stat):
+                self._cache.move_to_end(path)
+                return index
+
+        index_file = self._index_file(path)
+        index = LineIndex.load(index_file)
+        if index is None or not index.is_current(stat):
+            index = LineIndex.build(path, self.stride)
+            self.builds += 1
+            try:
+                index.save(index_file)
+            except OSError as e:
+                logger.warning(f"Could not persist line index for {path}: {e}")
+
+        with self._lock:
+            self._cache[path] = index
+            self._cache.move_to_end(path)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return index
+
+    def invalidate(self, path: str) -> None:
+        """Forget the index of a file, e.g. after deleting it"""
+        path = os.path.abspath(path)
+        with self._lock:
+            self._cache.pop(path, None)
+        self._index_file(path).unlink(missing_ok=True)
+
+    def _index_file(self, path: str) -> Path:
+        return self.index_dir / f"{hashlib.sha256(path.encode('utf-8')).hexdigest()}.lines"
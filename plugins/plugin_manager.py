@@ -0,0 +1,353 @@
+import asyncio
+import importlib
+import inspect
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from plugins.base_plugin import BasePlugin
+from plugins.capability_index import CapabilityIndex
+from plugins.plugin_manifest import ManifestIndex, PluginManifest, get_manifest_index
+from plugins.plugin_workers import EXECUTION_MODES, ProcessPluginPool, run_in_thread
+
+logger = logging.getLogger(__name__)
+
+class PluginManager:
+    """
+    Discovers plugins at startup and loads them on first use
+
+    Startup only parses the plugin sources into manifests (name, capabilities,
+    entry point). A plugin's module is imported and the plugin initialized the
+    first time it is used, except for plugins marked eager, which are loaded
+    concurrently during startup. Plugins are indexed by capability so a
+    capability can be routed to its fastest healthy provider.
+
+    Each plugin runs in the execution mode its class declares, or its config
+    overrides: inline on the event loop, in a thread, or in a pool of warm
+    worker processes.
+    """
+
+    def __init__(self, plugins_path: Optional[Path] = None, index: Optional[ManifestIndex] = None):
+        self.plugins: Dict[str, BasePlugin] = {}
+        self.manifests: Dict[str, PluginManifest] = {}
+        self.index = index or ManifestIndex()
+        self.capability_index = CapabilityIndex()
+        self.execution_modes: Dict[str, str] = {}
+        self.worker_pools: Dict[str, ProcessPluginPool] = {}
+        self.plugin_configs: Dict[str, Dict[str, Any]] = {}
+        self.plugins_path = Path(plugins_path or Path(__file__).parent)
+        self.core_plugins_path = self.plugins_path / "core_plugins"
+        self.custom_plugins_path = self.plugins_path / "custom_plugins"
+        self.load_times: Dict[str, float] = {}
+        self.startup_time: Optional[float] = None
+        self._load_locks: Dict[str, asyncio.Lock] = {}
+
+    async def initialize(self):
+        """Initialize the plugin manager"""
+        logger.info("Initializing plugin manager")
+        start = time.perf_counter()
+
+        # Create custom plugins directory if it doesn't exist
+        self.custom_plugins_path.mkdir(exist_ok=True)
+
+        self.scan_plugins()
+        await self.preload_plugins([
+            plugin_id for plugin_id, manifest in self.manifests.items()
+            if self.plugin_configs.get(plugin_id, {}).get("eager", manifest.eager)
+        ])
+
+        self.startup_time = time.perf_counter() - start
+        logger.info(
+            f"Plugin manager initialized with {len(self.manifests)} plugins "
+            f"({len(self.plugins)} loaded) in {self.startup_time:.3f}s"
+        )
+
+    def scan_plugins(self):
+        """Discover core and custom plugins from the manifest index, parsing only changed files"""
+        package = self.plugins_path.name
+        core = self.index.scan_directory(self.core_plugins_path, f"{package}.core_plugins", is_core=True)
+        custom = self.index.scan_directory(
+            self.custom_plugins_path, f"{package}.custom_plugins", is_core=False,
+            skip=("__init__.py", "example_plugin.py", "example-plugin.py")
+        )
+        self.manifests = {**core, **custom}
+        self.capability_index.clear()
+        for plugin_id, manifest in self.manifests.items():
+            self.capability_index.add(plugin_id, self.plugins[plugin_id].capabilities
+                                      if plugin_id in self.plugins else manifest.capabilities)
+        try:
+            self.index.save()
+        except OSError as e:
+            logger.warning(f"Failed to save plugin manifest index: {e}")
+        logger.info(f"Discovered {len(core)} core and {len(custom)} custom plugins")
+
+    async def preload_plugins(self, plugin_ids: Optional[List[str]] = None):
+        """
+        Load plugins concurrently instead of waiting for their first use
+
+        Args:
+            plugin_ids: Plugins to load; all discovered plugins if not given
+        """
+        if plugin_ids is None:
+            plugin_ids = list(self.manifests)
+        results = await asyncio.gather(
+            *(self.get_or_load_plugin(plugin_id) for plugin_id in plugin_ids),
+            return_exceptions=True
+        )
+        for plugin_id, result in zip(plugin_ids, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to load plugin {plugin_id}: {result}")
+
+    async def get_or_load_plugin(self, plugin_id: str) -> BasePlugin:
+        """
+        Get a plugin instance, importing and initializing it on first use
+
+        Concurrent first calls share a single load.
+        """
+        plugin = self.plugins.get(plugin_id)
+        if plugin is not None:
+            return plugin
+        if plugin_id not in self.manifests:
+            raise ValueError(f"Plugin {plugin_id} not found")
+
+        async with self._load_locks.setdefault(plugin_id, asyncio.Lock()):
+            if plugin_id not in self.plugins:
+                await self.load_plugin(plugin_id, is_core=self.manifests[plugin_id].is_core)
+        return self.plugins[plugin_id]
+
+    async def load_plugin(self, plugin_id: str, is_core: bool = True) -> bool:
+        """
+        Load a plugin by ID
+
+        Args:
+            plugin_id: The ID of the plugin to load
+            is_core: Whether this is a core plugin or custom plugin
+
+        Returns:
+            bool: True if the plugin was loaded successfully
+        """
+        try:
+            start = time.perf_counter()
+            manifest = self.manifests.get(plugin_id)
+            if manifest is None:
+                # Plugins added after startup are scanned when first loaded
+                directory = self.core_plugins_path if is_core else self.custom_plugins_path
+                package = f"{self.plugins_path.name}.{directory.name}"
+                manifest = self.index.scan_file(directory / f"{plugin_id}.py", f"{package}.{plugin_id}", is_core)
+                if manifest is None:
+                    raise ValueError(f"Plugin class not found in {package}.{plugin_id}")
+                self.manifests[plugin_id] = manifest
+
+            # Imports can pull in heavy dependencies, so keep them off the event loop
+            module = await asyncio.to_thread(importlib.import_module, manifest.module)
+
+            plugin_class = getattr(module, manifest.class_name, None)
+            if not (inspect.isclass(plugin_class) and issubclass(plugin_class, BasePlugin)):
+                raise ValueError(f"Plugin class not found in {manifest.module}")
+
+            # Create plugin instance with config
+            config = self.plugin_configs.get(plugin_id, {})
+            plugin_instance = plugin_class(config)
+
+            mode = config.get("execution_mode", plugin_class.execution_mode)
+            if mode not in EXECUTION_MODES:
+                raise ValueError(f"Unknown execution mode {mode}, expected one of {EXECUTION_MODES}")
+
+            # Initialize the plugin
+            await plugin_instance.initialize()
+
+            if mode == "process":
+                pool = ProcessPluginPool(
+                    manifest.module,
+                    manifest.class_name,
+                    config,
+                    workers=config.get("process_workers", 2),
+                    timeout=config.get("task_timeout", 120.0),
+                    max_tasks=config.get("max_tasks_per_worker", 100),
+                    max_memory_growth=int(config.get("max_worker_memory_growth_mb", 256) * 1024 * 1024)
+                )
+                try:
+                    await pool.start()
+                except Exception:
+                    await plugin_instance.cleanup()
+                    raise
+                self.worker_pools[plugin_id] = pool
+            self.execution_modes[plugin_id] = mode
+
+            # Store the plugin; its runtime capabilities replace those read from the source
+            self.plugins[plugin_id] = plugin_instance
+            self.capability_index.add(plugin_id, plugin_instance.capabilities)
+            self.load_times[plugin_id] = time.perf_counter() - start
+
+            logger.info(f"Successfully loaded plugin: {plugin_id} in {self.load_times[plugin_id]:.3f}s")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error loading plugin {plugin_id}: {e}")
+            raise
+
+    async def unload_plugin(self, plugin_id: str) -> bool:
+        """
+        Unload a plugin
+
+        Args:
+            plugin_id: The ID of the plugin to unload
+
+        Returns:
+            bool: True if the plugin was unloaded successfully
+        """
+        if plugin_id not in self.plugins:
+            logger.warning(f"Plugin {plugin_id} not found")
+            return False
+
+        try:
+            plugin = self.plugins[plugin_id]
+            pool = self.worker_pools.pop(plugin_id, None)
+            if pool:
+                await pool.close()
+            await plugin.cleanup()
+            del self.plugins[plugin_id]
+            # Unloaded plugins are no longer offered for their capabilities until loaded again
+            self.capability_index.remove(plugin_id)
+
+            logger.info(f"Successfully unloaded plugin: {plugin_id}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error unloading plugin {plugin_id}: {e}")
+            return False
+
+    async def execute_plugin(self, plugin_id: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Execute a plugin with the given parameters
+
+        Args:
+            plugin_id: The ID of the plugin to execute
+            parameters: Parameters to pass to the plugin
+
+        Returns:
+            Dict with the execution results
+        """
+        if plugin_id not in self.plugins and plugin_id not in self.manifests:
+            raise ValueError(f"Plugin {plugin_id} not found")
+
+        start = time.perf_counter()
+        try:
+            plugin = await self.get_or_load_plugin(plugin_id)
+            # A first call's import and initialization aren't part of the plugin's latency
+            start = time.perf_counter()
+            result = await self._run(plugin_id, plugin, parameters)
+
+            self.capability_index.record(
+                plugin_id, time.perf_counter() - start, success=result.get("success", True) is not False
+            )
+            logger.info(f"Executed plugin {plugin_id} successfully")
+            return result
+
+        except Exception as e:
+            self.capability_index.record(plugin_id, time.perf_counter() - start, success=False)
+            logger.error(f"Error executing plugin {plugin_id}: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "plugin_id": plugin_id
+            }
+
+    async def _run(self, plugin_id: str, plugin: BasePlugin, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a plugin's execute() in the plugin's execution mode"""
+        mode = self.execution_modes.get(plugin_id, "inline")
+        if mode == "process":
+            return await self.worker_pools[plugin_id].execute(parameters)
+        if mode == "thread":
+            return await asyncio.to_thread(run_in_thread, plugin, parameters)
+        return await plugin.execute(parameters)
+
+    async def execute_capability(self, capability: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Execute the best plugin offering a capability
+
+        Providers are tried from fastest and healthiest down until one succeeds.
+
+        Args:
+            capability: The capability to execute
+            parameters: Parameters to pass to the plugin
+
+        Returns:
+            Dict with the execution results of the first provider that succeeded,
+            or of the last one tried if all failed
+        """
+        providers = self.capability_index.providers(capability)
+        if not providers:
+            raise ValueError(f"No plugin provides capability {capability}")
+
+        for plugin_id in providers:
+            result = await self.execute_plugin(plugin_id, parameters)
+            if result.get("success", True) is not False:
+                break
+            logger.warning(f"Plugin {plugin_id} failed for capability {capability}")
+        return result
+
+    def get_plugin(self, plugin_id: str) -> Optional[BasePlugin]:
+        """Get a loaded plugin instance by ID"""
+        return self.plugins.get(plugin_id)
+
+    def get_all_plugins(self) -> Dict[str, BasePlugin]:
+        """Get all loaded plugins"""
+        return self.plugins.copy()
+
+    def list_plugins(self) -> List[Dict[str, Any]]:
+        """Get the manifests of all discovered plugins, whether loaded or not"""
+        return [
+            {
+                **manifest.to_dict(),
+                "loaded": plugin_id in self.plugins,
+                "execution_mode": self.execution_modes.get(plugin_id, manifest.execution_mode),
+                "load_time": self.load_times.get(plugin_id)
+            }
+            for plugin_id, manifest in self.manifests.items()
+        ]
+
+    async def get_plugins_by_capability(self, capability: str) -> List[BasePlugin]:
+        """Get all plugins that have a specific capability, best first, loading them if needed"""
+        plugin_ids = self.capability_index.providers(capability)
+        return list(await asyncio.gather(*(self.get_or_load_plugin(plugin_id) for plugin_id in plugin_ids)))
+
+    def get_plugin_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get live latency, error rate and health of every plugin, and its worker pool"""
+        stats = self.capability_index.get_stats()
+        for plugin_id, pool in self.worker_pools.items():
+            stats.setdefault(plugin_id, {})["workers"] = pool.get_stats()
+        return stats
+
+    def set_plugin_config(self, plugin_id: str, config: Dict[str, Any]):
+        """Set configuration for a plugin"""
+        self.plugin_configs[plugin_id] = config
+
+    async def reload_plugin(self, plugin_id: str) -> bool:
+        """Reload a plugin"""
+        await self.unload_plugin(plugin_id)
+        return await self.load_plugin(plugin_id, is_core=plugin_id in self.get_core_plugin_ids())
+
+    def get_core_plugin_ids(self) -> List[str]:
+        """Get list of core plugin IDs"""
+        return [plugin_id for plugin_id, manifest in self.manifests.items() if manifest.is_core]
+
+    async def cleanup(self):
+        """Clean up all plugins"""
+        logger.info("Cleaning up all plugins")
+
+        for plugin_id in list(self.plugins.keys()):
+            await self.unload_plugin(plugin_id)
+
+        logger.info("All plugins cleaned up")
+
+# Global plugin manager instance
+_plugin_manager = None
+
+async def get_plugin_manager() -> PluginManager:
+    """Get the global plugin manager instance"""
+    global _plugin_manager
+    if _plugin_manager is None:
+        _plugin_manager = PluginManager(index=get_manifest_index())
+        await _plugin_manager.initialize()
+    return _plugin_manager
@@ -0,0 +1,314 @@
+"""
+Plugin manifest for AgentK - Describes plugins from their source without importing them
+"""
+
+import ast
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Attributes read from the plugin's __init__ assignments (self.<name> = <literal>)
+INSTANCE_FIELDS = ("name", "version", "description", "capabilities")
+
+# Attributes read from the plugin's class body (<name> = <literal>)
+CLASS_FIELDS = ("eager", "execution_mode", "config_schema")
+
+# JSON schema types of get_config_value() defaults
+CONFIG_TYPES = {bool: "boolean", int: "integer", float: "number", str: "string", list: "array", dict: "object"}
+
+# Bumped whenever the manifest fields change, so stale indexes are rebuilt
+INDEX_VERSION = 2
+
+DEFAULT_INDEX_PATH = "./data/plugin_manifests.json"
+
+# Timestamps this close to when they were recorded may hide a later change
+# within the same filesystem clock tick, so they are not trusted on their own
+RACY_WINDOW_NS = 2_000_000_000
+
+
+@dataclass(frozen=True)
+class PluginManifest:
+    """What is known about a plugin before its module is imported"""
+    id: str
+    module: str
+    class_name: str
+    path: str
+    is_core: bool
+    name: str
+    version: str = "1.0.0"
+    description: str = ""
+    capabilities: Tuple[str, ...] = field(default_factory=tuple)
+    eager: bool = False
+    execution_mode: str = "inline"
+    config_schema: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the manifest for API responses and the index"""
+        data = asdict(self)
+        data["capabilities"] = list(self.capabilities)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PluginManifest":
+        """Restore a manifest serialized with to_dict"""
+        return cls(**{**data, "capabilities": tuple(data.get("capabilities", ()))})
+
+
+def _literal(node: ast.AST) -> Any:
+    """Evaluate a literal expression, or return None for anything computed at runtime"""
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+def _is_plugin_class(node: ast.ClassDef) -> bool:
+    """Check whether a class directly extends BasePlugin"""
+    for base in node.bases:
+        name = base.attr if isinstance(base, ast.Attribute) else getattr(base, "id", None)
+        if name == "BasePlugin":
+            return True
+    return False
+
+
+def _class_fields(node: ast.ClassDef) -> Dict[str, Any]:
+    """Collect literal class attributes and self.<attr> assignments made in __init__"""
+    fields: Dict[str, Any] = {}
+    for statement in node.body:
+        if isinstance(statement, ast.Assign):
+            for target in statement.targets:
+                if isinstance(target, ast.Name) and target.id in CLASS_FIELDS:
+                    fields[target.id] = _literal(statement.value)
+        elif isinstance(statement, ast.AnnAssign) and statement.value is not None:
+            if isinstance(statement.target, ast.Name) and statement.target.id in CLASS_FIELDS:
+                fields[statement.target.id] = _literal(statement.value)
+        elif isinstance(statement, ast.FunctionDef) and statement.name == "__init__":
+            for assign in ast.walk(statement):
+                if not isinstance(assign, ast.Assign):
+                    continue
+                for target in assign.targets:
+                    if (isinstance(target, ast.Attribute) and
+                            isinstance(target.value, ast.Name) and
+                            target.value.id == "self" and
+                            target.attr in INSTANCE_FIELDS):
+                        fields[target.attr] = _literal(assign.value)
+    return {key: value for key, value in fields.items() if value is not None}
+
+
+def _config_schema(node: ast.ClassDef) -> Dict[str, Any]:
+    """Derive a config schema from the plugin's get_config_value(key, default) calls"""
+    schema: Dict[str, Any] = {}
+    for call in ast.walk(node):
+        if not (isinstance(call, ast.Call) and
+                isinstance(call.func, ast.Attribute) and
+                call.func.attr == "get_config_value" and
+                call.args and isinstance(call.args[0], ast.Constant) and
+                isinstance(call.args[0].value, str)):
+            continue
+        entry: Dict[str, Any] = {}
+        default = _literal(call.args[1]) if len(call.args) > 1 else None
+        if default is not None:
+            entry["default"] = default
+            if type(default) in CONFIG_TYPES:
+                entry["type"] = CONFIG_TYPES[type(default)]
+        schema.setdefault(call.args[0].value, entry)
+    return schema
+
+
+def scan_plugin_file(path: Path, module: str, is_core: bool) -> Optional[PluginManifest]:
+    """
+    Build the manifest of a plugin file by parsing it
+
+    Args:
+        path: Path of the plugin source file
+        module: Module name the plugin is imported as
+        is_core: Whether this is a core plugin or custom plugin
+
+    Returns:
+        The manifest, or None if the file defines no BasePlugin subclass
+    """
+    return scan_plugin_source(path.read_text(encoding="utf-8"), path, module, is_core)
+
+
+def scan_plugin_source(source: str, path: Path, module: str, is_core: bool) -> Optional[PluginManifest]:
+    """Build the manifest of a plugin from its source code"""
+    tree = ast.parse(source, filename=str(path))
+    classes = [
+        node for node in tree.body
+        if isinstance(node, ast.ClassDef) and _is_plugin_class(node)
+    ]
+    if not classes:
+        return None
+
+    # Prefer the class named after the file, as the loader always has
+    expected = "".join(part.title() for part in path.stem.replace("-", "_").split("_")).lower()
+    plugin_class = next((node for node in classes if node.name.lower() == expected), classes[0])
+    fields = _class_fields(plugin_class)
+
+    return PluginManifest(
+        id=path.stem,
+        module=module,
+        class_name=plugin_class.name,
+        path=str(path),
+        is_core=is_core,
+        name=str(fields.get("name", plugin_class.name)),
+        version=str(fields.get("version", "1.0.0")),
+        description=str(fields.get("description", "")),
+        capabilities=tuple(fields.get("capabilities", ())),
+        eager=bool(fields.get("eager", False)),
+        execution_mode=str(fields.get("execution_mode", "inline")),
+        config_schema=fields.get("config_schema") or _config_schema(plugin_class)
+    )
+
+
+
+class ManifestIndex:
+    """
+    Persisted plugin manifests, keyed by source file path
+
+    Each entry records the file's mtime, size and content hash, so a scan
+    only parses files that changed since they were indexed. A touched file
+    whose content is unchanged keeps its manifest after hashing. Directory
+    listings are reused while the directory's mtime is unchanged. Like git's
+    racy-index check, an mtime recorded too close to when it was read is
+    never trusted alone.
+    """
+
+    def __init__(self, index_path: Optional[str] = None):
+        """
+        Initialize the index
+
+        Args:
+            index_path: JSON file the index is persisted to; in-memory only if not given
+        """
+        self.index_path = Path(index_path) if index_path else None
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._directories: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self.parsed = 0
+        self._load()
+
+    def _load(self) -> None:
+        """Read the persisted index, starting empty if it is missing or stale"""
+        if not self.index_path or not self.index_path.exists():
+            return
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable plugin manifest index {self.index_path}: {e}")
+            return
+        if data.get("version") != INDEX_VERSION:
+            return
+        self._files = data.get("files", {})
+        self._directories = data.get("directories", {})
+
+    def save(self) -> None:
+        """Persist the index if it changed since it was loaded"""
+        if not self.index_path or not self._dirty:
+            return
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_path.with_name(f".{self.index_path.name}.{os.getpid()}.tmp")
+        data = {"version": INDEX_VERSION, "files": self._files, "directories": self._directories}
+        temp_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(temp_path, self.index_path)
+        self._dirty = False
+
+    def scan_file(self, path: Path, module: str, is_core: bool) -> Optional[PluginManifest]:
+        """
+        Get the manifest of a plugin file, parsing it only if it changed
+
+        Raises:
+            OSError: If the file can't be read
+            SyntaxError: If the file isn't valid Python
+        """
+        key = str(path)
+        stat = path.stat()
+        entry = self._files.get(key)
+        if (entry and entry["module"] == module and entry["is_core"] == is_core and
+                entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size and
+                not _is_racy(entry)):
+            return self._manifest(entry)
+
+        content = path.read_bytes()
+        digest = hashlib.sha256(content).hexdigest()
+        if not (entry and entry["module"] == module and entry["is_core"] == is_core and
+                entry["sha256"] == digest):
+            manifest = scan_plugin_source(content.decode("utf-8"), path, module, is_core)
+            self.parsed += 1
+            entry = {"module": module, "is_core": is_core, "sha256": digest,
+                     "manifest": manifest.to_dict() if manifest else None}
+        self._files[key] = {
+            **entry, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "checked_ns": time.time_ns()
+        }
+        self._dirty = True
+        return self._manifest(self._files[key])
+
+    def scan_directory(
+        self, directory: Path, package: str, is_core: bool, skip: Tuple[str, ...] = ("__init__.py",)
+    ) -> Dict[str, PluginManifest]:
+        """
+        Get the manifests of the plugin files in a directory
+
+        Files that can't be parsed are logged and left out.
+        """
+        manifests: Dict[str, PluginManifest] = {}
+        if not directory.is_dir():
+            return manifests
+
+        key = str(directory)
+        mtime_ns = directory.stat().st_mtime_ns
+        listing = self._directories.get(key)
+        if listing and listing["mtime_ns"] == mtime_ns and not _is_racy(listing):
+            names = listing["files"]
+        else:
+            names = sorted(plugin_file.name for plugin_file in directory.glob("*.py"))
+            self._forget_missing(directory, names)
+            self._directories[key] = {"mtime_ns": mtime_ns, "files": names, "checked_ns": time.time_ns()}
+            self._dirty = True
+
+        for name in names:
+            if name in skip:
+                continue
+            plugin_file = directory / name
+            try:
+                manifest = self.scan_file(plugin_file, f"{package}.{plugin_file.stem}", is_core)
+            except (OSError, SyntaxError, UnicodeDecodeError) as e:
+                logger.error(f"Failed to scan plugin {plugin_file}: {e}")
+                continue
+            if manifest:
+                manifests[manifest.id] = manifest
+            else:
+                logger.warning(f"No plugin class found in {plugin_file}")
+        return manifests
+
+    def _forget_missing(self, directory: Path, names: List[str]) -> None:
+        """Drop the entries of files that were removed from a directory"""
+        present = {str(directory / name) for name in names}
+        for key in [key for key in self._files if Path(key).parent == directory and key not in present]:
+            del self._files[key]
+
+    def _manifest(self, entry: Dict[str, Any]) -> Optional[PluginManifest]:
+        """Restore the manifest stored in an index entry"""
+        return PluginManifest.from_dict(entry["manifest"]) if entry["manifest"] else None
+
+
+def _is_racy(entry: Dict[str, Any]) -> bool:
+    """Check whether a recorded mtime was too recent to rule out a same-tick change"""
+    return entry["checked_ns"] - entry["mtime_ns"] < RACY_WINDOW_NS
+
+
+# Global manifest index instances, one per index file
+_indexes: Dict[str, ManifestIndex] = {}
+
+def get_manifest_index(index_path: str = DEFAULT_INDEX_PATH) -> ManifestIndex:
+    """Get the shared manifest index persisted at a path"""
+    if index_path not in _indexes:
+        _indexes[index_path] = ManifestIndex(index_path)
+    return _indexes[index_path]
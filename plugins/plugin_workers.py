@@ -0,0 +1,273 @@
+"""
+Plugin workers for AgentK - Runs CPU-bound plugins off the event loop
+"""
+
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import pickle
+import sys
+from typing import Any, Dict, Optional, Set, Tuple
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where worker memory isn't reported
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# How a plugin's execute() is run: on the event loop, in a thread with its
+# own event loop, or in a pool of warm worker processes
+EXECUTION_MODES = ("inline", "thread", "process")
+
+# Seconds a retiring worker gets to clean up before it is killed
+STOP_TIMEOUT = 5.0
+
+
+def run_in_thread(plugin: Any, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a plugin's execute() to completion on a private event loop"""
+    return asyncio.run(plugin.execute(parameters))
+
+
+def _peak_memory() -> int:
+    """Peak resident memory of the current process, in bytes (0 where it can't be measured)"""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _send(conn: Any, message: Any) -> None:
+    """Pickle a message with the newest protocol and send it as one frame"""
+    conn.send_bytes(pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _worker_main(conn: Any, module: str, class_name: str, config: Dict[str, Any]) -> None:
+    """
+    Worker process loop: import and initialize the plugin once, then serve calls
+
+    Every reply carries how much the worker's peak memory has grown since it
+    became ready, so the pool can recycle workers that keep growing.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        plugin = getattr(importlib.import_module(module), class_name)(config)
+        loop.run_until_complete(plugin.initialize())
+    except Exception as e:
+        _send(conn, ("error", f"{type(e).__name__}: {e}", 0))
+        return
+
+    baseline = _peak_memory()
+    _send(conn, ("ready", None, 0))
+    while True:
+        try:
+            parameters = pickle.loads(conn.recv_bytes())
+        except (EOFError, OSError):
+            break
+        if parameters is None:
+            break
+        try:
+            reply = ("ok", loop.run_until_complete(plugin.execute(parameters)))
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+        _send(conn, (*reply, _peak_memory() - baseline))
+
+    try:
+        loop.run_until_complete(plugin.cleanup())
+    finally:
+        loop.close()
+
+
+class PluginWorker:
+    """A worker process with the plugin imported and initialized"""
+
+    def __init__(self, context: Any, module: str, class_name: str, config: Dict[str, Any]):
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, module, class_name, config), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+
+    def wait_ready(self) -> None:
+        """Block until the plugin is initialized in the worker"""
+        status, payload, _ = pickle.loads(self._conn.recv_bytes())
+        if status != "ready":
+            raise RuntimeError(f"Plugin worker failed to start: {payload}")
+
+    def request(self, parameters: Dict[str, Any]) -> Tuple[str, Any, int]:
+        """Send one call to the worker and block until it replies"""
+        _send(self._conn, parameters)
+        return pickle.loads(self._conn.recv_bytes())
+
+    def stop(self) -> None:
+        """Ask the worker to clean up and exit, killing it if it doesn't"""
+        try:
+            _send(self._conn, None)
+        except OSError:
+            pass
+        self.process.join(STOP_TIMEOUT)
+        self.kill()
+
+    def kill(self) -> None:
+        """Terminate the worker immediately"""
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self._conn.close()
+
+
+class ProcessPluginPool:
+    """
+    Pool of warm worker processes for one plugin
+
+    Workers import and initialize the plugin when they start, so calls only
+    pay for pickling their parameters and result. A call that exceeds the
+    timeout kills its worker. Workers are recycled after a number of tasks,
+    or once their peak memory has grown past a limit, and replacements are
+    started in the background so the pool stays warm.
+    """
+
+    def __init__(
+        self,
+        module: str,
+        class_name: str,
+        config: Optional[Dict[str, Any]] = None,
+        workers: int = 2,
+        timeout: float = 120.0,
+        max_tasks: int = 100,
+        max_memory_growth: int = 256 * 1024 * 1024
+    ):
+        """
+        Initialize the pool
+
+        Args:
+            module: Module the plugin class is imported from
+            class_name: Name of the plugin class
+            config: Plugin configuration passed to each worker's instance
+            workers: Number of worker processes
+            timeout: Seconds a call may run before its worker is killed
+            max_tasks: Calls a worker serves before it is replaced
+            max_memory_growth: Bytes of peak memory growth after which a worker is replaced
+        """
+        self.module = module
+        self.class_name = class_name
+        self.config = config or {}
+        self.size = workers
+        self.timeout = timeout
+        self.max_tasks = max_tasks
+        self.max_memory_growth = max_memory_growth
+        self.recycled = 0
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: "asyncio.Queue[PluginWorker]" = asyncio.Queue()
+        self._workers: Set[PluginWorker] = set()
+        self._replacements: Set[asyncio.Task] = set()
+        self._closed = False
+
+    async def start(self) -> None:
+        """Start all workers and wait until each has initialized the plugin"""
+        workers = await asyncio.gather(*(self._spawn() for _ in range(self.size)), return_exceptions=True)
+        errors = [worker for worker in workers if isinstance(worker, Exception)]
+        if errors:
+            await self.close()
+            raise errors[0]
+        for worker in workers:
+            self._idle.put_nowait(worker)
+
+    async def execute(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run the plugin in a worker process
+
+        Raises:
+            TimeoutError: If the call ran longer than the pool's timeout
+            RuntimeError: If the plugin raised, or its worker died
+        """
+        if self._closed:
+            raise RuntimeError(f"Worker pool for {self.class_name} is closed")
+        worker = await self._idle.get()
+
+        try:
+            status, payload, memory_growth = await asyncio.wait_for(
+                asyncio.to_thread(worker.request, parameters), self.timeout
+            )
+        except asyncio.TimeoutError:
+            self._retire(worker, kill=True)
+            raise TimeoutError(f"{self.class_name} timed out after {self.timeout}s")
+        except (EOFError, OSError) as e:
+            self._retire(worker, kill=True)
+            raise RuntimeError(f"{self.class_name} worker exited unexpectedly: {e}")
+        except asyncio.CancelledError:
+            # The worker may still be busy with the abandoned call
+            self._retire(worker, kill=True)
+            raise
+
+        worker.tasks += 1
+        if worker.tasks >= self.max_tasks or memory_growth > self.max_memory_growth:
+            self._retire(worker)
+        else:
+            self._idle.put_nowait(worker)
+
+        if status != "ok":
+            raise RuntimeError(payload)
+        return payload
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get worker counts and how many workers were recycled"""
+        return {
+            "workers": len(self._workers),
+            "idle": self._idle.qsize(),
+            "starting": len(self._replacements),
+            "recycled": self.recycled
+        }
+
+    async def close(self) -> None:
+        """Stop all workers"""
+        self._closed = True
+        for task in list(self._replacements):
+            task.cancel()
+        await asyncio.gather(*self._replacements, return_exceptions=True)
+        workers = list(self._workers)
+        self._workers.clear()
+        await asyncio.gather(*(asyncio.to_thread(worker.stop) for worker in workers))
+
+    async def _spawn(self) -> PluginWorker:
+        """Start a worker process and wait for it to initialize the plugin"""
+        worker = PluginWorker(self._context, self.module, self.class_name, self.config)
+        try:
+            await asyncio.to_thread(worker.wait_ready)
+        except BaseException:
+            await asyncio.to_thread(worker.kill)
+            raise
+        self._workers.add(worker)
+        return worker
+
+    def _retire(self, worker: PluginWorker, kill: bool = False) -> None:
+        """Stop a worker and start a warm replacement in the background"""
+        self._workers.discard(worker)
+        self.recycled += 1
+        asyncio.get_running_loop().run_in_executor(None, worker.kill if kill else worker.stop)
+        if self._closed:
+            return
+        task = asyncio.create_task(self._replace())
+        self._replacements.add(task)
+        task.add_done_callback(self._replacements.discard)
+
+    async def _replace(self) -> None:
+        """Start a replacement worker, retrying with backoff so waiting calls aren't stranded"""
+        delay = 1.0
+        while True:
+            try:
+                worker = await self._spawn()
+                break
+            except Exception as e:
+                logger.error(f"Failed to start replacement worker for {self.class_name}: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+        if self._closed:
+            await asyncio.to_thread(worker.stop)
+            return
+        self._idle.put_nowait(worker)
@@ -0,0 +1,285 @@
+"""
+Python sandbox pool for AgentK - Keeps warm, resource-limited interpreters for running snippets
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import math
+import struct
+import sys
+from collections import deque
+from pathlib import Path
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = Path(__file__).parent / "sandbox_worker.py"
+
+HEADER = struct.Struct(">I")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+class SandboxWorker:
+    """An isolated Python interpreter waiting for snippets on its stdin"""
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.tasks = 0
+
+    @classmethod
+    async def start(cls, limits: Dict[str, Any]) -> "SandboxWorker":
+        """Start an interpreter and wait until its limits are applied"""
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-I", "-S", str(WORKER_SCRIPT), json.dumps(limits),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            start_new_session=True
+        )
+        worker = cls(process)
+        try:
+            ready = await worker.receive()
+        except BaseException:
+            await worker.close()
+            raise
+        if not ready.get("ready"):
+            await worker.close()
+            raise RuntimeError("Sandbox worker failed to start")
+        return worker
+
+    async def send(self, request: Dict[str, Any]) -> None:
+        """Send a snippet to the interpreter"""
+        data = json.dumps(request).encode("utf-8")
+        self.process.stdin.write(HEADER.pack(len(data)) + data)
+        await self.process.stdin.drain()
+
+    async def receive(self) -> Dict[str, Any]:
+        """Wait for the next message from the interpreter"""
+        header = await self.process.stdout.readexactly(HEADER.size)
+        return json.loads(await self.process.stdout.readexactly(HEADER.unpack(header)[0]))
+
+    def kill(self) -> None:
+        """Terminate the interpreter"""
+        if self.process.returncode is None:
+            self.process.kill()
+
+    async def close(self) -> None:
+        """Terminate the interpreter and reap it"""
+        self.kill()
+        await self.process.wait()
+
+
+class PythonSandboxPool:
+    """
+    Pool of pre-started Python interpreters for running untrusted snippets
+
+    Each worker is a separate `python -I -S` process with rlimits on memory,
+    file writes, new file descriptors (so no sockets) and, per snippet, CPU
+    time. Snippets run with a restricted set of builtins and a fresh
+    namespace. A worker is replaced after max_tasks snippets, after a
+    timeout, or after it hits a limit; replacements start in the background
+    so callers normally get a warm interpreter.
+    """
+
+    def __init__(
+        self,
+        size: int = 4,
+        max_tasks: int = 1,
+        timeout: float = 30.0,
+        memory_limit_mb: int = 256,
+        max_output_length: int = 10000,
+        history_size: int = 1000
+    ):
+        """
+        Initialize the pool
+
+        Args:
+            size: Number of warm workers
+            max_tasks: Snippets a worker runs before it is replaced
+            timeout: Wall-clock and CPU seconds a snippet may use
+            memory_limit_mb: Address space limit of each worker
+            max_output_length: Characters of output kept per snippet
+            history_size: Number of recent executions kept for latency metrics
+        """
+        self.size = size
+        self.max_tasks = max_tasks
+        self.timeout = timeout
+        self.max_output_length = max_output_length
+        self.limits = {"memory_bytes": memory_limit_mb * 1024 * 1024}
+        self._idle: "asyncio.Queue[SandboxWorker]" = asyncio.Queue()
+        self._starting: Set[asyncio.Task] = set()
+        self._retired: Set[SandboxWorker] = set()
+        self._waiting = 0
+        self._running = 0
+        self._executions = 0
+        self._timeouts = 0
+        self._recycled = 0
+        self._wait_times: Deque[float] = deque(maxlen=history_size)
+        self._run_times: Deque[float] = deque(maxlen=history_size)
+        self._closed = False
+
+    async def start(self) -> None:
+        """Start every worker and wait until they are ready"""
+        workers = await asyncio.gather(*(SandboxWorker.start(self.limits) for _ in range(self.size)))
+        for worker in workers:
+            self._idle.put_nowait(worker)
+
+    async def execute(self, code: str, bytecode: Optional[bytes] = None) -> Dict[str, Any]:
+        """
+        Run a snippet in a sandbox worker
+
+        Args:
+            code: Python source to run
+            bytecode: The source compiled and marshalled, to skip compiling it in the worker
+
+        Returns:
+            Dict with success, output and, on failure, error
+        """
+        async for result in self.stream(code, bytecode=bytecode):
+            pass
+        return result
+
+    async def stream(
+        self,
+        code: str,
+        flush_interval: Optional[float] = None,
+        output_limit: Optional[int] = None,
+        bytecode: Optional[bytes] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run a snippet in a sandbox worker, optionally streaming its output
+
+        Args:
+            code: Python source to run
+            flush_interval: If set, output is yielded as {"output": text}
+                messages at most this often while the snippet runs
+            output_limit: Characters of output allowed instead of max_output_length
+            bytecode: The source compiled and marshalled, to skip compiling it in the worker
+
+        Yields:
+            Output messages, then the result dict with success, output (the
+            part not yet yielded) and, on failure, error
+        """
+        if self._closed:
+            raise RuntimeError("Python sandbox pool is closed")
+
+        loop = asyncio.get_running_loop()
+        queued_at = loop.time()
+        self._waiting += 1
+        try:
+            worker = await self._idle.get()
+        finally:
+            self._waiting -= 1
+        started_at = loop.time()
+        self._wait_times.append(started_at - queued_at)
+        self._running += 1
+
+        # Unless the snippet finishes cleanly the worker may still be busy
+        # or out of resources, so it is replaced
+        recycle = True
+        deadline = started_at + self.timeout
+        try:
+            await worker.send({
+                "code": code,
+                "bytecode": base64.b64encode(bytecode).decode("ascii") if bytecode else None,
+                "cpu_seconds": self.timeout,
+                "output_limit": output_limit or self.max_output_length,
+                "stream": flush_interval is not None,
+                "flush_interval": flush_interval or 0
+            })
+            while True:
+                message = await asyncio.wait_for(worker.receive(), deadline - loop.time())
+                if "success" not in message:
+                    yield message
+                    continue
+                worker.tasks += 1
+                recycle = worker.tasks >= self.max_tasks or message.pop("exhausted", False)
+                break
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            message = {"success": False, "error": "Execution timed out", "timeout": self.timeout}
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            message = {"success": False, "error": f"Sandbox worker exited unexpectedly: {e}"}
+        finally:
+            self._running -= 1
+            self._executions += 1
+            self._run_times.append(loop.time() - started_at)
+            if recycle:
+                self._replace(worker)
+            else:
+                self._idle.put_nowait(worker)
+        yield message
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get pool occupancy, queueing and execution latency metrics"""
+        wait_times = list(self._wait_times)
+        run_times = list(self._run_times)
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "starting": len(self._starting),
+            "running": self._running,
+            "queue_depth": self._waiting,
+            "executions": self._executions,
+            "timeouts": self._timeouts,
+            "recycled": self._recycled,
+            "queue_wait": {
+                "avg": round(sum(wait_times) / len(wait_times), 4) if wait_times else 0.0,
+                "p50": round(percentile(wait_times, 50), 4),
+                "p95": round(percentile(wait_times, 95), 4)
+            },
+            "run_duration": {
+                "avg": round(sum(run_times) / len(run_times), 4) if run_times else 0.0,
+                "p50": round(percentile(run_times, 50), 4),
+                "p95": round(percentile(run_times, 95), 4)
+            }
+        }
+
+    async def close(self) -> None:
+        """Stop all workers"""
+        self._closed = True
+        for task in list(self._starting):
+            task.cancel()
+        await asyncio.gather(*self._starting, return_exceptions=True)
+        workers = list(self._retired)
+        while not self._idle.empty():
+            workers.append(self._idle.get_nowait())
+        await asyncio.gather(*(worker.close() for worker in workers))
+
+    def _replace(self, worker: SandboxWorker) -> None:
+        """Kill a used worker and start a fresh one in the background"""
+        self._recycled += 1
+        self._retired.add(worker)
+        worker.kill()
+        if self._closed:
+            return
+        task = asyncio.create_task(self._start_replacement(worker))
+        self._starting.add(task)
+        task.add_done_callback(self._starting.discard)
+
+    async def _start_replacement(self, old: SandboxWorker) -> None:
+        """Reap a killed worker and add a warm one, retrying with backoff"""
+        await old.process.wait()
+        self._retired.discard(old)
+        delay = 0.5
+        while True:
+            try:
+                worker = await SandboxWorker.start(self.limits)
+                break
+            except Exception as e:
+                logger.error(f"Failed to start Python sandbox worker: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+        if self._closed:
+            await worker.close()
+            return
+        self._idle.put_nowait(worker)
@@ -0,0 +1,198 @@
+"""
+Python sandbox worker for AgentK - Runs untrusted snippets for the CodeExecutor pool
+
+Started by PythonSandboxPool as `python -I -S sandbox_worker.py <limits>`.
+Requests and replies are JSON objects framed with a 4-byte big-endian
+length on stdin and stdout. This file must only use the standard library.
+"""
+
+import binascii
+import io
+import json
+import marshal
+import os
+import resource
+import signal
+import struct
+import sys
+import time
+
+HEADER = struct.Struct(">I")
+
+SAFE_BUILTINS = {
+    'print': print,
+    'len': len,
+    'range': range,
+    'str': str,
+    'int': int,
+    'float': float,
+    'list': list,
+    'dict': dict,
+    'set': set,
+    'tuple': tuple,
+    'bool': bool,
+    'type': type,
+    'isinstance': isinstance,
+    'issubclass': issubclass,
+    'hasattr': hasattr,
+    'getattr': getattr,
+    'setattr': setattr,
+    'ValueError': ValueError,
+    'TypeError': TypeError,
+    'AttributeError': AttributeError,
+}
+
+
+class CpuLimitExceeded(BaseException):
+    """Raised in the snippet when it uses up its CPU time"""
+
+
+class OutputLimitExceeded(BaseException):
+    """Raised in the snippet when it prints past the limit of a streamed execution"""
+
+
+class CappedOutput(io.TextIOBase):
+    """
+    stdout replacement that keeps only the first `limit` characters
+
+    With a `send` callback, output is passed on as it is written instead of
+    kept: at most once per `interval` seconds, whatever has accumulated. A
+    streamed snippet can't be left printing, so writing past `limit` then
+    stops it with OutputLimitExceeded.
+    """
+
+    def __init__(self, limit, send=None, interval=0.1):
+        self.limit = limit
+        self.send = send
+        self.interval = interval
+        self.parts = []
+        self.size = 0
+        self.truncated = False
+        self.last_sent = 0.0
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        room = self.limit - self.size
+        if len(text) > room:
+            text = text[:max(room, 0)]
+            self.truncated = True
+        if text:
+            self.parts.append(text)
+            self.size += len(text)
+        if self.send and self.truncated:
+            raise OutputLimitExceeded()
+        if self.send and self.parts and time.monotonic() - self.last_sent >= self.interval:
+            self.send(self.getvalue())
+            self.parts = []
+            self.last_sent = time.monotonic()
+        return len(text)
+
+    def getvalue(self):
+        return "".join(self.parts)
+
+
+def read_frame(stream):
+    header = stream.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    return json.loads(stream.read(HEADER.unpack(header)[0]))
+
+
+def write_frame(stream, message):
+    data = json.dumps(message).encode("utf-8")
+    stream.write(HEADER.pack(len(data)) + data)
+    stream.flush()
+
+
+def _raise_cpu_limit(signum, frame):
+    raise CpuLimitExceeded()
+
+
+def _open_fds():
+    """File descriptors open in this process, or the standard streams where /proc is missing"""
+    if not os.path.isdir("/proc/self/fd"):
+        return [0, 1, 2]
+    listed = [int(fd) for fd in os.listdir("/proc/self/fd")]
+    open_fds = []
+    for fd in listed:
+        try:
+            os.fstat(fd)
+        except OSError:
+            continue
+        open_fds.append(fd)
+    return open_fds
+
+
+def apply_limits(limits):
+    """Cap memory, forbid writing files and opening new files or sockets"""
+    memory = limits.get("memory_bytes")
+    if memory:
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    # Only the inherited pipes stay usable: no new files, sockets or pipes.
+    # The listing includes the fd of the listed directory, closed by now
+    highest = max(_open_fds(), default=2)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (highest + 1, highest + 1))
+    signal.signal(signal.SIGXCPU, _raise_cpu_limit)
+
+
+def run(code, cpu_seconds, output_limit, send=None, flush_interval=0.1):
+    """Execute one snippet, as source or code object, with a fresh namespace and captured stdout"""
+    output = CappedOutput(output_limit, send, flush_interval)
+    used = resource.getrusage(resource.RUSAGE_SELF)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = int(used.ru_utime + used.ru_stime + cpu_seconds) + 1
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    sys.stdout = output
+    try:
+        if isinstance(code, str):
+            code = compile(code, "<string>", "exec")
+        exec(code, {"__builtins__": dict(SAFE_BUILTINS)})
+        reply = {"success": True}
+    except OutputLimitExceeded:
+        reply = {"success": False, "error": f"Output limit of {output_limit} characters exceeded"}
+    except CpuLimitExceeded:
+        reply = {"success": False, "error": "CPU time limit exceeded", "exhausted": True}
+    except MemoryError:
+        reply = {"success": False, "error": "Memory limit exceeded", "exhausted": True}
+    except Exception as e:
+        reply = {"success": False, "error": f"Python execution error: {e}"}
+    finally:
+        sys.stdout = sys.__stdout__
+    reply["output"] = output.getvalue()
+    reply["truncated"] = output.truncated
+    return reply
+
+
+def main():
+    limits = json.loads(sys.argv[1]) if len(sys.argv) > 1 else {}
+    requests = sys.stdin.buffer
+    replies = sys.stdout.buffer
+    apply_limits(limits)
+    write_frame(replies, {"ready": True})
+    while True:
+        request = read_frame(requests)
+        if request is None:
+            return
+        send = None
+        if request.get("stream"):
+            def send(text):
+                write_frame(replies, {"output": text})
+        # The pool sends the code compiled by the server when it has it
+        code = request["code"]
+        if request.get("bytecode"):
+            code = marshal.loads(binascii.a2b_base64(request["bytecode"]))
+        write_frame(replies, run(
+            code,
+            request.get("cpu_seconds", 30),
+            request.get("output_limit", 10000),
+            send,
+            request.get("flush_interval", 0.1)
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+"""
+Full-text index for AgentK - Keyword and phrase search over stored and uploaded files
+"""
+
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_DB = "./data/databases/text_index.db"
+
+# Files with other extensions, or with NUL bytes near the start, aren't indexed
+TEXT_EXTENSIONS = {
+    ".txt", ".md", ".json", ".csv", ".log", ".py", ".js", ".html", ".css",
+    ".xml", ".yaml", ".yml", ".ini", ".toml", ".sql", ".sh"
+}
+
+# Every line is stored as one FTS5 row whose rowid is file_id << LINE_BITS | line,
+# so all rows of a file form one rowid range
+LINE_BITS = 32
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+PHRASE_PATTERN = re.compile(r'"([^"]*)"')
+
+
+def build_match_expression(query: str) -> str:
+    """
+    Translate a user query into an FTS5 MATCH expression
+
+    Quoted parts are phrases, other words are keywords, a trailing * makes a
+    word a prefix, and every part must match. Tokens are extracted with the
+    same word pattern the index uses, so punctuation in the query can't
+    inject FTS5 syntax.
+    """
+    parts = []
+    for phrase in PHRASE_PATTERN.findall(query):
+        tokens = TOKEN_PATTERN.findall(phrase)
+        if tokens:
+            parts.append('"' + " ".join(tokens) + '"')
+    for word in PHRASE_PATTERN.sub(" ", query).split():
+        tokens = TOKEN_PATTERN.findall(word)
+        if not tokens:
+            continue
+        prefix = "*" if word.endswith("*") else ""
+        parts.extend(f'"{token}"' for token in tokens[:-1])
+        parts.append(f'"{tokens[-1]}"{prefix}')
+    return " AND ".join(parts)
+
+
+def iter_file_lines(path: str, max_line_length: int = 4096) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (line number, text) of a file, 1-based, for indexing
+
+    Every format goes through this same pipeline: the file is read as UTF-8
+    text line by line, and the FTS5 unicode61 tokenizer then splits words
+    and drops punctuation, so JSON keys, CSV fields and prose are indexed
+    alike.
+    """
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for number, line in enumerate(f, 1):
+            line = line.rstrip("\r\n")
+            if line.strip():
+                yield number, line[:max_line_length]
+
+
+def is_text_file(path: str) -> bool:
+    """Check whether a file looks like text worth indexing"""
+    if Path(path).suffix.lower() not in TEXT_EXTENSIONS:
+        return False
+    try:
+        with open(path, "rb") as f:
+            return b"\0" not in f.read(8192)
+    except OSError:
+        return False
+
+
+class FullTextIndex:
+    """
+    Incremental full-text index of the files under a set of named roots
+
+    Lines are stored in an SQLite FTS5 table, so keyword, phrase and prefix
+    queries return file and line hits ranked by BM25 without scanning files.
+    Files are (re)indexed by a background thread: writers call schedule()
+    with the files or directories they changed, and sync() reconciles a whole root by
+    comparing mtimes and sizes, so only new, changed and deleted files cost
+    anything. Searches use their own connections and aren't blocked by
+    indexing.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_INDEX_DB,
+        max_file_bytes: int = 10 * 1024 * 1024,
+        batch_size: int = 256,
+        rank_window: int = 2000
+    ):
+        """
+        Initialize the index
+
+        Args:
+            db_path: Path of the SQLite database
+            max_file_bytes: Larger files are not indexed
+            batch_size: Files indexed per transaction by the background thread
+            rank_window: Matches ranked per query; beyond it hits come in index order
+        """
+        self.db_path = db_path
+        self.max_file_bytes = max_file_bytes
+        self.batch_size = batch_size
+        self.rank_window = rank_window
+        self.roots: Dict[str, str] = {}
+        self.indexed = 0
+        self.removed = 0
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._queue: "queue.Queue[Optional[Tuple[str, str]]]" = queue.Queue()
+        # Queued files, and whether each must be reread even if its mtime and size are unchanged
+        self._pending: Dict[Tuple[str, str], bool] = {}
+        self._pending_lock = threading.Lock()
+        self._readers = threading.local()
+        self._worker: Optional[threading.Thread] = None
+        self._writer = self._connect()
+        self._create_tables()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _create_tables(self) -> None:
+        """Create the file and line tables if they don't exist"""
+        with self._writer:
+            self._writer.execute("""
+                CREATE TABLE IF NOT EXISTS text_index_files (
+                    id INTEGER PRIMARY KEY,
+                    root TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    lines INTEGER NOT NULL,
+                    UNIQUE (root, path)
+                )
+            """)
+            self._writer.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS text_index_lines USING fts5(
+                    text, tokenize = 'unicode61 remove_diacritics 2'
+                )
+            """)
+
+    def add_root(self, name: str, directory: str) -> None:
+        """Index the files under a directory, reported with the root's name"""
+        self.roots[name] = os.path.abspath(directory)
+
+    def start(self) -> None:
+        """Start the background indexing thread"""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="text-index", daemon=True)
+            self._worker.start()
+
+    def schedule(self, path: str) -> bool:
+        """
+        Queue a created, modified or deleted file for (re)indexing
+
+        The file is reread even if its modification time and size match the
+        index, since a write within the timestamp granularity can keep both.
+        For a directory, every file under it is (re)indexed, and the files
+        indexed under a deleted directory are removed. The directory is
+        expanded by the indexing thread, so this never walks the tree.
+
+        Returns:
+            False if the path is outside every root
+        """
+        located = self._locate(path)
+        if located is None:
+            return False
+        self._schedule_located(located, force=True)
+        return True
+
+    def sync(self, root: Optional[str] = None) -> None:
+        """
+        Queue every new, changed or deleted file of one root, or of all roots
+
+        This walks the whole root on the calling thread; call it from a
+        worker thread, not the event loop.
+        """
+        names = [root] if root else list(self.roots)
+        for name in names:
+            known = {
+                path: (mtime_ns, size)
+                for path, mtime_ns, size in self._read().execute(
+                    "SELECT path, mtime_ns, size FROM text_index_files WHERE root = ?", (name,)
+                )
+            }
+            for path, stat in self._walk(self.roots[name]):
+                if known.pop(path, None) != (stat.st_mtime_ns, stat.st_size):
+                    self._schedule_located((name, path))
+            for path in known:
+                self._schedule_located((name, path))
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued file is indexed; returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def search(self, query: str, limit: int = 20, root: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Find lines matching keywords and "quoted phrases"
+
+        Args:
+            query: Words that must all occur in a line; quoted parts must occur as phrases
+            limit: Maximum number of hits
+            root: Only search files under this root
+
+        Returns:
+            Hits with root, path (relative to the root), line and text, best first
+        """
+        expression = build_match_expression(query)
+        if not expression:
+            return []
+        # BM25 is only computed for the first rank_window matches; ranking
+        # every line that contains a common word would cost far more than
+        # the lookup itself
+        in_root = ""
+        args: List[Any] = [expression]
+        if root:
+            in_root = "AND (rowid >> ?) IN (SELECT id FROM text_index_files WHERE root = ?)"
+            args += [LINE_BITS, root]
+        sql = f"""
+            SELECT f.root, f.path, l.rowid, l.text
+            FROM (
+                SELECT rowid, text, bm25(text_index_lines) AS score
+                FROM text_index_lines
+                WHERE text_index_lines MATCH ? {in_root}
+                LIMIT ?
+            ) AS l
+            JOIN text_index_files AS f ON f.id = (l.rowid >> ?)
+            ORDER BY l.score
+            LIMIT ?
+        """
+        args += [self.rank_window, LINE_BITS, limit]
+        return [
+            {"root": root_name, "path": path, "line": rowid & ((1 << LINE_BITS) - 1), "text": text}
+            for root_name, path, rowid, text in self._read().execute(sql, args)
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get file and line counts and indexing progress"""
+        files, lines = self._read().execute(
+            "SELECT COUNT(*), COALESCE(SUM(lines), 0) FROM text_index_files"
+        ).fetchone()
+        return {
+            "roots": dict(self.roots),
+            "files": files,
+            "lines": lines,
+            "queued": self._queue.unfinished_tasks,
+            "indexed": self.indexed,
+            "removed": self.removed
+        }
+
+    def close(self) -> None:
+        """Stop the background thread after the queued files"""
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
+        self._writer.close()
+
+    def _read(self) -> sqlite3.Connection:
+        """Get this thread's read connection"""
+        connection = getattr(self._readers, "connection", None)
+        if connection is None:
+            connection = self._readers.connection = self._connect()
+        return connection
+
+    def _locate(self, path: str) -> Optional[Tuple[str, str]]:
+        """Get the root name and relative path of a file"""
+        path = os.path.abspath(path)
+        for name, directory in self.roots.items():
+            if path.startswith(directory + os.sep):
+                return name, os.path.relpath(path, directory)
+        return None
+
+    def _schedule_located(self, located: Tuple[str, str], force: bool = False) -> None:
+        with self._pending_lock:
+            if located in self._pending:
+                self._pending[located] = self._pending[located] or force
+                return
+            self._pending[located] = force
+        self._queue.put(located)
+        self.start()
+
+    def _walk(self, directory: str) -> Iterator[Tuple[str, os.stat_result]]:
+        """Yield the relative path and stat of every text file under a directory"""
+        stack = [directory]
+        while stack:
+            try:
+                entries = list(os.scandir(stack.pop()))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file() and Path(entry.name).suffix.lower() in TEXT_EXTENSIONS:
+                    yield os.path.relpath(entry.path, directory), entry.stat()
+
+    def _run(self) -> None:
+        """Index queued files in batches, one transaction per batch"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    self._queue.task_done()
+                    break
+                batch.append(item)
+
+            with self._pending_lock:
+                forced = [self._pending.pop(item) for item in batch]
+            try:
+                with self._writer:
+                    for (root, path), force in zip(batch, forced):
+                        for file_path in self._expand(root, path):
+                            self._index(root, file_path, force)
+            except Exception as e:
+                logger.error(f"Text indexing failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _expand(self, root: str, path: str) -> List[str]:
+        """Get a queued path and, if it is or was a directory, the files under it"""
+        paths = [path]
+        prefix = path + os.sep
+        # Every path starting with prefix sorts between prefix and the same string
+        # with the separator's successor
+        paths.extend(
+            indexed for indexed, in self._writer.execute(
+                "SELECT path FROM text_index_files WHERE root = ? AND path > ? AND path < ?",
+                (root, prefix, path + chr(ord(os.sep) + 1))
+            )
+        )
+        full_path = os.path.join(self.roots[root], path)
+        if os.path.isdir(full_path):
+            known = set(paths)
+            paths.extend(
+                file_path for file_path in (
+                    os.path.join(path, relative) for relative, _ in self._walk(full_path)
+                )
+                if file_path not in known
+            )
+        return paths
+
+    def _index(self, root: str, path: str, force: bool = False) -> None:
+        """
+        Bring one file's rows up to date, removing them if it's gone
+
+        Unless forced, a file whose mtime and size match the index is skipped.
+        """
+        full_path = os.path.join(self.roots[root], path)
+        row = self._writer.execute(
+            "SELECT id, mtime_ns, size FROM text_index_files WHERE root = ? AND path = ?", (root, path)
+        ).fetchone()
+        try:
+            stat = os.stat(full_path)
+        except FileNotFoundError:
+            stat = None
+        indexable = (
+            stat is not None and stat.st_size <= self.max_file_bytes and is_text_file(full_path)
+        )
+
+        if row is not None:
+            file_id, mtime_ns, size = row
+            if indexable and not force and (mtime_ns, size) == (stat.st_mtime_ns, stat.st_size):
+                return
+            self._writer.execute(
+                "DELETE FROM text_index_lines WHERE rowid >= ? AND rowid < ?",
+                (file_id << LINE_BITS, (file_id + 1) << LINE_BITS)
+            )
+            if not indexable:
+                self._writer.execute("DELETE FROM text_index_files WHERE id = ?", (file_id,))
+                self.removed += 1
+                return
+        elif not indexable:
+            return
+        else:
+            file_id = self._writer.execute(
+                "INSERT INTO text_index_files (root, path, mtime_ns, size, lines) VALUES (?, ?, 0, 0, 0)",
+                (root, path)
+            ).lastrowid
+
+        lines = 0
+        try:
+            rows = []
+            for number, text in iter_file_lines(full_path):
+                rows.append(((file_id << LINE_BITS) | number, text))
+                lines += 1
+            self._writer.executemany("INSERT INTO text_index_lines (rowid, text) VALUES (?, ?)", rows)
+        except OSError as e:
+            logger.warning(f"Could not index {full_path}: {e}")
+        self._writer.execute(
+            "UPDATE text_index_files SET mtime_ns = ?, size = ?, lines = ? WHERE id = ?",
+            (stat.st_mtime_ns, stat.st_size, lines, file_id)
+        )
+        self.indexed += 1
+
+
+# Global full-text indexes by database path, and the path used when none is given
+_indexes: Dict[str, FullTextIndex] = {}
+_default_index_path = DEFAULT_INDEX_DB
+
+def set_default_index_path(db_path: str) -> None:
+    """Set the database of the index shared by every caller that doesn't name one"""
+    global _default_index_path
+    _default_index_path = db_path
+
+def get_text_index(db_path: Optional[str] = None) -> FullTextIndex:
+    """Get the shared full-text index stored at a path, or at the default path"""
+    db_path = db_path or _default_index_path
+    if db_path not in _indexes:
+        _indexes[db_path] = FullTextIndex(db_path)
+    return _indexes[db_path]
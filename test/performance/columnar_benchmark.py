@@ -0,0 +1,82 @@
+# Columnar Dataset Benchmark
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from plugins.columnar import ColumnarStore
+
+REGIONS = ["north", "south", "east", "west", "central"]
+PRODUCTS = [f"product {i}" for i in range(40)]
+
+def write_dataset(path: Path, rows: int, seed: int = 3) -> None:
+    """Write a sales CSV with text, int and float columns"""
+    rng = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "region", "product", "units", "price"])
+        for start in range(0, rows, 10000):
+            writer.writerows(
+                [i, rng.choice(REGIONS), rng.choice(PRODUCTS), rng.randint(1, 20), round(rng.uniform(1, 100), 2)]
+                for i in range(start, min(start + 10000, rows))
+            )
+
+def dict_rows_analysis(path: str):
+    """Previous path: a dict per row from csv.DictReader, aggregated in Python"""
+    totals = defaultdict(lambda: [0, 0.0])
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            if int(row["units"]) >= 5:
+                group = totals[row["region"]]
+                group[0] += int(row["units"])
+                group[1] += float(row["price"])
+    return len(totals)
+
+def columnar_analysis(store: ColumnarStore, path: str):
+    table = store.get(path)
+    mask = table.filter([{"column": "units", "op": ">=", "value": 5}])
+    return len(table.group_by(["region"], {"units": ["sum"], "price": ["sum"]}, mask))
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+def main():
+    """Compare a filter plus group-by over dict rows and over cached columns"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000, help="Rows in the generated CSV")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeated analyses of the same file")
+    args = parser.parse_args()
+
+    print("COLUMNAR DATASET BENCHMARK")
+    print(f"Rows: {args.rows}")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sales.csv")
+        write_dataset(Path(path), args.rows)
+        print(f"CSV size: {os.path.getsize(path) / 1024 / 1024:.1f}MB\n")
+
+        samples = [timed(dict_rows_analysis, path) for _ in range(args.repeat)]
+        print(f"DictReader, every run:        {sum(samples) / len(samples) * 1000:9.1f}ms")
+
+        cache_dir = os.path.join(tmp, "columns")
+        store = ColumnarStore(cache_dir)
+        print(f"Columnar, first run (convert):{timed(columnar_analysis, store, path) * 1000:9.1f}ms")
+
+        samples = [timed(columnar_analysis, ColumnarStore(cache_dir), path) for _ in range(args.repeat)]
+        print(f"Columnar, persisted table:    {sum(samples) / len(samples) * 1000:9.1f}ms")
+
+        samples = [timed(columnar_analysis, store, path) for _ in range(args.repeat)]
+        print(f"Columnar, table in memory:    {sum(samples) / len(samples) * 1000:9.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# File Download Benchmark
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).parent.parent.parent
+
+# Served by uvicorn in a child process: the download endpoint next to
+# Starlette's FileResponse as the baseline
+APP = """
+import os
+from fastapi import FastAPI
+from starlette.responses import FileResponse
+from backend.api.endpoints import files
+from backend.core.config import settings
+
+settings.UPLOAD_PATH = os.environ["BENCHMARK_UPLOAD_PATH"]
+app = FastAPI()
+app.include_router(files.router, prefix="/files")
+
+@app.get("/baseline/{name}")
+async def baseline(name: str):
+    return FileResponse(os.path.join(settings.UPLOAD_PATH, name))
+"""
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def write_file(path: Path, size: int) -> None:
+    block = os.urandom(1024 * 1024)
+    with open(path, "wb") as f:
+        for _ in range(size // len(block)):
+            f.write(block)
+
+async def download(client: httpx.AsyncClient, url: str, headers=None) -> int:
+    received = 0
+    async with client.stream("GET", url, headers=headers) as response:
+        async for chunk in response.aiter_raw():
+            received += len(chunk)
+    return received
+
+async def throughput(base: str, path: str, clients: int, repeat: int) -> float:
+    """Download a file from several clients at once and return MB/s overall"""
+    async with httpx.AsyncClient(base_url=base, timeout=None, limits=httpx.Limits(max_connections=clients)) as client:
+        start = time.perf_counter()
+        sizes = await asyncio.gather(*(download(client, path) for _ in range(clients * repeat)))
+        return sum(sizes) / (time.perf_counter() - start) / 1024 / 1024
+
+async def request_latency(base: str, path: str, size: int, count: int, conditional: bool):
+    """p50 and p95 of 64KB range requests, or of revalidations answered with 304"""
+    samples = []
+    async with httpx.AsyncClient(base_url=base, timeout=None) as client:
+        etag = (await client.head(path)).headers.get("etag")
+        for _ in range(count):
+            if conditional:
+                headers = {"If-None-Match": etag}
+            else:
+                offset = random.randrange(0, size - 65536)
+                headers = {"Range": f"bytes={offset}-{offset + 65535}"}
+            start = time.perf_counter()
+            await download(client, path, headers)
+            samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.95)]
+
+async def run(base: str, args) -> None:
+    cases = [("FileResponse", "/baseline"), ("download_file", "/files/download")]
+    print(f"\nSingle client, {args.size_mb}MB file:")
+    for label, prefix in cases:
+        rate = await throughput(base, f"{prefix}/large.bin", 1, 2)
+        print(f"  {label:<14} {rate:8.1f} MB/s")
+
+    print(f"\n{args.clients} concurrent clients, 16MB file:")
+    for label, prefix in cases:
+        rate = await throughput(base, f"{prefix}/small.bin", args.clients, 2)
+        print(f"  {label:<14} {rate:8.1f} MB/s")
+
+    print("\ndownload_file request latency:")
+    size = args.size_mb * 1024 * 1024
+    for label, conditional in (("64KB range", False), ("304 revalidate", True)):
+        p50, p95 = await request_latency(base, "/files/download/large.bin", size, 200, conditional)
+        print(f"  {label:<14} p50 {p50 * 1000:6.2f}ms   p95 {p95 * 1000:6.2f}ms")
+
+def main():
+    """Compare download throughput and latency against Starlette's FileResponse"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=512, help="Size of the large file")
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent clients")
+    args = parser.parse_args()
+
+    print("FILE DOWNLOAD BENCHMARK")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_file(Path(tmp) / "large.bin", args.size_mb * 1024 * 1024)
+        write_file(Path(tmp) / "small.bin", 16 * 1024 * 1024)
+        app_dir = Path(tmp) / "app"
+        app_dir.mkdir()
+        (app_dir / "benchmark_app.py").write_text(APP)
+
+        port = free_port()
+        env = dict(os.environ, BENCHMARK_UPLOAD_PATH=tmp, PYTHONPATH=f"{ROOT}{os.pathsep}{app_dir}")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "benchmark_app:app", "--port", str(port), "--log-level", "warning"],
+            cwd=app_dir, env=env
+        )
+        try:
+            base = f"http://127.0.0.1:{port}"
+            for _ in range(100):
+                try:
+                    httpx.get(base + "/docs")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.1)
+            asyncio.run(run(base, args))
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
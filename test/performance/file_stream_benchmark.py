@@ -0,0 +1,126 @@
+# File Stream Benchmark
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from plugins.file_streams import count_text, iter_json_array, read_csv_page
+
+WORDS = "the quick brown fox jumps over a lazy dog while agents index data".split()
+
+def write_text(path: Path, size: int) -> None:
+    """Write about size bytes of word lines"""
+    line = " ".join(WORDS) + "\n"
+    block = line * (1024 * 1024 // len(line))
+    with open(path, "w") as f:
+        for _ in range(size // len(block) + 1):
+            f.write(block)
+
+def write_csv(path: Path, size: int) -> None:
+    """Write about size bytes of CSV rows"""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "score", "comment"])
+        i = 0
+        while f.tell() < size:
+            writer.writerows([i + n, f"user {i + n}", (i + n) % 100, " ".join(WORDS)] for n in range(10000))
+            i += 10000
+
+def write_json(path: Path, size: int) -> None:
+    """Write about size bytes of a JSON array of objects"""
+    with open(path, "w") as f:
+        f.write("[")
+        i = 0
+        while f.tell() < size:
+            f.write(",".join(json.dumps({"id": i + n, "tags": WORDS[:3]}) for n in range(10000)) + ",")
+            i += 10000
+        f.write(json.dumps({"id": i}) + "]")
+
+def _peak() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def whole_file_word_count(path: str):
+    """Previous path: read the whole file, then split it"""
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    return len(content.split())
+
+def streamed_word_count(path: str):
+    return count_text(path)["word_count"]
+
+def whole_file_csv_page(path: str):
+    """Previous path: build a dict per row, then take the last 100"""
+    with open(path, encoding="utf-8") as f:
+        rows = list(csv.DictReader(f.read().splitlines()))
+    return len(rows[-100:])
+
+def streamed_csv_page(path: str):
+    return len(read_csv_page(path, 10 ** 12, 100)["rows"])
+
+def whole_file_json_count(path: str):
+    with open(path, encoding="utf-8") as f:
+        return len(json.load(f))
+
+def streamed_json_count(path: str):
+    return sum(1 for _ in iter_json_array(path))
+
+def _measure(function, path, results):
+    baseline = _peak()
+    start = time.perf_counter()
+    function(path)
+    results.put((time.perf_counter() - start, _peak() - baseline))
+
+def measure(function, path: str):
+    """Run one operation in a fresh process and return its time and peak memory growth"""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_measure, args=(function, path, results))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        return None
+    return results.get()
+
+def main():
+    """Compare peak memory of whole-file and streamed processing"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=1024, help="Size of each generated file")
+    parser.add_argument("--skip-whole-file", action="store_true", help="Only run the streamed operations")
+    args = parser.parse_args()
+    size = args.size_mb * 1024 * 1024
+
+    print("FILE STREAM BENCHMARK")
+    print(f"File size: {args.size_mb}MB")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = [
+            ("text word count", write_text, whole_file_word_count, streamed_word_count),
+            ("CSV last page", write_csv, whole_file_csv_page, streamed_csv_page),
+            ("JSON array scan", write_json, whole_file_json_count, streamed_json_count)
+        ]
+        for label, write, whole, streamed in cases:
+            path = os.path.join(tmp, label.replace(" ", "_"))
+            write(Path(path), size)
+            print(f"\n{label} ({os.path.getsize(path) / 1024 / 1024:.0f}MB):")
+            for name, function in (("whole file", whole), ("streamed", streamed)):
+                if name == "whole file" and args.skip_whole_file:
+                    continue
+                result = measure(function, path)
+                if result is None:
+                    print(f"  {name:<12} failed (out of memory?)")
+                    continue
+                elapsed, peak = result
+                print(f"  {name:<12} {elapsed:7.2f}s   peak memory +{peak / 1024 / 1024:8.1f}MB")
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# Plugin Startup Benchmark
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from plugins.plugin_manager import PluginManager
+
+PLUGINS = 8
+IMPORT_COST = 0.15  # Simulated import of heavy dependencies (PIL, parsers), in seconds
+INIT_COST = 0.05  # Simulated initialize() work, in seconds
+
+PLUGIN_SOURCE = '''
+import asyncio
+import time
+from plugins.base_plugin import BasePlugin
+
+time.sleep({import_cost})
+
+class Plugin{index}(BasePlugin):
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.name = "Plugin {index}"
+        self.capabilities = ["capability_{index}"]
+
+    async def initialize(self):
+        await asyncio.sleep({init_cost})
+        await super().initialize()
+
+    async def execute(self, parameters):
+        return {{"success": True}}
+'''
+
+def write_plugins(root: Path, package: str) -> Path:
+    """Write a fresh, never imported plugin package"""
+    plugins_path = root / package
+    (plugins_path / "core_plugins").mkdir(parents=True)
+    for index in range(PLUGINS):
+        (plugins_path / "core_plugins" / f"plugin{index}.py").write_text(
+            PLUGIN_SOURCE.format(index=index, import_cost=IMPORT_COST, init_cost=INIT_COST)
+        )
+    return plugins_path
+
+async def serial_startup(plugins_path: Path) -> float:
+    """Startup as before: import and initialize every plugin one after another"""
+    manager = PluginManager(plugins_path)
+    start = time.perf_counter()
+    manager.scan_plugins()
+    for plugin_id in manager.manifests:
+        await manager.load_plugin(plugin_id)
+    return time.perf_counter() - start
+
+async def main():
+    """Compare startup time and first-call latency of serial, eager and lazy loading"""
+    print("PLUGIN STARTUP BENCHMARK")
+    print(f"Plugins: {PLUGINS}, import cost: {IMPORT_COST * 1000:.0f}ms, "
+          f"initialize cost: {INIT_COST * 1000:.0f}ms")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        sys.path.insert(0, str(root))
+
+        serial = await serial_startup(write_plugins(root, "serial_plugins"))
+        print(f"\nSerial import of all plugins: {serial:.3f}s")
+
+        manager = PluginManager(write_plugins(root, "concurrent_plugins"))
+        manager.scan_plugins()
+        start = time.perf_counter()
+        await manager.preload_plugins()
+        print(f"Concurrent load of all plugins: {time.perf_counter() - start:.3f}s")
+
+        manager = PluginManager(write_plugins(root, "lazy_plugins"))
+        await manager.initialize()
+        print(f"Lazy startup (manifest scan only): {manager.startup_time * 1000:.1f}ms")
+
+        start = time.perf_counter()
+        await manager.execute_plugin("plugin0", {})
+        first_call = time.perf_counter() - start
+        start = time.perf_counter()
+        await manager.execute_plugin("plugin0", {})
+        warm_call = time.perf_counter() - start
+        print(f"  First call (import + initialize): {first_call * 1000:.1f}ms")
+        print(f"  Later calls: {warm_call * 1000:.3f}ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+# Text Index Benchmark
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from plugins.text_index import FullTextIndex
+
+WORDS = (
+    "agent workflow plugin memory index search query token model error warning disk "
+    "network timeout retry cache latency report summary invoice customer order"
+).split()
+
+def write_corpus(directory: Path, files: int, lines: int, seed: int = 7) -> None:
+    """Write files of random word lines across a few subdirectories"""
+    rng = random.Random(seed)
+    for i in range(files):
+        path = directory / f"dir{i % 50}" / f"doc{i}.txt"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("".join(" ".join(rng.choices(WORDS, k=12)) + f" id{i}x{n}\n" for n in range(lines)))
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def time_queries(index: FullTextIndex, queries, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, 20)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+def grep_scan(directory: Path, needle: str) -> int:
+    """Previous path: open every file and scan its lines"""
+    hits = 0
+    for path in directory.rglob("*.txt"):
+        with open(path, encoding="utf-8") as f:
+            hits += sum(1 for line in f if needle in line)
+    return hits
+
+def main():
+    """Measure index build time, query latency and incremental update latency"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=20000, help="Number of generated files")
+    parser.add_argument("--lines", type=int, default=20, help="Lines per file")
+    parser.add_argument("--repeat", type=int, default=20, help="Rounds of each query set")
+    args = parser.parse_args()
+
+    print("TEXT INDEX BENCHMARK")
+    print(f"Corpus: {args.files} files x {args.lines} lines")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = Path(tmp) / "files"
+        write_corpus(corpus, args.files, args.lines)
+        index = FullTextIndex(os.path.join(tmp, "index.db"))
+        index.add_root("files", str(corpus))
+
+        start = time.perf_counter()
+        index.sync()
+        index.wait()
+        build = time.perf_counter() - start
+        stats = index.get_stats()
+        print(f"\nInitial build: {build:.2f}s ({stats['files']} files, {stats['lines']} lines)")
+
+        start = time.perf_counter()
+        index.sync()
+        index.wait()
+        print(f"Resync, nothing changed: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+        query_sets = [
+            ("keyword", ["latency", "invoice", "timeout"]),
+            ("two keywords", ["disk error", "cache retry", "customer order"]),
+            ("phrase", ['"disk error"', '"customer order"', '"retry cache"']),
+            ("prefix", ["lat*", "inv*", "tok*"]),
+            ("rare id", [f"id{args.files // 2}x3", f"id{args.files - 1}x0", "id7x1"])
+        ]
+        print("\nQuery latency (20 hits):")
+        for label, queries in query_sets:
+            samples = time_queries(index, queries, args.repeat)
+            print(f"  {label:<13} p50 {percentile(samples, 50) * 1000:7.2f}ms   p95 {percentile(samples, 95) * 1000:7.2f}ms")
+
+        start = time.perf_counter()
+        grep_scan(corpus, f"id{args.files // 2}x3 ")
+        print(f"  {'full scan':<13} {(time.perf_counter() - start) * 1000:9.1f}ms (previous path)")
+
+        samples = []
+        for i in range(50):
+            path = corpus / "dir0" / f"doc{i * 50}.txt"
+            path.write_text(f"freshly edited zebra{i}\n")
+            start = time.perf_counter()
+            index.schedule(str(path))
+            while not index.search(f"zebra{i}"):
+                time.sleep(0.0005)
+            samples.append(time.perf_counter() - start)
+        print(f"\nWrite to searchable: p50 {percentile(samples, 50) * 1000:.1f}ms   p95 {percentile(samples, 95) * 1000:.1f}ms")
+        index.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# Workflow Engine Benchmark
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.services.workflow_engine import WorkflowEngine
+from backend.services.workflow_plan import compile_workflow
+
+WORKFLOW_DIR = Path(__file__).parent.parent.parent / "workflow"
+WORKFLOWS = ["research.json", "analysis.json", "coding.json"]
+STEP_LATENCY = 0.05  # Simulated LLM latency per step, in seconds
+
+async def stub_runner(step, inputs, handle):
+    """Stand-in for an LLM call with a fixed latency"""
+    await asyncio.sleep(STEP_LATENCY)
+    return {name: f"{step['id']}:{name}" for name in step.get("outputs", [])}
+
+async def time_workflow(plan, max_parallelism, iterations):
+    """Average wall-clock time of a workflow run"""
+    engine = WorkflowEngine(stub_runner, max_parallelism=max_parallelism)
+    input_data = {name: "benchmark" for name in plan.external_inputs}
+
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        result = await engine.run(plan, input_data)
+        assert result["status"] == "completed"
+    return (time.perf_counter() - start_time) / iterations
+
+async def main(iterations=5, max_parallelism=4):
+    """Compare sequential and parallel execution of the shipped workflows"""
+    print("WORKFLOW ENGINE BENCHMARK")
+    print(f"Step latency: {STEP_LATENCY * 1000:.0f}ms, parallelism: {max_parallelism}")
+    print("="*60)
+
+    for filename in WORKFLOWS:
+        with open(WORKFLOW_DIR / filename) as f:
+            plan = compile_workflow(json.load(f)["steps"])
+
+        sequential = await time_workflow(plan, 1, iterations)
+        parallel = await time_workflow(plan, max_parallelism, iterations)
+
+        print(f"\n{filename} ({len(plan.order)} steps):")
+        print(f"  Sequential: {sequential:.3f}s")
+        print(f"  Parallel:   {parallel:.3f}s")
+        print(f"  Speedup:    {sequential / parallel:.2f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+# Workflow Map Step Benchmark
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.services.workflow_engine import WorkflowEngine
+from backend.services.workflow_plan import compile_workflow
+
+ITEM_LATENCY = 0.05  # Simulated LLM latency per item, in seconds
+ITEMS = 32
+PARALLELISM = [1, 2, 4, 8, 16]
+
+async def stub_runner(step, inputs, handle):
+    """Stand-in for an LLM call with a fixed latency"""
+    await asyncio.sleep(ITEM_LATENCY)
+    return {name: f"{step['id']}:{name}" for name in step.get("outputs", [])}
+
+def map_plan(max_parallelism, stages=1):
+    """A chain of map steps, each over the previous stage's items"""
+    steps = []
+    over = "sources"
+    for stage in range(stages):
+        output = f"stage_{stage}"
+        steps.append({
+            "id": output, "inputs": [over], "outputs": [output],
+            "map": {"over": over, "as": "item", "max_parallelism": max_parallelism}
+        })
+        over = output
+    return compile_workflow(steps)
+
+async def time_plan(plan, iterations):
+    """Average wall-clock time of a workflow run"""
+    engine = WorkflowEngine(stub_runner)
+    input_data = {"sources": [f"source-{i}" for i in range(ITEMS)]}
+
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        result = await engine.run(plan, input_data)
+        assert result["status"] == "completed"
+    return (time.perf_counter() - start_time) / iterations
+
+async def main(iterations=3):
+    """Measure map step speedup as the parallelism limit grows"""
+    print("WORKFLOW MAP STEP BENCHMARK")
+    print(f"Items: {ITEMS}, item latency: {ITEM_LATENCY * 1000:.0f}ms")
+    print("="*60)
+
+    baseline = await time_plan(map_plan(1), iterations)
+    print("\nSingle map step:")
+    for parallelism in PARALLELISM:
+        elapsed = await time_plan(map_plan(parallelism), iterations)
+        speedup = baseline / elapsed
+        print(f"  Parallelism {parallelism:>2}: {elapsed:.3f}s  speedup {speedup:5.2f}x  "
+              f"efficiency {speedup / parallelism:.0%}")
+
+    # Two chained maps: the second consumes items as the first produces them,
+    # so the chain costs about one extra item latency rather than a full stage
+    print("\nTwo chained map steps (streamed):")
+    for parallelism in PARALLELISM:
+        single = await time_plan(map_plan(parallelism), iterations)
+        chained = await time_plan(map_plan(parallelism, stages=2), iterations)
+        print(f"  Parallelism {parallelism:>2}: {chained:.3f}s  ({chained / single:.2f}x a single stage)")
+
+if __name__ == "__main__":
+    asyncio.run(main())